@@ -1,7 +1,7 @@
 import os
 import sys
 import logging
-from datetime import datetime
+from collections import deque
 from typing import Dict, Any, List, Annotated, TypedDict
 from dotenv import load_dotenv
 
@@ -23,11 +23,9 @@ from langgraph.graph import StateGraph, END
 from langgraph.prebuilt import ToolNode
 from langgraph.graph.message import add_messages
 
-from tools.database_tool import DatabaseTool
-from tools.metrics_tool import MetricsTool
-from tools.charts_tool import ChartsTool
-from tools.news_tool import NewsTool
-from tools.report_tool import ReportTool
+from tools.auditoria import registrar_evento
+from tools.instrumentacao import cronometrado
+from tools.registro import obter_registro
 
 class EstadoAgente(TypedDict):
 
@@ -39,10 +37,11 @@ class EstadoAgente(TypedDict):
     audit_log: List[Dict]
 
 
+@cronometrado('orquestrador.ferramenta.calcular_metricas_srag')
 def fn_calcular_metricas_srag() -> str:
 
     try:
-        metrics = MetricsTool()
+        metrics = obter_registro().metricas()
         resultado = metrics.gerar_resumo_metricas()
         logging.getLogger('orquestrador').info("Métricas calculadas com sucesso")
         return resultado
@@ -51,10 +50,11 @@ def fn_calcular_metricas_srag() -> str:
         return f"Erro ao calcular métricas: {str(e)}"
 
 
+@cronometrado('orquestrador.ferramenta.gerar_graficos_srag')
 def fn_gerar_graficos_srag() -> str:
 
     try:
-        charts = ChartsTool()
+        charts = obter_registro().graficos()
         graficos = charts.gerar_todos_graficos()
         resultado = "Gráficos gerados:\n"
         for nome, caminho in graficos.items():
@@ -66,10 +66,11 @@ def fn_gerar_graficos_srag() -> str:
         return f"Erro ao gerar gráficos: {str(e)}"
 
 
+@cronometrado('orquestrador.ferramenta.buscar_noticias_srag')
 def fn_buscar_noticias_srag() -> str:
 
     try:
-        news = NewsTool()
+        news = obter_registro().noticias()
         resultado = news.obter_resumo_noticias(max_noticias=3)
         logging.getLogger('orquestrador').info("Notícias buscadas com sucesso")
         return resultado
@@ -78,10 +79,11 @@ def fn_buscar_noticias_srag() -> str:
         return "Não foi possível buscar notícias no momento."
 
 
+@cronometrado('orquestrador.ferramenta.consultar_estatisticas_banco')
 def fn_consultar_estatisticas_banco() -> str:
 
     try:
-        db = DatabaseTool()
+        db = obter_registro().banco()
         stats = db.obter_estatisticas_gerais()
         resultado = "Estatísticas do Banco de Dados:\n"
         for key, value in stats.items():
@@ -93,10 +95,34 @@ def fn_consultar_estatisticas_banco() -> str:
         return f"Erro ao consultar estatísticas: {str(e)}"
 
 
+@cronometrado('orquestrador.ferramenta.estimar_proporcao_srag')
+def fn_estimar_proporcao_srag(condicao: Dict[str, List[str]], filtros: Dict[str, List[str]] = None,
+                              exato: bool = False) -> str:
+
+    try:
+        metrics = obter_registro().metricas()
+        resultado = metrics.estimar_proporcao(condicao, filtros, exato=exato)
+        if resultado['exato']:
+            texto = f"Proporção: {resultado['estimativa']:.2f}% de {int(resultado['denominador'])} casos (cálculo exato)"
+        else:
+            inferior, superior = resultado['ic95']
+            texto = (
+                f"Proporção estimada: {resultado['estimativa']:.2f}% "
+                f"(IC 95%: {inferior:.2f}% a {superior:.2f}%; amostra de {resultado['amostra']} registros). "
+                "Use exato=true se for necessário o valor exato."
+            )
+        logging.getLogger('orquestrador').info("Proporção estimada com sucesso")
+        return texto
+    except Exception as e:
+        logging.getLogger('orquestrador').error(f"Erro ao estimar proporção: {e}")
+        return f"Erro ao estimar proporção: {str(e)}"
+
+
+@cronometrado('orquestrador.ferramenta.gerar_relatorio_pdf')
 def fn_gerar_relatorio_pdf(analise: str = "") -> str:
 
     try:
-        report = ReportTool()
+        report = obter_registro().relatorio()
         caminho = report.gerar_relatorio(analise_llm=analise if analise else None)
         logging.getLogger('orquestrador').info(f"Relatório PDF gerado: {caminho}")
         return f"Relatório PDF gerado com sucesso em: {caminho}"
@@ -129,6 +155,12 @@ consultar_estatisticas_banco = StructuredTool.from_function(
     description="Consulta estatísticas gerais do banco de dados de SRAG. Use para obter informações sobre o total de registros e período dos dados."
 )
 
+estimar_proporcao_srag = StructuredTool.from_function(
+    func=fn_estimar_proporcao_srag,
+    name="estimar_proporcao_srag",
+    description="Estima o percentual dos casos de SRAG que atendem uma condição, pela amostra estratificada (rápido, com intervalo de 95%). Dimensões: SG_UF_NOT (ex.: 'SP'), FAIXA_ETARIA ('0-4', '5-11', '12-17', '18-29', '30-44', '45-59', '60-74', '75+'), CS_SEXO ('M', 'F', 'I') e CLASSI_FIN (1 a 5). Ex.: casos em SP com 60 anos ou mais: condicao={'FAIXA_ETARIA': ['60-74', '75+']}, filtros={'SG_UF_NOT': ['SP']}. Use exato=true quando for pedida precisão."
+)
+
 gerar_relatorio_pdf = StructuredTool.from_function(
     func=fn_gerar_relatorio_pdf,
     name="gerar_relatorio_pdf",
@@ -140,11 +172,14 @@ TOOLS = [
     gerar_graficos_srag,
     buscar_noticias_srag,
     consultar_estatisticas_banco,
+    estimar_proporcao_srag,
     gerar_relatorio_pdf
 ]
 
 class AgenteOrquestrador:
 
+    MAX_LOG_AUDITORIA = 1000
+
     def __init__(self, modelo: str = "llama-3.1-8b-instant"):
 
         api_key = os.getenv("GROQ_API_KEY")
@@ -163,19 +198,20 @@ class AgenteOrquestrador:
 
         self.llm_com_tools = self.llm.bind_tools(TOOLS)
         self.grafo = self._criar_grafo()
-        self.log_auditoria = []
+        # Registro próprio da instância: o buffer da sessão é compartilhado com
+        # as consultas ao banco, que descartariam os eventos do agente
+        self._log_auditoria = deque(maxlen=self.MAX_LOG_AUDITORIA)
 
         logger.info(f"AgenteOrquestrador inicializado com modelo: {modelo}")
 
+    @property
+    def log_auditoria(self) -> List[Dict[str, Any]]:
+
+        return list(self._log_auditoria)
+
     def _registrar_auditoria(self, acao: str, detalhes: Dict[str, Any]):
 
-        registro = {
-            'timestamp': datetime.now().isoformat(),
-            'acao': acao,
-            'detalhes': detalhes
-        }
-        self.log_auditoria.append(registro)
-        logger.info(f"AUDITORIA: {registro}")
+        self._log_auditoria.append(registrar_evento('orquestrador', acao, detalhes=detalhes))
 
     def _criar_grafo(self) -> StateGraph:
 
@@ -195,6 +231,7 @@ class AgenteOrquestrador:
 
         return workflow.compile()
 
+    @cronometrado('orquestrador.llm')
     def _no_agente(self, state: EstadoAgente) -> Dict:
 
         messages = state["messages"]
@@ -217,6 +254,7 @@ class AgenteOrquestrador:
 
         return "fim"
 
+    @cronometrado('orquestrador.execucao')
     def executar(self, tarefa: str) -> Dict[str, Any]:
 
         logger.info(f"Iniciando execução da tarefa: {tarefa[:100]}...")
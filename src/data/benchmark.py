@@ -0,0 +1,215 @@
+import os
+import sys
+import json
+import time
+import tempfile
+import platform
+import subprocess
+import tracemalloc
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+import logging
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import preprocessing as pp
+from sintetico import RAIZ_PROJETO, caminho_padrao, gerar_extrato, interpretar_quantidade
+
+try:
+    import resource
+
+    RESOURCE_DISPONIVEL = True
+except ImportError:  # Windows
+    RESOURCE_DISPONIVEL = False
+
+logger = logging.getLogger('benchmark')
+
+DIRETORIO_RESULTADOS = os.path.join(RAIZ_PROJETO, 'reports', 'benchmarks')
+
+
+def _rss_pico_mb() -> float:
+
+    if not RESOURCE_DISPONIVEL:
+        return None
+
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss é em KB no Linux e em bytes no macOS
+    return round(pico / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def _commit_atual() -> str:
+
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True, cwd=RAIZ_PROJETO
+        ).stdout.strip()
+    except Exception:
+        return 'desconhecido'
+
+
+class MedidorEtapas:
+
+    def __init__(self, medir_memoria: bool = False):
+
+        self.medir_memoria = medir_memoria
+        self.etapas: List[Dict[str, Any]] = []
+
+    def medir(self, etapa: str, funcao: Callable, *args, **kwargs):
+
+        # tracemalloc enxerga as alocações do numpy/pandas, mas deixa a execução
+        # mais lenta; por isso é opcional e os tempos com ele não são comparáveis
+        if self.medir_memoria:
+            tracemalloc.start()
+
+        inicio = time.perf_counter()
+        resultado = funcao(*args, **kwargs)
+        segundos = time.perf_counter() - inicio
+
+        medicao = {'etapa': etapa, 'segundos': round(segundos, 4)}
+        if self.medir_memoria:
+            atual, pico = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            medicao['memoria_liquida_mb'] = round(atual / 2 ** 20, 1)
+            medicao['memoria_pico_mb'] = round(pico / 2 ** 20, 1)
+        medicao['rss_pico_mb'] = _rss_pico_mb()
+
+        self.etapas.append(medicao)
+        logger.info(f"{etapa}: {segundos:.3f}s")
+        return resultado
+
+
+def executar_completo(caminho_csv: str, caminho_db: str, medidor: MedidorEtapas) -> int:
+
+    df = medidor.medir('carregar_dados_brutos', pp.carregar_dados_brutos, caminho_csv)
+    df = medidor.medir('selecionar_colunas', pp.selecionar_colunas, df)
+    df = medidor.medir('remover_dados_sensiveis', pp.remover_dados_sensiveis, df)
+    df = medidor.medir('converter_datas', pp.converter_datas, df)
+    df = medidor.medir('limpar_dados', pp.limpar_dados, df)
+    df = medidor.medir('adicionar_colunas_auxiliares', pp.adicionar_colunas_auxiliares, df)
+    df = medidor.medir('adicionar_identificacao', pp.adicionar_identificacao, df, caminho_csv)
+    medidor.medir('salvar_sqlite', pp.salvar_sqlite, df, caminho_db)
+
+    return len(df)
+
+
+def executar_baixa_memoria(caminho_csv: str, caminho_db: str, medidor: MedidorEtapas) -> int:
+
+    df = medidor.medir('processar_dados_completo', pp.processar_dados_completo, caminho_csv, baixa_memoria=True)
+    df = medidor.medir('adicionar_identificacao', pp.adicionar_identificacao, df, caminho_csv)
+    medidor.medir('salvar_sqlite', pp.salvar_sqlite, df, caminho_db)
+
+    return len(df)
+
+
+def executar_blocos(caminho_csv: str, caminho_db: str, medidor: MedidorEtapas) -> int:
+
+    return medidor.medir('processar_dados_em_blocos', pp.processar_dados_em_blocos, caminho_csv, caminho_db)
+
+
+def executar_polars(caminho_csv: str, caminho_db: str, medidor: MedidorEtapas) -> int:
+
+    df = medidor.medir('processar_dados_polars', pp.processar_dados_polars, caminho_csv)
+    df = medidor.medir('adicionar_identificacao', pp.adicionar_identificacao, df, caminho_csv)
+    medidor.medir('salvar_sqlite', pp.salvar_sqlite, df, caminho_db)
+
+    return len(df)
+
+
+MODOS = {
+    'completo': executar_completo,
+    'baixa_memoria': executar_baixa_memoria,
+    'blocos': executar_blocos,
+    'polars': executar_polars,
+}
+
+
+def executar_benchmark(caminho_csv: str, modo: str = 'completo', medir_memoria: bool = False) -> Dict[str, Any]:
+
+    medidor = MedidorEtapas(medir_memoria)
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        caminho_db = os.path.join(diretorio, 'srag.db')
+        inicio = time.perf_counter()
+        registros = MODOS[modo](caminho_csv, caminho_db, medidor)
+        total = time.perf_counter() - inicio
+        tamanho_db = os.path.getsize(caminho_db)
+
+    return {
+        'commit': _commit_atual(),
+        'data_execucao': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'plataforma': platform.platform(),
+        'arquivo': os.path.basename(caminho_csv),
+        'tamanho_arquivo_mb': round(os.path.getsize(caminho_csv) / 2 ** 20, 1),
+        'modo': modo,
+        'medir_memoria': medir_memoria,
+        'registros': registros,
+        'total_segundos': round(total, 4),
+        'registros_por_segundo': round(registros / total) if total else None,
+        'tamanho_db_mb': round(tamanho_db / 2 ** 20, 1),
+        'etapas': medidor.etapas,
+    }
+
+
+def comparar_resultados(anterior: Dict[str, Any], atual: Dict[str, Any]) -> pd.DataFrame:
+
+    etapas_anteriores = {e['etapa']: e['segundos'] for e in anterior['etapas']}
+    linhas = []
+    for etapa in atual['etapas'] + [{'etapa': 'total', 'segundos': atual['total_segundos']}]:
+        antes = anterior['total_segundos'] if etapa['etapa'] == 'total' else etapas_anteriores.get(etapa['etapa'])
+        linhas.append({
+            'etapa': etapa['etapa'],
+            'segundos_anterior': antes,
+            'segundos_atual': etapa['segundos'],
+            'variacao_pct': round((etapa['segundos'] / antes - 1) * 100, 1) if antes else None,
+        })
+
+    return pd.DataFrame(linhas)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description='Benchmark da ingestão dos dados de SRAG')
+    parser.add_argument('--csv', default=None, help='CSV a processar (padrão: extrato sintético)')
+    parser.add_argument('--linhas', default='100k', help='Tamanho do extrato sintético (ex.: 100k, 1M, 10M)')
+    parser.add_argument('--semente', type=int, default=0, help='Semente do extrato sintético')
+    parser.add_argument('--modo', choices=list(MODOS), default='completo', help='Caminho de ingestão medido')
+    parser.add_argument('--memoria', action='store_true', help='Mede a memória alocada por etapa (tracemalloc)')
+    parser.add_argument('--saida', default=None, help=f'Arquivo JSON de resultados (padrão: {DIRETORIO_RESULTADOS}/)')
+    parser.add_argument('--comparar', default=None, help='JSON de uma execução anterior para comparação')
+    args = parser.parse_args()
+
+    caminho_csv = args.csv
+    if caminho_csv is None:
+        linhas = interpretar_quantidade(args.linhas)
+        caminho_csv = caminho_padrao(linhas, semente=args.semente)
+        if not os.path.exists(caminho_csv):
+            gerar_extrato(caminho_csv, linhas, semente=args.semente)
+
+    resultado = executar_benchmark(caminho_csv, args.modo, args.memoria)
+
+    saida = args.saida or os.path.join(
+        DIRETORIO_RESULTADOS,
+        f"benchmark_{resultado['modo']}_{resultado['registros']}_{resultado['commit']}_"
+        f"{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(saida) or '.', exist_ok=True)
+    with open(saida, 'w', encoding='utf-8') as f:
+        json.dump(resultado, f, indent=2, ensure_ascii=False)
+
+    print(pd.DataFrame(resultado['etapas']).to_string(index=False))
+    print(f"total: {resultado['total_segundos']}s ({resultado['registros_por_segundo']} registros/s)")
+    print(f"Resultados salvos em: {saida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as f:
+            anterior = json.load(f)
+        print(f"Comparação: {anterior['commit']} ({anterior['modo']}) -> {resultado['commit']} ({resultado['modo']})")
+        print(comparar_resultados(anterior, resultado).to_string(index=False))
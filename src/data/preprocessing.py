@@ -1,12 +1,33 @@
 import pandas as pd
+import numpy as np
 import sqlite3
 import os
+import io
+import re
+import hashlib
+import functools
 from pathlib import Path
 from datetime import datetime
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Tuple
+import sys
 import logging
 import warnings
 
-from polars.polars import first
+try:
+    import resource
+
+    RESOURCE_DISPONIVEL = True
+except ImportError:  # Windows
+    RESOURCE_DISPONIVEL = False
+
+try:
+    import polars as pl
+
+    POLARS_DISPONIVEL = True
+except ImportError:
+    POLARS_DISPONIVEL = False
 
 warnings.simplefilter('ignore')
 
@@ -62,11 +83,106 @@ COLUNAS_SELECIONADAS = [
     'DT_ENCERRA',      # Data de encerramento
 ]
 
-def carregar_dados_brutos(caminho_csv: str, nrows: int = None) -> pd.DataFrame:
+COLUNAS_DATA = [
+    'DT_NOTIFIC', 'DT_SIN_PRI', 'DT_NASC', 'DT_INTERNA',
+    'DT_ENTUTI', 'DT_SAIDUTI', 'DT_EVOLUCA', 'DT_ENCERRA',
+    'DOSE_1_COV', 'DOSE_2_COV', 'DOSE_REF', 'DT_UT_DOSE'
+]
+
+COLUNAS_TEXTO = ['SG_UF_NOT', 'ID_MUNICIP', 'CS_SEXO']
+COLUNAS_INTEIRAS = ['SEM_NOT', 'NU_IDADE_N', 'TP_IDADE']
+
+# Tipos explícitos para a leitura em blocos: datas e textos chegam como str e
+# são convertidos pelas etapas seguintes; os códigos 1/2/9 ficam em float64
+# para aceitar campos vazios.
+TIPOS_COLUNAS = {
+    col: (str if col in COLUNAS_DATA or col in COLUNAS_TEXTO
+          else 'Int64' if col in COLUNAS_INTEIRAS
+          else 'float64')
+    for col in COLUNAS_SELECIONADAS
+}
+
+# Tipos do modo de baixa memória: códigos 1/2/9 em inteiros anuláveis de 8
+# bits e textos repetitivos como category, lidos já no tipo final
+TIPOS_COLUNAS_COMPACTOS = {
+    col: (str if col in COLUNAS_DATA
+          else 'category' if col in COLUNAS_TEXTO
+          else 'Int16' if col == 'NU_IDADE_N'
+          else 'Int8')
+    for col in COLUNAS_SELECIONADAS
+}
+
+FAIXAS_ETARIAS = ['0-4', '5-11', '12-17', '18-29', '30-44', '45-59', '60-74', '75+']
+LIMITES_FAIXAS_ETARIAS = [0, 4, 11, 17, 29, 44, 59, 74, 200]  # intervalos (inferior, superior]
+
+# Codificação compacta do banco: datas viram número de dias desde 1970-01-01,
+# códigos 1/2/9 e flags viram inteiros, e UF, sexo e faixa etária são
+# codificados por dicionário, com tabelas de consulta dim_*.
+CODIGOS_UF = {
+    'RO': 11, 'AC': 12, 'AM': 13, 'RR': 14, 'PA': 15, 'AP': 16, 'TO': 17,
+    'MA': 21, 'PI': 22, 'CE': 23, 'RN': 24, 'PB': 25, 'PE': 26, 'AL': 27,
+    'SE': 28, 'BA': 29, 'MG': 31, 'ES': 32, 'RJ': 33, 'SP': 35, 'PR': 41,
+    'SC': 42, 'RS': 43, 'MS': 50, 'MT': 51, 'GO': 52, 'DF': 53,
+}  # códigos IBGE
+CODIGOS_SEXO = {'M': 1, 'F': 2, 'I': 9}
+CODIGOS_FAIXA_ETARIA = {faixa: i for i, faixa in enumerate(FAIXAS_ETARIAS, start=1)}
+
+COLUNAS_REDUNDANTES = ['DATA_NOTIFIC_STR']
+
+# Cubo de agregação (srag_cubo): contagens por dia x UF x sexo x faixa etária x
+# classificação final, construído na carga para que as métricas não precisem
+# varrer a tabela srag inteira.
+DIMENSOES_CUBO = ['DT_NOTIFIC', 'SG_UF_NOT', 'CS_SEXO', 'FAIXA_ETARIA', 'CLASSI_FIN']
+MEDIDAS_CUBO = {
+    'total_casos': 'COUNT(*)',
+    'casos_com_evolucao': 'SUM(CASE WHEN EVOLUCAO IS NOT NULL THEN 1 ELSE 0 END)',
+    'obitos': 'SUM(FLAG_OBITO)',
+    'obitos_srag': 'SUM(CASE WHEN EVOLUCAO = 2 THEN 1 ELSE 0 END)',
+    'obitos_outras_causas': 'SUM(CASE WHEN EVOLUCAO = 3 THEN 1 ELSE 0 END)',
+    'internacoes': 'SUM(CASE WHEN HOSPITAL = 1 THEN 1 ELSE 0 END)',
+    'internacoes_uti': 'SUM(CASE WHEN HOSPITAL = 1 AND UTI = 1 THEN 1 ELSE 0 END)',
+    'internacoes_nao_uti': 'SUM(CASE WHEN HOSPITAL = 1 AND UTI = 2 THEN 1 ELSE 0 END)',
+    'total_uti': 'SUM(FLAG_UTI)',
+    'vacinados_covid': 'SUM(FLAG_VACINADO_COVID)',
+    'nao_vacinados_covid': 'SUM(CASE WHEN VACINA_COV = 2 THEN 1 ELSE 0 END)',
+    'vacinados_gripe': 'SUM(FLAG_VACINADO_GRIPE)',
+    'nao_vacinados_gripe': 'SUM(CASE WHEN VACINA = 2 THEN 1 ELSE 0 END)',
+}
+
+# Amostra estratificada (srag_amostra) para respostas aproximadas: estratos
+# UF x mês de notificação, cada um com FRACAO_AMOSTRA dos seus registros e no
+# mínimo MIN_AMOSTRA_ESTRATO (estratos pequenos entram inteiros). Cada linha
+# guarda o tamanho do estrato e da amostra; o peso amostral é a razão entre eles.
+FRACAO_AMOSTRA = 0.05
+MIN_AMOSTRA_ESTRATO = 30
+
+TAMANHO_BLOCO_PADRAO = 200_000
+TAMANHO_SHARD_PADRAO = 128 * 1024 * 1024  # bytes
+
+# Campos que identificam uma notificação entre extratos anuais diferentes
+# (os extratos não trazem um identificador estável do caso).
+COLUNAS_CHAVE = [
+    'DT_NOTIFIC', 'DT_SIN_PRI', 'DT_NASC', 'SG_UF_NOT',
+    'ID_MUNICIP', 'CS_SEXO', 'NU_IDADE_N', 'TP_IDADE'
+]
+
+# Colunas de controle da carga, fora do hash que identifica alterações
+COLUNAS_CONTROLE = ['ARQUIVO_ORIGEM', 'CHAVE_NOTIFIC', 'HASH_REGISTRO']
+
+def carregar_dados_brutos(caminho_csv: str, nrows: int = None, baixa_memoria: bool = False) -> pd.DataFrame:
 
     logger.info(f"Carregando dados de: {caminho_csv}")
 
     try:
+        if baixa_memoria:
+            return pd.read_csv(
+                caminho_csv,
+                sep=';',
+                nrows=nrows,
+                usecols=lambda col: col in COLUNAS_SELECIONADAS,
+                dtype=TIPOS_COLUNAS_COMPACTOS
+            )
+
         df = pd.read_csv(
             caminho_csv,
             sep=';',
@@ -78,7 +194,22 @@ def carregar_dados_brutos(caminho_csv: str, nrows: int = None) -> pd.DataFrame:
         print(f'Ocorreu um Erro: {e}')
 
 
-def selecionar_colunas(df: pd.DataFrame) -> pd.DataFrame:
+def carregar_dados_em_blocos(caminho_csv: str, tamanho_bloco: int = TAMANHO_BLOCO_PADRAO,
+                             nrows: int = None) -> Iterator[pd.DataFrame]:
+
+    logger.info(f"Carregando dados em blocos de {tamanho_bloco} linhas: {caminho_csv}")
+
+    return pd.read_csv(
+        caminho_csv,
+        sep=';',
+        usecols=lambda col: col in COLUNAS_SELECIONADAS,
+        dtype=TIPOS_COLUNAS,
+        chunksize=tamanho_bloco,
+        nrows=nrows
+    )
+
+
+def selecionar_colunas(df: pd.DataFrame, copiar: bool = True) -> pd.DataFrame:
 
     colunas_disponiveis = [col for col in COLUNAS_SELECIONADAS if col in df.columns]
     colunas_faltantes = [col for col in COLUNAS_SELECIONADAS if col not in df.columns]
@@ -86,6 +217,9 @@ def selecionar_colunas(df: pd.DataFrame) -> pd.DataFrame:
     if colunas_faltantes:
         logger.warning(f"Colunas não encontradas: {colunas_faltantes}")
 
+    if not copiar:
+        return df[colunas_disponiveis]
+
     return df[colunas_disponiveis].copy()
 
 
@@ -114,21 +248,15 @@ def remover_dados_sensiveis(df: pd.DataFrame) -> pd.DataFrame:
     if 'NU_IDADE_N' in df.columns:
         df['FAIXA_ETARIA'] = pd.cut(
             df['NU_IDADE_N'],
-            bins=[0, 4, 11, 17, 29, 44, 59, 74, 200],
-            labels=['0-4', '5-11', '12-17', '18-29', '30-44', '45-59', '60-74', '75+']
+            bins=LIMITES_FAIXAS_ETARIAS,
+            labels=FAIXAS_ETARIAS
         )
     
     return df
 
 def converter_datas(df: pd.DataFrame) -> pd.DataFrame:
 
-    colunas_data = [
-        'DT_NOTIFIC', 'DT_SIN_PRI', 'DT_NASC', 'DT_INTERNA',
-        'DT_ENTUTI', 'DT_SAIDUTI', 'DT_EVOLUCA', 'DT_ENCERRA',
-        'DOSE_1_COV', 'DOSE_2_COV', 'DOSE_REF', 'DT_UT_DOSE'
-    ]
-    
-    for col in colunas_data:
+    for col in COLUNAS_DATA:
         if col in df.columns:
             df[col] = pd.to_datetime(df[col], dayfirst=True, errors='coerce')
     
@@ -137,9 +265,12 @@ def converter_datas(df: pd.DataFrame) -> pd.DataFrame:
 def limpar_dados(df: pd.DataFrame) -> pd.DataFrame:
 
     if 'CS_SEXO' in df.columns:
+        categorica = isinstance(df['CS_SEXO'].dtype, pd.CategoricalDtype)
         df['CS_SEXO'] = df['CS_SEXO'].str.upper().replace({
             'M': 'M', 'F': 'F', 'I': 'I'
         })
+        if categorica:
+            df['CS_SEXO'] = df['CS_SEXO'].astype('category')
 
     colunas_booleanas = [
         'FEBRE', 'TOSSE', 'GARGANTA', 'DISPNEIA', 'DESC_RESP',
@@ -156,67 +287,987 @@ def limpar_dados(df: pd.DataFrame) -> pd.DataFrame:
     
     return df
 
-def adicionar_colunas_auxiliares(df: pd.DataFrame) -> pd.DataFrame:
+def adicionar_colunas_auxiliares(df: pd.DataFrame, baixa_memoria: bool = False) -> pd.DataFrame:
+
+    # No modo de baixa memória as flags ficam em bool (1 byte) e as partes da
+    # data em inteiros anuláveis pequenos
+    tipo_flag = bool if baixa_memoria else int
 
     if 'EVOLUCAO' in df.columns:
-        df['FLAG_OBITO'] = df['EVOLUCAO'].isin([2, 3]).astype(int)
+        df['FLAG_OBITO'] = df['EVOLUCAO'].isin([2, 3]).astype(tipo_flag)
 
     if 'UTI' in df.columns:
-        df['FLAG_UTI'] = (df['UTI'] == 1).astype(int)
+        df['FLAG_UTI'] = (df['UTI'] == 1).fillna(False).astype(tipo_flag)
 
     if 'VACINA_COV' in df.columns:
-        df['FLAG_VACINADO_COVID'] = (df['VACINA_COV'] == 1).astype(int)
+        df['FLAG_VACINADO_COVID'] = (df['VACINA_COV'] == 1).fillna(False).astype(tipo_flag)
 
     if 'VACINA' in df.columns:
-        df['FLAG_VACINADO_GRIPE'] = (df['VACINA'] == 1).astype(int)
+        df['FLAG_VACINADO_GRIPE'] = (df['VACINA'] == 1).fillna(False).astype(tipo_flag)
 
     if 'DT_NOTIFIC' in df.columns:
-        df['ANO_NOTIFIC'] = df['DT_NOTIFIC'].dt.year
-        df['MES_NOTIFIC'] = df['DT_NOTIFIC'].dt.month
-        df['DIA_NOTIFIC'] = df['DT_NOTIFIC'].dt.day
-        df['DATA_NOTIFIC_STR'] = df['DT_NOTIFIC'].dt.strftime('%Y-%m-%d')
+        if baixa_memoria:
+            df['ANO_NOTIFIC'] = df['DT_NOTIFIC'].dt.year.astype('Int16')
+            df['MES_NOTIFIC'] = df['DT_NOTIFIC'].dt.month.astype('Int8')
+            df['DIA_NOTIFIC'] = df['DT_NOTIFIC'].dt.day.astype('Int8')
+        else:
+            df['ANO_NOTIFIC'] = df['DT_NOTIFIC'].dt.year
+            df['MES_NOTIFIC'] = df['DT_NOTIFIC'].dt.month
+            df['DIA_NOTIFIC'] = df['DT_NOTIFIC'].dt.day
+            df['DATA_NOTIFIC_STR'] = df['DT_NOTIFIC'].dt.strftime('%Y-%m-%d')
     
     return df
 
-def processar_dados_completo(caminho_csv: str, nrows: int = None) -> pd.DataFrame:
+def _pico_memoria_processo_mb() -> float:
+
+    if not RESOURCE_DISPONIVEL:
+        return None
+
+    # ru_maxrss é em KB no Linux e em bytes no macOS
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(pico / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def _registrar_memoria(df: pd.DataFrame, etapa: str, memoria: List[Dict[str, Any]]):
+
+    medicao = {
+        'etapa': etapa,
+        'memoria_frame_mb': round(df.memory_usage(deep=True).sum() / 2 ** 20, 1),
+        'pico_processo_mb': _pico_memoria_processo_mb(),
+    }
+    memoria.append(medicao)
+    logger.info(f"{etapa}: frame {medicao['memoria_frame_mb']} MB, pico do processo {medicao['pico_processo_mb']} MB")
+
+
+def processar_dados_completo(caminho_csv: str, nrows: int = None, baixa_memoria: bool = False) -> pd.DataFrame:
 
     logger.info("=" * 50)
-    logger.info("Iniciando processamento de dados")
+    logger.info("Iniciando processamento de dados" + (" (baixa memória)" if baixa_memoria else ""))
     logger.info("=" * 50)
     
 
-    df = carregar_dados_brutos(caminho_csv, nrows)
-    df = selecionar_colunas(df)
+    if not baixa_memoria:
+        df = carregar_dados_brutos(caminho_csv, nrows)
+        df = selecionar_colunas(df)
+        df = remover_dados_sensiveis(df)
+        df = converter_datas(df)
+        df = limpar_dados(df)
+        df = adicionar_colunas_auxiliares(df)
+    else:
+        # Mesmas etapas com tipos compactos, sem cópias e sem a coluna
+        # redundante DATA_NOTIFIC_STR, registrando a memória após cada uma
+        memoria = []
+        df = carregar_dados_brutos(caminho_csv, nrows, baixa_memoria=True)
+        _registrar_memoria(df, 'carregar_dados_brutos', memoria)
+        df = selecionar_colunas(df, copiar=False)
+        _registrar_memoria(df, 'selecionar_colunas', memoria)
+        df = remover_dados_sensiveis(df)
+        _registrar_memoria(df, 'remover_dados_sensiveis', memoria)
+        df = converter_datas(df)
+        _registrar_memoria(df, 'converter_datas', memoria)
+        df = limpar_dados(df)
+        _registrar_memoria(df, 'limpar_dados', memoria)
+        df = adicionar_colunas_auxiliares(df, baixa_memoria=True)
+        _registrar_memoria(df, 'adicionar_colunas_auxiliares', memoria)
+        df.attrs['memoria_por_etapa'] = memoria
+    
+    logger.info(f"Processamento concluído: {len(df)} registros")
+    logger.info(f"Colunas finais: {list(df.columns)}")
+    
+    return df
+
+
+def processar_bloco(df: pd.DataFrame) -> pd.DataFrame:
+
+    df = df[[col for col in COLUNAS_SELECIONADAS if col in df.columns]]
     df = remover_dados_sensiveis(df)
     df = converter_datas(df)
     df = limpar_dados(df)
     df = adicionar_colunas_auxiliares(df)
-    
+
+    return df
+
+
+def impressao_digital_arquivo(caminho_csv: str) -> str:
+
+    h = hashlib.blake2b(digest_size=16)
+    with open(caminho_csv, 'rb') as f:
+        for parte in iter(lambda: f.read(8 * 1024 * 1024), b''):
+            h.update(parte)
+
+    return h.hexdigest()
+
+
+def _estimar_bytes_por_linha(caminho_csv: str, amostra: int = 1000) -> int:
+
+    with open(caminho_csv, 'rb') as f:
+        f.readline()  # cabeçalho
+        tamanhos = [len(linha) for _, linha in zip(range(amostra), f)]
+
+    return max(1, sum(tamanhos) // max(1, len(tamanhos)))
+
+
+def processar_dados_retomavel(caminho_csv: str, caminho_db: str, tabela: str = 'srag',
+                              tamanho_bloco: int = TAMANHO_BLOCO_PADRAO) -> int:
+
+    # Cada bloco é um intervalo de bytes do arquivo; o deslocamento do último
+    # bloco gravado é confirmado na mesma transação dos seus registros. Se a
+    # carga morrer, a próxima execução do mesmo comando continua do ponto
+    # confirmado em vez de reprocessar o arquivo desde o início.
+    logger.info("=" * 50)
+    logger.info("Iniciando processamento de dados retomável")
+    logger.info("=" * 50)
+
+    arquivo = os.path.basename(caminho_csv)
+    impressao = impressao_digital_arquivo(caminho_csv)
+    tamanho_bytes = tamanho_bloco * _estimar_bytes_por_linha(caminho_csv)
+
+    with CargaSQLite(caminho_db, tabela, retomavel=True) as carga:
+        progresso = carga.progresso.get(arquivo)
+        if progresso and progresso['impressao_digital'] != impressao:
+            logger.warning(f"{arquivo} mudou desde a carga interrompida; reiniciando do início")
+            carga.descartar_progresso()
+            progresso = None
+
+        inicio = progresso['offset_bytes'] if progresso else None
+        total = progresso['registros'] if progresso else 0
+        if progresso:
+            logger.info(f"Retomando {arquivo} a partir do byte {inicio} ({total} registros já gravados)")
+
+        for i, shard in enumerate(dividir_em_shards(caminho_csv, tamanho_bytes, a_partir_de=inicio)):
+            bloco = _processar_shard(shard)
+            carga.adicionar(bloco)
+            total += len(bloco)
+            carga.confirmar(arquivo, impressao, shard[2], total)
+            logger.info(f"Bloco {i + 1} confirmado: {len(bloco)} registros (acumulado: {total}, byte {shard[2]})")
+
+    logger.info(f"Processamento retomável concluído: {total} registros")
+    return total
+
+
+def processar_dados_em_blocos(caminho_csv: str, caminho_db: str, tabela: str = 'srag',
+                              tamanho_bloco: int = TAMANHO_BLOCO_PADRAO, nrows: int = None) -> int:
+
+    logger.info("=" * 50)
+    logger.info("Iniciando processamento de dados em blocos")
+    logger.info("=" * 50)
+
+    total = 0
+    with CargaSQLite(caminho_db, tabela) as carga:
+        for i, bloco in enumerate(carregar_dados_em_blocos(caminho_csv, tamanho_bloco, nrows)):
+            bloco = adicionar_identificacao(processar_bloco(bloco), caminho_csv)
+            carga.adicionar(bloco)
+
+            total += len(bloco)
+            logger.info(f"Bloco {i + 1} salvo: {len(bloco)} registros (acumulado: {total})")
+
+    logger.info(f"Processamento em blocos concluído: {total} registros")
+    return total
+
+
+def _expr_faixa_etaria() -> 'pl.Expr':
+
+    # Equivalente ao pd.cut de remover_dados_sensiveis: intervalos fechados à
+    # direita, idades fora de (0, 200] ficam sem faixa
+    idade = pl.col('NU_IDADE_N')
+    faixa = pl.lit(None, dtype=pl.String)
+    limites = list(zip(FAIXAS_ETARIAS, LIMITES_FAIXAS_ETARIAS[:-1], LIMITES_FAIXAS_ETARIAS[1:]))
+    for rotulo, inferior, superior in reversed(limites):
+        faixa = pl.when((idade > inferior) & (idade <= superior)).then(pl.lit(rotulo)).otherwise(faixa)
+
+    return faixa.alias('FAIXA_ETARIA')
+
+
+def plano_polars(caminho_csv: str, nrows: int = None) -> 'pl.LazyFrame':
+
+    # Mesmas etapas de processar_bloco como um único plano lazy: a leitura
+    # projeta só as colunas selecionadas e o polars executa tudo em paralelo,
+    # sem cópias intermediárias entre as etapas
+    plano = pl.scan_csv(caminho_csv, separator=';', infer_schema=False, n_rows=nrows)
+
+    colunas_csv = plano.collect_schema().names()
+    colunas = [col for col in COLUNAS_SELECIONADAS if col in colunas_csv]
+    colunas_faltantes = [col for col in COLUNAS_SELECIONADAS if col not in colunas_csv]
+    if colunas_faltantes:
+        logger.warning(f"Colunas não encontradas: {colunas_faltantes}")
+
+    conversoes = []
+    for col in colunas:
+        if col in COLUNAS_DATA:
+            conversoes.append(
+                pl.col(col).str.strptime(pl.Date, '%d/%m/%Y', strict=False).cast(pl.Datetime('us'))
+            )
+        elif col == 'CS_SEXO':
+            conversoes.append(pl.col(col).str.to_uppercase())
+        elif col in COLUNAS_INTEIRAS:
+            conversoes.append(pl.col(col).cast(pl.Int64, strict=False))
+        elif col not in COLUNAS_TEXTO:
+            conversoes.append(pl.col(col).cast(pl.Float64, strict=False))
+
+    plano = plano.select(colunas).with_columns(conversoes)
+
+    auxiliares = []
+    if 'NU_IDADE_N' in colunas:
+        auxiliares.append(_expr_faixa_etaria())
+    if 'EVOLUCAO' in colunas:
+        auxiliares.append(pl.col('EVOLUCAO').is_in([2.0, 3.0]).fill_null(False).cast(pl.Int64).alias('FLAG_OBITO'))
+    if 'UTI' in colunas:
+        auxiliares.append((pl.col('UTI') == 1).fill_null(False).cast(pl.Int64).alias('FLAG_UTI'))
+    if 'VACINA_COV' in colunas:
+        auxiliares.append((pl.col('VACINA_COV') == 1).fill_null(False).cast(pl.Int64).alias('FLAG_VACINADO_COVID'))
+    if 'VACINA' in colunas:
+        auxiliares.append((pl.col('VACINA') == 1).fill_null(False).cast(pl.Int64).alias('FLAG_VACINADO_GRIPE'))
+    if 'DT_NOTIFIC' in colunas:
+        data = pl.col('DT_NOTIFIC').dt
+        auxiliares += [
+            data.year().alias('ANO_NOTIFIC'),
+            data.month().alias('MES_NOTIFIC'),
+            data.day().alias('DIA_NOTIFIC'),
+            data.strftime('%Y-%m-%d').alias('DATA_NOTIFIC_STR'),
+        ]
+
+    return plano.with_columns(auxiliares)
+
+
+def processar_dados_polars(caminho_csv: str, nrows: int = None) -> pd.DataFrame:
+
+    if not POLARS_DISPONIVEL:
+        raise ImportError("O motor polars requer o pacote polars (pip install polars)")
+
+    logger.info("=" * 50)
+    logger.info("Iniciando processamento de dados (motor polars)")
+    logger.info("=" * 50)
+
+    df = plano_polars(caminho_csv, nrows).collect().to_pandas()
+
+    # Tipos equivalentes aos do caminho pandas: os códigos seguem a inferência
+    # do read_csv (int64 sem campos vazios, float64 com algum vazio) e as partes
+    # da data, a do .dt (int32, ou float64 se houver data vazia)
+    for col in COLUNAS_SELECIONADAS:
+        if col in df.columns and col not in COLUNAS_DATA and col not in COLUNAS_TEXTO:
+            valores = df[col].astype('float64')
+            inteira = valores.notna().all() and (valores % 1 == 0).all()
+            df[col] = valores.astype('int64') if inteira else valores
+    for col in ['ANO_NOTIFIC', 'MES_NOTIFIC', 'DIA_NOTIFIC']:
+        if col in df.columns:
+            df[col] = df[col].astype('int32' if df[col].notna().all() else 'float64')
+    if 'FAIXA_ETARIA' in df.columns:
+        df['FAIXA_ETARIA'] = pd.Categorical(df['FAIXA_ETARIA'], categories=FAIXAS_ETARIAS, ordered=True)
+
     logger.info(f"Processamento concluído: {len(df)} registros")
     logger.info(f"Colunas finais: {list(df.columns)}")
-    
+
     return df
 
 
-def salvar_sqlite(df: pd.DataFrame, caminho_db: str, tabela: str = 'srag'):
+def dividir_em_shards(caminho_csv: str, tamanho_shard: int = TAMANHO_SHARD_PADRAO,
+                      a_partir_de: int = None) -> List[Tuple[str, int, int]]:
+
+    tamanho_arquivo = os.path.getsize(caminho_csv)
+    shards = []
+
+    with open(caminho_csv, 'rb') as f:
+        f.readline()  # cabeçalho
+        inicio = f.tell() if a_partir_de is None else a_partir_de
+
+        while inicio < tamanho_arquivo:
+            fim = inicio + tamanho_shard
+            if fim >= tamanho_arquivo:
+                fim = tamanho_arquivo
+            else:
+                # Avança até o fim da linha para não cortar um registro ao meio
+                f.seek(fim)
+                f.readline()
+                fim = f.tell()
+
+            shards.append((caminho_csv, inicio, fim))
+            inicio = fim
+
+    logger.info(f"{os.path.basename(caminho_csv)}: {len(shards)} shard(s) de até {tamanho_shard} bytes")
+    return shards
 
-    os.makedirs(os.path.dirname(caminho_db), exist_ok=True)
+
+def _normalizar_para_hash(df: pd.DataFrame) -> pd.DataFrame:
+
+    # O mesmo registro precisa gerar o mesmo hash em cargas feitas por caminhos
+    # diferentes (leitura completa, em blocos ou em shards), que inferem tipos
+    # diferentes para a mesma coluna.
+    normalizado = {}
+    for col in df.columns:
+        serie = df[col]
+        if pd.api.types.is_datetime64_any_dtype(serie):
+            normalizado[col] = serie.dt.strftime('%Y-%m-%d')
+        elif pd.api.types.is_numeric_dtype(serie):
+            normalizado[col] = serie.astype('float64')
+        else:
+            normalizado[col] = serie.astype(object).where(serie.notna(), None)
+
+    return pd.DataFrame(normalizado, index=df.index)
+
+
+def _hash_linhas(df: pd.DataFrame) -> pd.Series:
+
+    hashes = pd.util.hash_pandas_object(_normalizar_para_hash(df), index=False)
+    return pd.Series(hashes.to_numpy().view('int64'), index=df.index)
+
+
+def gerar_chave_notificacao(df: pd.DataFrame) -> pd.Series:
+
+    return _hash_linhas(df[[col for col in COLUNAS_CHAVE if col in df.columns]])
+
+
+def gerar_hash_registro(df: pd.DataFrame) -> pd.Series:
+
+    # Colunas redundantes (derivadas de outras e não gravadas) ficam fora, para
+    # que o hash não dependa do modo de processamento
+    colunas = [col for col in df.columns if col not in COLUNAS_CONTROLE and col not in COLUNAS_REDUNDANTES]
+    return _hash_linhas(df[colunas])
+
+
+def adicionar_identificacao(df: pd.DataFrame, caminho_csv: str) -> pd.DataFrame:
+
+    df['ARQUIVO_ORIGEM'] = os.path.basename(caminho_csv)
+    df['CHAVE_NOTIFIC'] = gerar_chave_notificacao(df)
+    df['HASH_REGISTRO'] = gerar_hash_registro(df)
+
+    return df
+
+
+def _processar_shard(shard: Tuple[str, int, int]) -> pd.DataFrame:
+
+    caminho_csv, inicio, fim = shard
+
+    with open(caminho_csv, 'rb') as f:
+        cabecalho = f.readline()
+        f.seek(inicio)
+        conteudo = f.read(fim - inicio)
+
+    df = pd.read_csv(
+        io.BytesIO(cabecalho + conteudo),
+        sep=';',
+        usecols=lambda col: col in COLUNAS_SELECIONADAS,
+        dtype=TIPOS_COLUNAS
+    )
+    return adicionar_identificacao(processar_bloco(df), caminho_csv)
+
+
+def _data_extrato(caminho_csv: str) -> datetime:
+
+    # INFLUD25-22-12-2025.csv -> extrato publicado em 22/12/2025
+    match = re.search(r'(\d{2})-(\d{2})-(\d{4})', os.path.basename(caminho_csv))
+    if match:
+        dia, mes, ano = (int(g) for g in match.groups())
+        return datetime(ano, mes, dia)
+
+    return datetime.fromtimestamp(os.path.getmtime(caminho_csv))
+
+
+def _mapear_com_janela(executor: ProcessPoolExecutor, funcao, itens: list, janela: int):
+
+    # Mantém no máximo `janela` shards em voo, preservando a ordem de entrada,
+    # para que o processo principal não acumule resultados enquanto grava.
+    pendentes = deque()
+    for item in itens:
+        pendentes.append(executor.submit(funcao, item))
+        if len(pendentes) >= janela:
+            yield pendentes.popleft().result()
+
+    while pendentes:
+        yield pendentes.popleft().result()
+
+
+def processar_multiplos_arquivos(caminhos_csv: List[str], caminho_db: str, tabela: str = 'srag',
+                                 tamanho_shard: int = TAMANHO_SHARD_PADRAO, max_workers: int = None) -> int:
+
+    logger.info("=" * 50)
+    logger.info(f"Iniciando processamento paralelo de {len(caminhos_csv)} arquivo(s)")
+    logger.info("=" * 50)
+
+    # Extratos mais recentes primeiro: quando uma notificação aparece em mais
+    # de um extrato, prevalece a versão mais atualizada.
+    caminhos_csv = sorted(caminhos_csv, key=_data_extrato, reverse=True)
+    shards = [shard for caminho in caminhos_csv for shard in dividir_em_shards(caminho, tamanho_shard)]
+
+    max_workers = max_workers or os.cpu_count() or 1
+    total = 0
+    duplicados = 0
+    arquivo_atual = None
+    chaves_arquivo = []
+    chaves_anteriores = []
+    indice_chaves = pd.Index([], dtype='int64')
+
+    with CargaSQLite(caminho_db, tabela) as carga:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            for bloco in _mapear_com_janela(executor, _processar_shard, shards, janela=2 * max_workers):
+                arquivo = bloco['ARQUIVO_ORIGEM'].iloc[0] if len(bloco) else arquivo_atual
+
+                if arquivo != arquivo_atual:
+                    # Novo arquivo: as chaves dos extratos já gravados formam o
+                    # lado de construção do hash join (tabela hash criada uma vez).
+                    chaves_anteriores.extend(chaves_arquivo)
+                    chaves_arquivo = []
+                    if chaves_anteriores:
+                        indice_chaves = pd.Index(np.unique(np.concatenate(chaves_anteriores)))
+                    arquivo_atual = arquivo
+
+                if len(indice_chaves):
+                    duplicado = indice_chaves.get_indexer(bloco['CHAVE_NOTIFIC']) >= 0
+                    duplicados += int(duplicado.sum())
+                    bloco = bloco[~duplicado]
+
+                carga.adicionar(bloco)
+
+                chaves_arquivo.append(bloco['CHAVE_NOTIFIC'].to_numpy())
+                total += len(bloco)
+                logger.info(f"Shard de {arquivo} salvo: {len(bloco)} registros (acumulado: {total})")
+
+    logger.info(f"Processamento paralelo concluído: {total} registros, {duplicados} duplicados entre extratos removidos")
+    return total
+
+
+def _serie_extrato(arquivo: str) -> str:
+
+    # INFLUD25-22-12-2025.csv -> INFLUD25: republicações semanais do mesmo ano
+    match = re.match(r'(.+?)-\d{2}-\d{2}-\d{4}', arquivo)
+    return match.group(1) if match else os.path.splitext(arquivo)[0]
+
+
+def processar_delta(caminho_csv: str, caminho_db: str, tabela: str = 'srag',
+                    tamanho_bloco: int = TAMANHO_BLOCO_PADRAO) -> Dict[str, Any]:
+
+    logger.info("=" * 50)
+    logger.info(f"Iniciando carga incremental: {caminho_csv}")
+    logger.info("=" * 50)
+
+    arquivo = os.path.basename(caminho_csv)
+    serie = _serie_extrato(arquivo)
 
     conn = sqlite3.connect(caminho_db)
-    df_sqlite = df.copy()
-    for col in df_sqlite.select_dtypes(include=['datetime64']).columns:
-        df_sqlite[col] = df_sqlite[col].astype(str).replace('NaT', None)
-    
-    df_sqlite.to_sql(tabela, conn, if_exists='replace', index=False)
+    try:
+        colunas_tabela = [linha[1] for linha in conn.execute(f'PRAGMA table_info({tabela})')]
+        # Cubo e amostra só são mantidos se o banco foi carregado com eles
+        derivadas = {
+            linha[0] for linha in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name IN ('srag_cubo', 'srag_amostra')"
+            )
+        }
+        if not set(COLUNAS_CONTROLE) <= set(colunas_tabela):
+            raise ValueError(
+                f"Tabela '{tabela}' sem colunas de controle {COLUNAS_CONTROLE}. "
+                "Execute uma carga completa antes da carga incremental."
+            )
+
+        # Registros já carregados do mesmo extrato (ex.: todas as versões INFLUD25).
+        # A ocorrência desambigua notificações com a mesma chave dentro do extrato.
+        # O prefixo (substr, não LIKE: '_' e '%' seriam curingas) só pré-filtra;
+        # a série é comparada inteira, para que INFLUD25 não leve junto outras
+        # séries com o mesmo início (ex.: o extrato sintético INFLUD25SINT...).
+        conn.create_function('SERIE_EXTRATO', 1, functools.lru_cache(maxsize=None)(_serie_extrato),
+                             deterministic=True)
+        existentes = pd.read_sql_query(
+            f"SELECT rowid AS ID_LINHA, CHAVE_NOTIFIC, HASH_REGISTRO, DT_NOTIFIC FROM {tabela} "
+            "WHERE substr(ARQUIVO_ORIGEM, 1, ?) = ? AND SERIE_EXTRATO(ARQUIVO_ORIGEM) = ? ORDER BY rowid",
+            conn, params=(len(serie), serie, serie)
+        )
+        existentes['OCORRENCIA'] = existentes.groupby('CHAVE_NOTIFIC').cumcount()
+        indice_existentes = pd.MultiIndex.from_arrays([existentes['CHAVE_NOTIFIC'], existentes['OCORRENCIA']])
+        hashes_existentes = existentes['HASH_REGISTRO'].to_numpy()
+        vistos = np.zeros(len(existentes), dtype=bool)
+
+        contagem_chaves = pd.Series(dtype='int64')
+        inseridos = []
+        alterados = []
+        total_lido = 0
+
+        for bloco in carregar_dados_em_blocos(caminho_csv, tamanho_bloco):
+            bloco = adicionar_identificacao(processar_bloco(bloco), caminho_csv)
+            total_lido += len(bloco)
+
+            chaves = bloco['CHAVE_NOTIFIC']
+            ocorrencia = (
+                chaves.groupby(chaves).cumcount().to_numpy()
+                + contagem_chaves.reindex(chaves).fillna(0).astype('int64').to_numpy()
+            )
+            contagem_chaves = contagem_chaves.add(chaves.value_counts(), fill_value=0).astype('int64')
+
+            posicoes = indice_existentes.get_indexer(pd.MultiIndex.from_arrays([chaves, ocorrencia]))
+            encontrado = posicoes >= 0
+            vistos[posicoes[encontrado]] = True
+
+            mudou = np.zeros(len(bloco), dtype=bool)
+            mudou[encontrado] = hashes_existentes[posicoes[encontrado]] != bloco['HASH_REGISTRO'].to_numpy()[encontrado]
+
+            if (~encontrado).any():
+                inseridos.append(bloco[~encontrado])
+            if mudou.any():
+                alterados.append(bloco[mudou].assign(ID_LINHA=existentes['ID_LINHA'].to_numpy()[posicoes[mudou]]))
+
+        df_inseridos = pd.concat(inseridos) if inseridos else pd.DataFrame(columns=colunas_tabela)
+        df_alterados = pd.concat(alterados) if alterados else pd.DataFrame(columns=colunas_tabela + ['ID_LINHA'])
+        df_removidos = existentes[~vistos]
+
+        df_inseridos = codificar_para_armazenamento(df_inseridos)
+        df_alterados = codificar_para_armazenamento(df_alterados)
+
+        # Intervalo de datas afetado: versões antigas e novas dos registros tocados
+        dias_afetados = pd.concat([
+            existentes.loc[existentes['ID_LINHA'].isin(df_alterados['ID_LINHA']), 'DT_NOTIFIC'],
+            df_removidos['DT_NOTIFIC'],
+            df_inseridos['DT_NOTIFIC'],
+            df_alterados['DT_NOTIFIC'],
+        ])
+        afeta_sem_data = bool(dias_afetados.isna().any())
+        dias_afetados = dias_afetados.dropna()
+        data_inicio = _dia_para_data(dias_afetados.min()) if len(dias_afetados) else None
+        data_fim = _dia_para_data(dias_afetados.max()) if len(dias_afetados) else None
+
+        with conn:  # uma única transação
+            conn.executemany(
+                f'DELETE FROM {tabela} WHERE rowid = ?',
+                ((int(id_linha),) for id_linha in df_removidos['ID_LINHA'])
+            )
+
+            if len(df_alterados):
+                colunas = [col for col in colunas_tabela if col in df_alterados.columns]
+                atribuicoes = ', '.join(f'"{col}" = ?' for col in colunas)
+                conn.executemany(
+                    f'UPDATE {tabela} SET {atribuicoes} WHERE rowid = ?',
+                    _linhas_sqlite(df_alterados[colunas + ['ID_LINHA']])
+                )
+
+            if len(df_inseridos):
+                colunas = [col for col in colunas_tabela if col in df_inseridos.columns]
+                conn.executemany(_sql_insert(tabela, colunas), _linhas_sqlite(df_inseridos[colunas]))
+
+            # Recalcula no cubo e na amostra apenas os dias afetados
+            intervalos = []
+            if len(dias_afetados):
+                intervalos.append((int(dias_afetados.min()), int(dias_afetados.max())))
+            if afeta_sem_data:
+                intervalos.append((None, None))
+            for intervalo in intervalos:
+                if 'srag_cubo' in derivadas:
+                    _construir_cubo(conn, tabela, intervalo=intervalo)
+                if 'srag_amostra' in derivadas:
+                    _construir_amostra(conn, tabela, intervalo=intervalo)
+
+            _registrar_carga(
+                conn, arquivo, 'incremental',
+                inseridos=len(df_inseridos), alterados=len(df_alterados), removidos=len(df_removidos),
+                data_inicio=data_inicio, data_fim=data_fim
+            )
+    finally:
+        conn.close()
+
+    resultado = {
+        'registros_lidos': total_lido,
+        'inseridos': len(df_inseridos),
+        'alterados': len(df_alterados),
+        'removidos': len(df_removidos),
+        'data_inicio_afetada': data_inicio,
+        'data_fim_afetada': data_fim,
+    }
+    logger.info(f"Carga incremental concluída: {resultado}")
+    return resultado
+
+
+def _registrar_carga(conn: sqlite3.Connection, arquivo: str, modo: str, inseridos: int = None,
+                     alterados: int = None, removidos: int = None, data_inicio: str = None, data_fim: str = None):
+
+    _criar_tabela_cargas(conn)
+    conn.execute(
+        'INSERT INTO srag_cargas (data_carga, arquivo, modo, inseridos, alterados, removidos, '
+        'data_inicio_afetada, data_fim_afetada) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+        (datetime.now().isoformat(), arquivo, modo, inseridos, alterados, removidos, data_inicio, data_fim)
+    )
+
+
+def _criar_tabela_cargas(conn: sqlite3.Connection):
+
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS srag_cargas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            data_carga TEXT NOT NULL,
+            arquivo TEXT NOT NULL,
+            modo TEXT NOT NULL,
+            inseridos INTEGER,
+            alterados INTEGER,
+            removidos INTEGER,
+            data_inicio_afetada TEXT,
+            data_fim_afetada TEXT
+        )
+    ''')
+
+
+def _sql_insert(tabela: str, colunas: List[str]) -> str:
+
+    nomes = ', '.join(f'"{col}"' for col in colunas)
+    marcadores = ', '.join('?' for _ in colunas)
+    return f'INSERT INTO {tabela} ({nomes}) VALUES ({marcadores})'
+
+
+def _data_para_dia(serie: pd.Series) -> pd.Series:
+
+    dias = serie.to_numpy(dtype='datetime64[D]').astype('int64')
+    return pd.Series(dias, index=serie.index, dtype='Int64').mask(serie.isna())
+
+
+def _dia_para_data(dia: int) -> str:
+
+    return (pd.Timestamp('1970-01-01') + pd.Timedelta(days=int(dia))).strftime('%Y-%m-%d')
+
+
+def codificar_para_armazenamento(df: pd.DataFrame) -> pd.DataFrame:
+
+    codificado = {}
+    for col in df.columns:
+        if col in COLUNAS_REDUNDANTES:
+            continue
+
+        serie = df[col]
+        if col == 'SG_UF_NOT':
+            codificado[col] = serie.map(CODIGOS_UF).astype('Int64')
+        elif col == 'CS_SEXO':
+            codificado[col] = serie.map(CODIGOS_SEXO).astype('Int64')
+        elif col == 'FAIXA_ETARIA':
+            codificado[col] = serie.astype(object).map(CODIGOS_FAIXA_ETARIA).astype('Int64')
+        elif pd.api.types.is_datetime64_any_dtype(serie):
+            codificado[col] = _data_para_dia(serie)
+        elif col in COLUNAS_CONTROLE or col == 'ID_LINHA' or not pd.api.types.is_numeric_dtype(serie):
+            codificado[col] = serie
+        else:
+            codificado[col] = serie.astype('Int64')
+
+    return pd.DataFrame(codificado, index=df.index)
+
+
+def _linhas_sqlite(df: pd.DataFrame) -> Iterator[tuple]:
+
+    # Conversão coluna a coluna para objetos Python (NaN/NA -> None), bem mais
+    # barata que converter o DataFrame inteiro linha a linha
+    colunas = []
+    for col in df.columns:
+        serie = df[col]
+        valores = serie.to_numpy(dtype=object)
+        valores[serie.isna().to_numpy()] = None
+        colunas.append(valores)
+
+    return zip(*colunas)
+
+
+def _construir_cubo(conn: sqlite3.Connection, tabela: str = 'srag', intervalo: Tuple[int, int] = None):
+
+    # Sem intervalo: reconstrói o cubo inteiro. Com intervalo (dia_inicio,
+    # dia_fim): recalcula só esses dias; (None, None) recalcula as notificações
+    # sem data.
+    dimensoes = ', '.join(DIMENSOES_CUBO)
+    medidas = ',\n               '.join(f'{expressao} AS {nome}' for nome, expressao in MEDIDAS_CUBO.items())
+    select = f'''
+        SELECT {dimensoes},
+               {medidas}
+        FROM {tabela}
+        {{filtro}}
+        GROUP BY {dimensoes}
+    '''
+
+    if intervalo is None:
+        conn.execute('DROP TABLE IF EXISTS srag_cubo')
+        conn.execute(f"CREATE TABLE srag_cubo AS {select.format(filtro='')}")
+        # Índice de cobertura: as séries diárias leem só o índice
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_cubo_dt_notific ON srag_cubo(DT_NOTIFIC, total_casos)')
+        total = conn.execute('SELECT COUNT(*) FROM srag_cubo').fetchone()[0]
+        logger.info(f"Cubo de agregação construído: {total} linhas")
+        return
+
+    dia_inicio, dia_fim = intervalo
+    if dia_inicio is None:
+        filtro, parametros = 'WHERE DT_NOTIFIC IS NULL', ()
+    else:
+        filtro, parametros = 'WHERE DT_NOTIFIC BETWEEN ? AND ?', (dia_inicio, dia_fim)
+
+    conn.execute(f'DELETE FROM srag_cubo {filtro}', parametros)
+    conn.execute(f'INSERT INTO srag_cubo {select.format(filtro=filtro)}', parametros)
+    logger.info(f"Cubo de agregação atualizado: {filtro} {parametros}")
+
+
+def _construir_amostra(conn: sqlite3.Connection, tabela: str = 'srag', intervalo: Tuple[int, int] = None):
+
+    # Mesma convenção de intervalo do cubo, mas o estrato é o mês: a carga
+    # incremental sorteia de novo os meses inteiros que contêm os dias afetados
+    colunas = ', '.join(
+        f'"{linha[1]}"' for linha in conn.execute(f'PRAGMA table_info({tabela})')
+        if linha[1] not in COLUNAS_CONTROLE
+    )
+    mes = "strftime('%Y-%m', DT_NOTIFIC * 86400, 'unixepoch')"
+    # Sorteio determinístico (hash multiplicativo do rowid): recarregar o mesmo
+    # extrato produz a mesma amostra
+    select = f'''
+        WITH estratos AS (
+            SELECT {colunas}, {mes} AS ESTRATO_MES,
+                   COUNT(*) OVER estrato AS TOTAL_ESTRATO,
+                   ROW_NUMBER() OVER (estrato ORDER BY (rowid * 2654435761) % 4294967296, rowid) AS ORDEM
+            FROM {tabela}
+            {{filtro}}
+            WINDOW estrato AS (PARTITION BY SG_UF_NOT, {mes})
+        ), tamanhos AS (
+            SELECT *, MIN(TOTAL_ESTRATO, MAX({MIN_AMOSTRA_ESTRATO},
+                       CAST(TOTAL_ESTRATO * {FRACAO_AMOSTRA} + 0.999999 AS INTEGER))) AS AMOSTRA_ESTRATO
+            FROM estratos
+        )
+        SELECT {colunas}, ESTRATO_MES, TOTAL_ESTRATO, AMOSTRA_ESTRATO,
+               CAST(TOTAL_ESTRATO AS REAL) / AMOSTRA_ESTRATO AS PESO_AMOSTRAL
+        FROM tamanhos
+        WHERE ORDEM <= AMOSTRA_ESTRATO
+    '''
+
+    existe = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'srag_amostra'").fetchone()
+    if intervalo is None or not existe:
+        conn.execute('DROP TABLE IF EXISTS srag_amostra')
+        conn.execute(f"CREATE TABLE srag_amostra AS {select.format(filtro='')}")
+        total = conn.execute('SELECT COUNT(*) FROM srag_amostra').fetchone()[0]
+        logger.info(f"Amostra estratificada construída: {total} linhas")
+        return
+
+    dia_inicio, dia_fim = intervalo
+    if dia_inicio is None:
+        filtro_amostra, parametros_amostra = 'WHERE ESTRATO_MES IS NULL', ()
+        filtro, parametros = 'WHERE DT_NOTIFIC IS NULL', ()
+    else:
+        epoca = pd.Timestamp('1970-01-01')
+        inicio = pd.Timestamp(_dia_para_data(dia_inicio)).replace(day=1)
+        fim = pd.Timestamp(_dia_para_data(dia_fim)) + pd.offsets.MonthEnd(0)
+        filtro_amostra, parametros_amostra = 'WHERE ESTRATO_MES BETWEEN ? AND ?', (f'{inicio:%Y-%m}', f'{fim:%Y-%m}')
+        filtro, parametros = 'WHERE DT_NOTIFIC BETWEEN ? AND ?', ((inicio - epoca).days, (fim - epoca).days)
+
+    conn.execute(f'DELETE FROM srag_amostra {filtro_amostra}', parametros_amostra)
+    conn.execute(f'INSERT INTO srag_amostra {select.format(filtro=filtro)}', parametros)
+    logger.info(f"Amostra estratificada atualizada: {filtro_amostra} {parametros_amostra}")
+
+
+def _criar_tabelas_dimensao(conn: sqlite3.Connection):
+
+    dimensoes = {
+        'dim_uf': ('sigla', [(codigo, sigla) for sigla, codigo in CODIGOS_UF.items()]),
+        'dim_sexo': ('sexo', [(codigo, sexo) for sexo, codigo in CODIGOS_SEXO.items()]),
+        'dim_faixa_etaria': ('faixa', [(codigo, faixa) for faixa, codigo in CODIGOS_FAIXA_ETARIA.items()]),
+    }
+    for tabela, (coluna, valores) in dimensoes.items():
+        conn.execute(f'CREATE TABLE IF NOT EXISTS {tabela} (codigo INTEGER PRIMARY KEY, {coluna} TEXT NOT NULL)')
+        conn.executemany(f'INSERT OR REPLACE INTO {tabela} (codigo, {coluna}) VALUES (?, ?)', valores)
+
+
+class CargaSQLite:
+
+    # Carga em massa: grava em um arquivo temporário com journal e sincronização
+    # desligados, em uma única transação, cria os índices ao final e só então
+    # troca o arquivo pelo banco definitivo (os.replace é atômico). Leitores do
+    # banco nunca veem uma tabela parcialmente gravada.
+
+    # Com retomavel=True a carga confirma o progresso a cada bloco (em WAL, para
+    # que uma queda não corrompa o arquivo temporário) e o arquivo temporário é
+    # preservado em caso de erro, para ser continuado pela próxima execução.
+
+    def __init__(self, caminho_db: str, tabela: str = 'srag', tamanho_lote: int = 50_000,
+                 retomavel: bool = False):
+
+        self.caminho_db = caminho_db
+        self.caminho_tmp = f"{caminho_db}.carga"
+        self.tabela = tabela
+        self.tamanho_lote = tamanho_lote
+        self.retomavel = retomavel
+        self.colunas = None
+        self.sql_insert = None
+        self.registros_por_arquivo = {}
+        self.progresso = {}
+        self.conn = None
+
+    def __enter__(self) -> 'CargaSQLite':
+
+        os.makedirs(os.path.dirname(self.caminho_db) or '.', exist_ok=True)
+        if os.path.exists(self.caminho_tmp) and not (self.retomavel and self._carregar_progresso()):
+            self._remover_temporario()
+
+        self._abrir()
+        logger.info(f"Carga em massa iniciada em: {self.caminho_tmp}")
+        return self
+
+    def _abrir(self):
+
+        self.conn = sqlite3.connect(self.caminho_tmp, isolation_level=None)
+        self.conn.execute(f"PRAGMA journal_mode = {'WAL' if self.retomavel else 'OFF'}")
+        self.conn.execute(f"PRAGMA synchronous = {'NORMAL' if self.retomavel else 'OFF'}")
+        self.conn.execute('PRAGMA locking_mode = EXCLUSIVE')
+        self.conn.execute('PRAGMA temp_store = MEMORY')
+        self.conn.execute('PRAGMA cache_size = -262144')  # 256 MB
+        if self.retomavel:
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS srag_progresso_carga (
+                    arquivo TEXT PRIMARY KEY,
+                    impressao_digital TEXT NOT NULL,
+                    offset_bytes INTEGER NOT NULL,
+                    registros INTEGER NOT NULL,
+                    data_confirmacao TEXT NOT NULL
+                )
+            ''')
+        self.conn.execute('BEGIN')
+
+    def _carregar_progresso(self) -> bool:
+
+        # Retoma apenas um temporário deixado por uma carga retomável
+        conn = sqlite3.connect(self.caminho_tmp)
+        try:
+            tabelas = {linha[0] for linha in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+            if 'srag_progresso_carga' not in tabelas:
+                return False
+
+            for arquivo, impressao, offset, registros in conn.execute(
+                'SELECT arquivo, impressao_digital, offset_bytes, registros FROM srag_progresso_carga'
+            ):
+                self.progresso[arquivo] = {
+                    'impressao_digital': impressao, 'offset_bytes': offset, 'registros': registros
+                }
+                self.registros_por_arquivo[arquivo] = registros
+
+            if self.tabela in tabelas:
+                self.colunas = [linha[1] for linha in conn.execute(f'PRAGMA table_info({self.tabela})')]
+                self.sql_insert = _sql_insert(self.tabela, self.colunas)
+            return True
+        except sqlite3.DatabaseError:
+            return False
+        finally:
+            conn.close()
+
+    def _remover_temporario(self):
+
+        for sufixo in ('', '-wal', '-shm', '-journal'):
+            if os.path.exists(self.caminho_tmp + sufixo):
+                os.remove(self.caminho_tmp + sufixo)
+
+    def descartar_progresso(self):
+
+        self.conn.close()
+        self._remover_temporario()
+        self.colunas = None
+        self.sql_insert = None
+        self.registros_por_arquivo = {}
+        self.progresso = {}
+        self._abrir()
+
+    def confirmar(self, arquivo: str, impressao_digital: str, offset_bytes: int, registros: int):
+
+        self.conn.execute('''
+            INSERT OR REPLACE INTO srag_progresso_carga
+                (arquivo, impressao_digital, offset_bytes, registros, data_confirmacao)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (arquivo, impressao_digital, offset_bytes, registros, datetime.now().isoformat(timespec='seconds')))
+        self.conn.execute('COMMIT')
+        self.conn.execute('BEGIN')
+
+    def adicionar(self, df: pd.DataFrame):
+
+        for inicio in range(0, len(df), self.tamanho_lote):
+            lote = codificar_para_armazenamento(df.iloc[inicio:inicio + self.tamanho_lote])
+
+            if self.colunas is None:
+                self.colunas = list(lote.columns)
+                self.conn.execute(pd.io.sql.get_schema(lote.head(0), self.tabela))
+                self.sql_insert = _sql_insert(self.tabela, self.colunas)
+            else:
+                lote = lote.reindex(columns=self.colunas)
+
+            self.conn.executemany(self.sql_insert, _linhas_sqlite(lote))
+
+        if 'ARQUIVO_ORIGEM' in df.columns:
+            for arquivo, quantidade in df['ARQUIVO_ORIGEM'].value_counts().items():
+                self.registros_por_arquivo[arquivo] = self.registros_por_arquivo.get(arquivo, 0) + int(quantidade)
+
+    def _copiar_historico_cargas(self):
+
+        # O histórico de cargas do banco anterior é preservado na troca
+        if not os.path.exists(self.caminho_db):
+            return
+
+        self.conn.execute('ATTACH DATABASE ? AS anterior', (self.caminho_db,))
+        existe = self.conn.execute(
+            "SELECT 1 FROM anterior.sqlite_master WHERE type = 'table' AND name = 'srag_cargas'"
+        ).fetchone()
+        if existe:
+            self.conn.execute('''
+                INSERT INTO srag_cargas (data_carga, arquivo, modo, inseridos, alterados, removidos,
+                                         data_inicio_afetada, data_fim_afetada)
+                SELECT data_carga, arquivo, modo, inseridos, alterados, removidos,
+                       data_inicio_afetada, data_fim_afetada
+                FROM anterior.srag_cargas ORDER BY id
+            ''')
+        self.conn.execute('DETACH DATABASE anterior')
+
+    def finalizar(self):
+
+        if self.colunas is None:
+            raise ValueError("Nenhum registro foi adicionado à carga")
+
+        logger.info("Criando índices...")
+        _criar_indices(self.conn, self.tabela)
+        _construir_cubo(self.conn, self.tabela)
+        _construir_amostra(self.conn, self.tabela)
+        _criar_tabelas_dimensao(self.conn)
+        _criar_tabela_cargas(self.conn)
+        self.conn.execute('DROP TABLE IF EXISTS srag_progresso_carga')
+        self.conn.execute('COMMIT')
+        if self.retomavel:
+            # Incorpora o WAL ao arquivo principal antes da troca
+            self.conn.execute('PRAGMA journal_mode = DELETE')
+
+        # ATTACH não pode ocorrer dentro de uma transação
+        self._copiar_historico_cargas()
+        for arquivo, quantidade in self.registros_por_arquivo.items():
+            _registrar_carga(self.conn, arquivo, 'completa', inseridos=quantidade)
+        self.conn.close()
+
+        os.replace(self.caminho_tmp, self.caminho_db)
+        logger.info(f"Carga concluída e publicada em: {self.caminho_db}")
+
+    def __exit__(self, exc_type, exc, tb):
+
+        if exc_type is None:
+            self.finalizar()
+            return False
+
+        self.conn.close()
+        if self.retomavel:
+            logger.error(f"Carga interrompida, progresso confirmado preservado em {self.caminho_tmp}: {exc}")
+            return False
+
+        logger.error(f"Carga interrompida, descartando arquivo temporário: {exc}")
+        self._remover_temporario()
+        return False
+
+
+def _criar_indices(conn: sqlite3.Connection, tabela: str):
 
     cursor = conn.cursor()
-    cursor.execute(f'CREATE INDEX IF NOT EXISTS idx_dt_notific ON {tabela}(DT_NOTIFIC)')
+    colunas = [linha[1] for linha in cursor.execute(f'PRAGMA table_info({tabela})')]
+
+    # Índices de cobertura para os acessos mais comuns: janelas de datas com
+    # agrupamento por mês, internações por UTI e óbitos por evolução
+    if {'ANO_NOTIFIC', 'MES_NOTIFIC'} <= set(colunas):
+        cursor.execute(f'CREATE INDEX IF NOT EXISTS idx_dt_notific ON {tabela}(DT_NOTIFIC, ANO_NOTIFIC, MES_NOTIFIC)')
+    else:
+        cursor.execute(f'CREATE INDEX IF NOT EXISTS idx_dt_notific ON {tabela}(DT_NOTIFIC)')
     cursor.execute(f'CREATE INDEX IF NOT EXISTS idx_evolucao ON {tabela}(EVOLUCAO)')
+    cursor.execute(f'CREATE INDEX IF NOT EXISTS idx_hospital_uti ON {tabela}(HOSPITAL, UTI)')
     cursor.execute(f'CREATE INDEX IF NOT EXISTS idx_uf ON {tabela}(SG_UF_NOT)')
-    conn.commit()
-    
+
+    if 'CHAVE_NOTIFIC' in colunas:
+        cursor.execute(f'CREATE INDEX IF NOT EXISTS idx_chave_notific ON {tabela}(CHAVE_NOTIFIC)')
+
+
+def salvar_sqlite(df: pd.DataFrame, caminho_db: str, tabela: str = 'srag'):
+
+    with CargaSQLite(caminho_db, tabela) as carga:
+        carga.adicionar(df)
+
     logger.info(f"Dados salvos com sucesso! Tabela: {tabela}")
-    conn.close()
 
 
 def gerar_estatisticas(df: pd.DataFrame) -> dict:
@@ -235,18 +1286,87 @@ def gerar_estatisticas(df: pd.DataFrame) -> dict:
 
 
 if __name__ == "__main__":
-    import sys
-    CAMINHO_CSV = r"data\raw\INFLUD25-22-12-2025.csv"
-    CAMINHO_DB = r"data\processed\srag.db"
+    import argparse
+
+    CAMINHO_CSV = os.path.join('data', 'raw', 'INFLUD25-22-12-2025.csv')
+    CAMINHO_DB = os.path.join('data', 'processed', 'srag.db')
+
+    parser = argparse.ArgumentParser(description='Pré-processamento dos dados de SRAG')
+    parser.add_argument('csv', nargs='*', default=[CAMINHO_CSV], help='Arquivo(s) CSV do SIVEP-Gripe')
+    parser.add_argument('--db', default=CAMINHO_DB, help=f'Banco SQLite de destino (padrão: {CAMINHO_DB})')
+    parser.add_argument(
+        '--tamanho-bloco', type=int, default=None,
+        help='Processa o CSV em blocos de N linhas, gravando cada bloco no banco (modo streaming)'
+    )
+    parser.add_argument(
+        '--workers', type=int, default=None,
+        help='Processa os arquivos em paralelo com N processos (padrão: todos os núcleos quando há vários arquivos)'
+    )
+    parser.add_argument(
+        '--incremental', action='store_true',
+        help='Aplica apenas as inserções, alterações e remoções em relação à última carga do mesmo extrato'
+    )
+    parser.add_argument(
+        '--retomavel', action='store_true',
+        help='Carga em blocos que confirma o progresso a cada bloco; reexecutar o comando retoma do último bloco confirmado'
+    )
+    parser.add_argument(
+        '--baixa-memoria', action='store_true',
+        help='Processamento completo com tipos compactos (Int8, category, bool), informando a memória por etapa'
+    )
+    parser.add_argument(
+        '--motor', choices=['pandas', 'polars'], default='pandas',
+        help='Motor do processamento completo de um arquivo: pandas (padrão) ou polars (plano lazy multi-thread)'
+    )
+    parser.add_argument(
+        '--tamanho-shard-mb', type=int, default=TAMANHO_SHARD_PADRAO // (1024 * 1024),
+        help='Tamanho máximo de cada fatia de arquivo processada por um worker, em MB'
+    )
+    args = parser.parse_args()
+
+    CAMINHO_DB = args.db
+
+    for caminho in args.csv:
+        if not os.path.exists(caminho):
+            logger.error(f"Arquivo não encontrado: {caminho}")
+            sys.exit(1)
+
+    if args.incremental:
+        for caminho in args.csv:
+            resultado = processar_delta(caminho, CAMINHO_DB, tamanho_bloco=args.tamanho_bloco or TAMANHO_BLOCO_PADRAO)
+            for key, value in resultado.items():
+                print(f"{key}: {value}")
+        sys.exit(0)
+
+    if len(args.csv) > 1 or args.workers:
+        total = processar_multiplos_arquivos(
+            args.csv, CAMINHO_DB,
+            tamanho_shard=args.tamanho_shard_mb * 1024 * 1024,
+            max_workers=args.workers
+        )
+        print(f"total_registros: {total}")
+        print(f"Banco de dados salvo em: {CAMINHO_DB}")
+        sys.exit(0)
+
+    CAMINHO_CSV = args.csv[0]
 
-    if len(sys.argv) > 1:
-        CAMINHO_CSV = sys.argv[1]
+    if args.retomavel:
+        total = processar_dados_retomavel(CAMINHO_CSV, CAMINHO_DB, tamanho_bloco=args.tamanho_bloco or TAMANHO_BLOCO_PADRAO)
+        print(f"total_registros: {total}")
+        print(f"Banco de dados salvo em: {CAMINHO_DB}")
+        sys.exit(0)
 
-    if not os.path.exists(CAMINHO_CSV):
-        logger.error(f"Arquivo não encontrado: {CAMINHO_CSV}")
-        sys.exit(1)
+    if args.tamanho_bloco:
+        total = processar_dados_em_blocos(CAMINHO_CSV, CAMINHO_DB, tamanho_bloco=args.tamanho_bloco)
+        print(f"total_registros: {total}")
+        print(f"Banco de dados salvo em: {CAMINHO_DB}")
+        sys.exit(0)
 
-    df = processar_dados_completo(CAMINHO_CSV, nrows=None)
+    if args.motor == 'polars':
+        df = processar_dados_polars(CAMINHO_CSV, nrows=None)
+    else:
+        df = processar_dados_completo(CAMINHO_CSV, nrows=None, baixa_memoria=args.baixa_memoria)
+    df = adicionar_identificacao(df, CAMINHO_CSV)
 
     stats = gerar_estatisticas(df)
 
@@ -0,0 +1,316 @@
+import numpy as np
+import pandas as pd
+import os
+import re
+import sys
+from datetime import date, timedelta
+from typing import Dict
+import logging
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from preprocessing import COLUNAS_SELECIONADAS
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger('sintetico')
+
+# src/data/sintetico.py -> raiz do projeto: os caminhos padrão não dependem do
+# diretório de onde o script é executado
+RAIZ_PROJETO = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+# Colunas do SIVEP-Gripe fora de COLUNAS_SELECIONADAS, incluídas para que a
+# leitura tenha o mesmo trabalho de projeção e remoção de dados sensíveis que
+# com os extratos reais
+COLUNAS_EXTRAS = [
+    'NU_NOTIFIC', 'ID_REGIONA', 'CO_MUN_NOT', 'ID_UNIDADE', 'CO_UNI_NOT',
+    'NM_PACIENT', 'NM_MAE_PAC', 'NU_CPF', 'NU_CNS', 'NU_CEP', 'NM_LOGRADO',
+    'NM_BAIRRO', 'NU_NUMERO', 'NU_DDD_TEL', 'NU_TELEFON', 'OBES_IMC', 'OUT_MORBI',
+]
+
+# Participação aproximada de cada UF nas notificações de SRAG
+PESOS_UF = {
+    'SP': 0.24, 'MG': 0.12, 'RJ': 0.08, 'PR': 0.08, 'RS': 0.07, 'SC': 0.05,
+    'BA': 0.05, 'GO': 0.04, 'PE': 0.04, 'CE': 0.03, 'DF': 0.03, 'ES': 0.02,
+    'PA': 0.02, 'MS': 0.02, 'MT': 0.02, 'AM': 0.015, 'MA': 0.01, 'PB': 0.01,
+    'RN': 0.01, 'AL': 0.008, 'PI': 0.007, 'SE': 0.006, 'TO': 0.004, 'RO': 0.004,
+    'AC': 0.002, 'AP': 0.002, 'RR': 0.002,
+}
+
+CAPITAIS = {
+    'SP': 'SAO PAULO', 'MG': 'BELO HORIZONTE', 'RJ': 'RIO DE JANEIRO', 'PR': 'CURITIBA',
+    'RS': 'PORTO ALEGRE', 'SC': 'FLORIANOPOLIS', 'BA': 'SALVADOR', 'GO': 'GOIANIA',
+    'PE': 'RECIFE', 'CE': 'FORTALEZA', 'DF': 'BRASILIA', 'ES': 'VITORIA', 'PA': 'BELEM',
+    'MS': 'CAMPO GRANDE', 'MT': 'CUIABA', 'AM': 'MANAUS', 'MA': 'SAO LUIS',
+    'PB': 'JOAO PESSOA', 'RN': 'NATAL', 'AL': 'MACEIO', 'PI': 'TERESINA', 'SE': 'ARACAJU',
+    'TO': 'PALMAS', 'RO': 'PORTO VELHO', 'AC': 'RIO BRANCO', 'AP': 'MACAPA', 'RR': 'BOA VISTA',
+}
+
+CODIGOS_MUNICIPIO_CAPITAL = {
+    'RO': 110020, 'AC': 120040, 'AM': 130260, 'RR': 140010, 'PA': 150140, 'AP': 160030,
+    'TO': 172100, 'MA': 211130, 'PI': 221100, 'CE': 230440, 'RN': 240810, 'PB': 250750,
+    'PE': 261160, 'AL': 270430, 'SE': 280030, 'BA': 292740, 'MG': 310620, 'ES': 320530,
+    'RJ': 330455, 'SP': 355030, 'PR': 410690, 'SC': 420540, 'RS': 431490, 'MS': 500270,
+    'MT': 510340, 'GO': 520870, 'DF': 530010,
+}  # código IBGE (6 dígitos) da capital
+
+# Distribuição das idades (anos) por faixa: SRAG concentra casos em crianças
+# pequenas e idosos
+PESOS_FAIXAS_IDADE = [
+    ((0, 4), 0.25), ((5, 11), 0.06), ((12, 17), 0.03), ((18, 29), 0.06),
+    ((30, 44), 0.09), ((45, 59), 0.12), ((60, 74), 0.18), ((75, 105), 0.21),
+]
+
+# Distribuições das respostas 1-Sim, 2-Não, 9-Ignorado e campo vazio ('')
+DISTRIBUICOES_CODIGOS = {
+    'NOSOCOMIAL': {'1': 0.02, '2': 0.70, '9': 0.10, '': 0.18},
+    'FEBRE': {'1': 0.60, '2': 0.25, '9': 0.05, '': 0.10},
+    'TOSSE': {'1': 0.75, '2': 0.15, '9': 0.03, '': 0.07},
+    'GARGANTA': {'1': 0.25, '2': 0.50, '9': 0.10, '': 0.15},
+    'DISPNEIA': {'1': 0.70, '2': 0.18, '9': 0.04, '': 0.08},
+    'DESC_RESP': {'1': 0.65, '2': 0.20, '9': 0.05, '': 0.10},
+    'SATURACAO': {'1': 0.60, '2': 0.25, '9': 0.05, '': 0.10},
+    'DIARREIA': {'1': 0.10, '2': 0.65, '9': 0.10, '': 0.15},
+    'CARDIOPATI': {'1': 0.20, '2': 0.15, '9': 0.03, '': 0.62},
+    'PNEUMOPATI': {'1': 0.07, '2': 0.25, '9': 0.03, '': 0.65},
+    'RENAL': {'1': 0.04, '2': 0.28, '9': 0.03, '': 0.65},
+    'OBESIDADE': {'1': 0.05, '2': 0.27, '9': 0.03, '': 0.65},
+    'DIABETES': {'1': 0.15, '2': 0.20, '9': 0.03, '': 0.62},
+    'VACINA_COV': {'1': 0.35, '2': 0.35, '9': 0.20, '': 0.10},
+    'VACINA': {'1': 0.25, '2': 0.40, '9': 0.25, '': 0.10},
+    'ANTIVIRAL': {'1': 0.15, '2': 0.65, '9': 0.10, '': 0.10},
+    'HOSPITAL': {'1': 0.93, '2': 0.04, '9': 0.01, '': 0.02},
+    'CS_RACA': {'1': 0.40, '2': 0.05, '3': 0.01, '4': 0.35, '5': 0.005, '9': 0.185},
+    'CS_ESCOL_N': {'0': 0.03, '1': 0.10, '2': 0.08, '3': 0.12, '4': 0.05, '5': 0.22, '9': 0.20, '': 0.20},
+    'SUPORT_VEN': {'1': 0.10, '2': 0.45, '3': 0.35, '9': 0.04, '': 0.06},
+    'CLASSI_FIN': {'1': 0.10, '2': 0.15, '3': 0.005, '4': 0.45, '5': 0.10, '': 0.195},
+}
+
+TAMANHO_BLOCO_GERACAO = 500_000
+
+
+def interpretar_quantidade(texto: str) -> int:
+
+    # 100k, 1M, 10M -> 100000, 1000000, 10000000
+    match = re.fullmatch(r'(\d+(?:\.\d+)?)([kKmM]?)', texto.strip())
+    if not match:
+        raise ValueError(f"Quantidade inválida: {texto}")
+
+    numero, sufixo = match.groups()
+    multiplicador = {'': 1, 'k': 1_000, 'm': 1_000_000}[sufixo.lower()]
+    return int(float(numero) * multiplicador)
+
+
+def _sortear(rng: np.random.Generator, distribuicao: Dict[str, float], n: int) -> np.ndarray:
+
+    valores = np.array(list(distribuicao.keys()), dtype=object)
+    pesos = np.array(list(distribuicao.values()))
+    return valores[rng.choice(len(valores), size=n, p=pesos / pesos.sum())]
+
+
+def _semana_epidemiologica(dia: date) -> int:
+
+    # A semana epidemiológica 1 é a semana (domingo a sábado) que contém 4 de janeiro
+    def inicio_ano_epidemiologico(ano: int) -> date:
+        quatro_jan = date(ano, 1, 4)
+        return quatro_jan - timedelta(days=(quatro_jan.weekday() + 1) % 7)
+
+    domingo = dia - timedelta(days=(dia.weekday() + 1) % 7)
+    inicio = inicio_ano_epidemiologico((domingo + timedelta(days=3)).year)
+    return (domingo - inicio).days // 7 + 1
+
+
+class GeradorSintetico:
+
+    def __init__(self, ano: int = 2025, semente: int = 0):
+
+        self.ano = ano
+        self.rng = np.random.default_rng(semente)
+        self.proximo_id = 1
+
+        # Tabelas de consulta por dia: as datas são sorteadas como inteiros e
+        # formatadas por indexação, sem strftime por linha
+        self.primeiro_dia = date(ano - 110, 1, 1)
+        total_dias = (date(ano + 1, 12, 31) - self.primeiro_dia).days + 1
+        dias = [self.primeiro_dia + timedelta(days=i) for i in range(total_dias)]
+        self.datas_formatadas = np.array([d.strftime('%d/%m/%Y') for d in dias] + [''], dtype=object)
+        self.indice_vazio = total_dias
+
+        inicio_ano = (date(ano, 1, 1) - self.primeiro_dia).days
+        self.dias_ano = np.arange(inicio_ano, inicio_ano + 365)
+        self.semanas = np.array([
+            str(_semana_epidemiologica(self.primeiro_dia + timedelta(days=i)))
+            for i in range(total_dias)
+        ], dtype=object)
+
+        # Sazonalidade: pico de SRAG no outono (abril a junho)
+        dia_do_ano = np.arange(365)
+        pesos = 1.0 + 1.5 * np.exp(-((dia_do_ano - 130) / 45.0) ** 2)
+        self.pesos_notificacao = pesos / pesos.sum()
+
+        ufs = list(PESOS_UF.keys())
+        pesos_uf = np.array(list(PESOS_UF.values()))
+        self.ufs = np.array(ufs, dtype=object)
+        self.pesos_uf = pesos_uf / pesos_uf.sum()
+        self.capitais = np.array([CAPITAIS[uf] for uf in ufs], dtype=object)
+        self.codigos_capitais = np.array([str(CODIGOS_MUNICIPIO_CAPITAL[uf]) for uf in ufs], dtype=object)
+
+    def _datas(self, dias: np.ndarray, presente: np.ndarray) -> np.ndarray:
+
+        indices = np.clip(dias, 0, self.indice_vazio - 1)
+        return self.datas_formatadas[np.where(presente, indices, self.indice_vazio)]
+
+    def _idades(self, n: int):
+
+        faixas = [faixa for faixa, _ in PESOS_FAIXAS_IDADE]
+        pesos = np.array([peso for _, peso in PESOS_FAIXAS_IDADE])
+        sorteio = self.rng.choice(len(faixas), size=n, p=pesos / pesos.sum())
+        inferiores = np.array([f[0] for f in faixas])[sorteio]
+        superiores = np.array([f[1] for f in faixas])[sorteio]
+        anos = self.rng.integers(inferiores, superiores + 1)
+
+        # Menores de 1 ano são registrados em dias (TP_IDADE=1) ou meses (TP_IDADE=2)
+        tp_idade = np.full(n, 3)
+        idade = anos.copy()
+        menores = anos == 0
+        em_dias = menores & (self.rng.random(n) < 0.3)
+        em_meses = menores & ~em_dias
+        tp_idade[em_dias] = 1
+        tp_idade[em_meses] = 2
+        idade[em_dias] = self.rng.integers(1, 30, size=int(em_dias.sum()))
+        idade[em_meses] = self.rng.integers(1, 12, size=int(em_meses.sum()))
+
+        return anos, idade, tp_idade
+
+    def gerar_bloco(self, n: int) -> pd.DataFrame:
+
+        rng = self.rng
+        colunas = {}
+
+        colunas['NU_NOTIFIC'] = np.arange(self.proximo_id, self.proximo_id + n).astype(str)
+        self.proximo_id += n
+
+        dt_notific = self.dias_ano[rng.choice(365, size=n, p=self.pesos_notificacao)]
+        dt_sin_pri = dt_notific - rng.gamma(2.0, 2.5, size=n).astype(int)
+        sempre = np.ones(n, dtype=bool)
+        colunas['DT_NOTIFIC'] = self._datas(dt_notific, sempre)
+        colunas['SEM_NOT'] = self.semanas[dt_notific]
+        colunas['DT_SIN_PRI'] = self._datas(dt_sin_pri, sempre)
+
+        uf = rng.choice(len(self.ufs), size=n, p=self.pesos_uf)
+        colunas['SG_UF_NOT'] = self.ufs[uf]
+        colunas['ID_MUNICIP'] = self.capitais[uf]
+        colunas['CO_MUN_NOT'] = self.codigos_capitais[uf]
+
+        sexo = rng.choice(np.array(['M', 'F', 'I'], dtype=object), size=n, p=[0.52, 0.479, 0.001])
+        colunas['CS_SEXO'] = sexo
+
+        anos, idade, tp_idade = self._idades(n)
+        dt_nasc = dt_notific - anos * 365 - rng.integers(0, 365, size=n)
+        colunas['DT_NASC'] = self._datas(dt_nasc, rng.random(n) > 0.03)
+        colunas['NU_IDADE_N'] = idade.astype(str)
+        colunas['TP_IDADE'] = tp_idade.astype(str)
+
+        # Gestantes: 1-4 trimestre/idade gestacional, 5-Não, 6-Não se aplica, 9-Ignorado
+        gestante = np.full(n, '6', dtype=object)
+        idade_fertil = (sexo == 'F') & (anos >= 10) & (anos <= 49)
+        gestante[idade_fertil] = _sortear(
+            rng, {'1': 0.02, '2': 0.03, '3': 0.05, '4': 0.01, '5': 0.69, '9': 0.20}, int(idade_fertil.sum())
+        )
+        colunas['CS_GESTANT'] = gestante
+
+        for col, distribuicao in DISTRIBUICOES_CODIGOS.items():
+            colunas[col] = _sortear(rng, distribuicao, n)
+
+        # Crianças: escolaridade "não se aplica"
+        colunas['CS_ESCOL_N'][anos < 7] = '5'
+
+        hospitalizado = colunas['HOSPITAL'] == '1'
+        colunas['UTI'] = np.where(hospitalizado, _sortear(rng, {'1': 0.30, '2': 0.60, '9': 0.05, '': 0.05}, n), '')
+        dt_interna = dt_sin_pri + rng.integers(0, 6, size=n)
+        colunas['DT_INTERNA'] = self._datas(dt_interna, hospitalizado)
+
+        em_uti = colunas['UTI'] == '1'
+        dt_entuti = dt_interna + rng.integers(0, 4, size=n)
+        dt_saiduti = dt_entuti + rng.integers(1, 21, size=n)
+        colunas['DT_ENTUTI'] = self._datas(dt_entuti, em_uti)
+        colunas['DT_SAIDUTI'] = self._datas(dt_saiduti, em_uti & (rng.random(n) > 0.25))
+
+        # Óbitos mais frequentes em idosos e em internados em UTI
+        risco = 0.05 + 0.15 * (anos >= 60) + 0.15 * (anos >= 75) + 0.20 * em_uti
+        sorteio = rng.random(n)
+        evolucao = np.full(n, '1', dtype=object)
+        evolucao[sorteio < risco] = '2'
+        evolucao[(sorteio >= risco) & (sorteio < risco + 0.01)] = '3'
+        evolucao[(sorteio >= risco + 0.01) & (sorteio < risco + 0.04)] = '9'
+        evolucao[(sorteio >= risco + 0.04) & (sorteio < risco + 0.18)] = ''
+        colunas['EVOLUCAO'] = evolucao
+
+        com_desfecho = np.isin(evolucao, ['1', '2', '3'])
+        dt_evoluca = dt_interna + rng.integers(1, 31, size=n)
+        colunas['DT_EVOLUCA'] = self._datas(dt_evoluca, com_desfecho)
+        colunas['DT_ENCERRA'] = self._datas(
+            dt_evoluca + rng.integers(0, 31, size=n), com_desfecho & (colunas['CLASSI_FIN'] != '')
+        )
+
+        vacinado_covid = colunas['VACINA_COV'] == '1'
+        dose_1 = dt_notific - rng.integers(60, 1000, size=n)
+        dose_2 = dose_1 + rng.integers(21, 120, size=n)
+        dose_ref = dose_2 + rng.integers(120, 400, size=n)
+        colunas['DOSE_1_COV'] = self._datas(dose_1, vacinado_covid)
+        colunas['DOSE_2_COV'] = self._datas(dose_2, vacinado_covid & (rng.random(n) < 0.85))
+        colunas['DOSE_REF'] = self._datas(dose_ref, vacinado_covid & (rng.random(n) < 0.5) & (dose_ref < dt_notific))
+        colunas['DT_UT_DOSE'] = self._datas(dt_notific - rng.integers(15, 365, size=n), colunas['VACINA'] == '1')
+
+        for col in COLUNAS_EXTRAS:
+            if col not in colunas:
+                colunas[col] = np.full(n, '', dtype=object)
+        colunas['NM_PACIENT'] = np.full(n, 'PACIENTE SINTETICO', dtype=object)
+
+        ordem = COLUNAS_EXTRAS[:1] + COLUNAS_SELECIONADAS + COLUNAS_EXTRAS[1:]
+        return pd.DataFrame({col: colunas[col] for col in ordem})
+
+
+def gerar_extrato(caminho_csv: str, linhas: int, ano: int = 2025, semente: int = 0,
+                  tamanho_bloco: int = TAMANHO_BLOCO_GERACAO) -> str:
+
+    logger.info(f"Gerando extrato sintético com {linhas} linhas: {caminho_csv}")
+    os.makedirs(os.path.dirname(caminho_csv) or '.', exist_ok=True)
+
+    gerador = GeradorSintetico(ano=ano, semente=semente)
+    gerados = 0
+    with open(caminho_csv, 'w', encoding='utf-8', newline='') as f:
+        while gerados < linhas:
+            n = min(tamanho_bloco, linhas - gerados)
+            gerador.gerar_bloco(n).to_csv(f, sep=';', index=False, header=gerados == 0)
+            gerados += n
+            logger.info(f"{gerados}/{linhas} linhas geradas")
+
+    return caminho_csv
+
+
+def caminho_padrao(linhas: int, ano: int = 2025, semente: int = 0) -> str:
+
+    # Segue o padrão de nome dos extratos (INFLUDAA-DD-MM-AAAA.csv), reconhecido
+    # pelas cargas em lote e incremental
+    nome = f"INFLUD{ano % 100:02d}SINT{linhas}S{semente}-31-12-{ano}.csv"
+    return os.path.join(RAIZ_PROJETO, 'data', 'raw', 'sintetico', nome)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Gera extratos sintéticos do SIVEP-Gripe')
+    parser.add_argument('--linhas', default='100k', help='Quantidade de linhas (ex.: 100k, 1M, 10M)')
+    parser.add_argument('--ano', type=int, default=2025, help='Ano das notificações')
+    parser.add_argument('--semente', type=int, default=0, help='Semente do gerador aleatório')
+    parser.add_argument('--saida', default=None, help='Arquivo CSV de saída (padrão: data/raw/sintetico/)')
+    args = parser.parse_args()
+
+    linhas = interpretar_quantidade(args.linhas)
+    caminho = args.saida or caminho_padrao(linhas, args.ano, args.semente)
+    gerar_extrato(caminho, linhas, ano=args.ano, semente=args.semente)
+    print(f"Extrato sintético salvo em: {caminho}")
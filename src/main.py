@@ -19,8 +19,6 @@ logging.getLogger('orquestrador').setLevel(logging.WARNING)
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from agents.orquestrador import AgenteOrquestrador
-
 
 def banner():
 
@@ -29,6 +27,14 @@ def banner():
     Powered by AI Agents
     """)
 
+def caminho_banco():
+
+    return os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        'data', 'processed', 'srag.db'
+    )
+
+
 def verificar_configuracao():
 
     print("\nVerificando configuração...")
@@ -38,10 +44,7 @@ def verificar_configuracao():
     if not os.getenv("GROQ_API_KEY"):
         erros.append("GROQ_API_KEY não configurada no .env")
 
-    db_path = os.path.join(
-        os.path.dirname(os.path.dirname(__file__)),
-        'data', 'processed', 'srag.db'
-    )
+    db_path = caminho_banco()
 
     if not os.path.exists(db_path):
         erros.append(f"Banco de dados não encontrado: {db_path}")
@@ -54,7 +57,57 @@ def verificar_configuracao():
     return True
 
 
+def verificar_planos_consulta():
+
+    from tools.database_tool import verificar_planos
+    from tools.registro import obter_registro
+
+    print("\nVerificando planos de consulta...")
+
+    db = obter_registro().banco()
+    charts = obter_registro().graficos()
+    resultados = verificar_planos({**db.consultas_criticas(), **charts.consultas_criticas()})
+
+    falhas = [r for r in resultados if not r['ok']]
+    for resultado in resultados:
+        status = 'OK' if resultado['ok'] else 'VARREDURA COMPLETA'
+        print(f"  - {resultado['consulta']}: {status}")
+        for linha in resultado['varreduras_completas']:
+            print(f"      {linha}")
+
+    return not falhas
+
+
+def exibir_instrumentacao():
+
+    from tools.instrumentacao import obter_instrumentacao
+
+    tabela = obter_instrumentacao().tabela()
+    if tabela.empty:
+        return
+
+    print("\nTempo por etapa (ms):")
+    print(tabela.to_string(index=False))
+
+
+def salvar_instrumentacao():
+
+    from tools.database_tool import get_project_root
+    from tools.instrumentacao import obter_instrumentacao
+
+    caminho = os.path.join(
+        get_project_root(), 'reports', 'instrumentacao',
+        f"instrumentacao_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    obter_instrumentacao().salvar_json(caminho)
+    print(f"\nTempos por etapa salvos em: {caminho}")
+
+
 def gerar_relatorio():
+
+    # Import tardio: o modo verificar não depende do LLM
+    from agents.orquestrador import AgenteOrquestrador
+
     print("\nInicializando agente orquestrador...")
 
     try:
@@ -81,6 +134,8 @@ def gerar_relatorio():
 
 def modo_interativo():
 
+    from agents.orquestrador import AgenteOrquestrador
+
     print("\nModo Interativo")
     print("Digite suas perguntas sobre SRAG ou 'sair' para encerrar.\n")
 
@@ -126,6 +181,18 @@ def main():
 
     banner()
 
+    # Os planos de consulta dependem só do banco: são verificados antes da
+    # chave da API, para que falhem também onde ela não existe (ex.: CI)
+    if args.modo == 'verificar':
+        if not os.path.exists(caminho_banco()):
+            print(f"\nBanco de dados não encontrado: {caminho_banco()}")
+            sys.exit(1)
+        planos_ok = verificar_planos_consulta()
+        exibir_instrumentacao()
+        if not planos_ok:
+            print("\nConsultas críticas fazendo varredura completa de tabela.")
+            sys.exit(1)
+
     if not verificar_configuracao():
         print("\nCorrija os erros de configuração antes de continuar.")
         sys.exit(1)
@@ -135,6 +202,7 @@ def main():
 
     elif args.modo == 'relatorio':
         gerar_relatorio()
+        salvar_instrumentacao()
 
     elif args.modo == 'interativo':
         modo_interativo()
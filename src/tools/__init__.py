@@ -1,4 +1,7 @@
-from .database_tool import DatabaseTool, criar_database_tool
+from .database_tool import DatabaseTool, OrcamentoConsultaExcedido, criar_database_tool, fechar_conexoes
+from .consulta import Consulta
+from .indice_diario import IndiceDiario, obter_indice_diario
+from .registro import RegistroFerramentas, obter_registro, limpar_registros
 from .metrics_tool import (
     MetricsTool,
     MetricaResultado,
@@ -30,7 +33,19 @@ from .report_tool import (
 __all__ = [
     # Database
     'DatabaseTool',
+    'OrcamentoConsultaExcedido',
     'criar_database_tool',
+    'fechar_conexoes',
+    'Consulta',
+
+    # Índice diário
+    'IndiceDiario',
+    'obter_indice_diario',
+
+    # Registro compartilhado
+    'RegistroFerramentas',
+    'obter_registro',
+    'limpar_registros',
 
     # Metrics
     'MetricsTool',
@@ -0,0 +1,69 @@
+from typing import Any, Dict
+
+import numpy as np
+import pandas as pd
+
+# Quantil da normal padrão para intervalos de 95%
+Z_95 = 1.959964
+
+
+# Estimadores da amostra estratificada (srag_amostra). Cada linha de
+# `estratos` é um estrato UF x mês com TOTAL_ESTRATO (N), AMOSTRA_ESTRATO (n) e
+# a soma de indicadores 0/1 nas linhas sorteadas. Um estrato recenseado (n = N)
+# não contribui para a variância: a tabela srag inteira como estrato único
+# produz o valor exato com erro padrão zero.
+
+def _variancia_total(N: np.ndarray, n: np.ndarray, soma: np.ndarray, soma_quadrados: np.ndarray) -> float:
+
+    # Σ N² (1 - n/N) s² / n, com s² a variância amostral dentro do estrato
+    s2 = (soma_quadrados - soma ** 2 / n) / np.maximum(n - 1, 1)
+    return float(np.sum(N ** 2 * (1 - n / N) * np.maximum(s2, 0) / n))
+
+
+def _tamanhos(estratos: pd.DataFrame):
+
+    estratos = estratos[estratos['AMOSTRA_ESTRATO'] > 0]
+    return estratos, estratos['TOTAL_ESTRATO'].to_numpy(dtype=float), estratos['AMOSTRA_ESTRATO'].to_numpy(dtype=float)
+
+
+def _resultado(estimativa: float, variancia: float, amostra: int, maximo: float = np.inf) -> Dict[str, Any]:
+
+    erro_padrao = float(np.sqrt(max(variancia, 0.0)))
+    return {
+        'estimativa': estimativa,
+        'erro_padrao': erro_padrao,
+        'ic95': (max(estimativa - Z_95 * erro_padrao, 0.0), min(estimativa + Z_95 * erro_padrao, maximo)),
+        'amostra': amostra,
+    }
+
+
+def estimar_total(estratos: pd.DataFrame, coluna: str) -> Dict[str, Any]:
+
+    # Total de linhas que atendem a condição de `coluna` (indicador: a soma
+    # dos quadrados é a própria soma)
+    estratos, N, n = _tamanhos(estratos)
+    y = estratos[coluna].to_numpy(dtype=float)
+
+    total = float(np.sum(N / n * y))
+    return _resultado(total, _variancia_total(N, n, y, y), int(n.sum()))
+
+
+def estimar_razao(estratos: pd.DataFrame, numerador: str, denominador: str, escala: float = 1.0) -> Dict[str, Any]:
+
+    # Razão de totais com variância por linearização (z = y - R x). Supõe que
+    # o indicador do numerador implica o do denominador, o que vale para
+    # proporções: (y - R x)² soma y (1 - 2R) + R² x.
+    estratos, N, n = _tamanhos(estratos)
+    y = estratos[numerador].to_numpy(dtype=float)
+    x = estratos[denominador].to_numpy(dtype=float)
+
+    total_x = float(np.sum(N / n * x))
+    if total_x == 0:
+        resultado = _resultado(0.0, 0.0, int(n.sum()), escala)
+    else:
+        razao = float(np.sum(N / n * y)) / total_x
+        variancia = _variancia_total(N, n, y - razao * x, y * (1 - 2 * razao) + razao ** 2 * x) / total_x ** 2
+        resultado = _resultado(razao * escala, variancia * escala ** 2, int(n.sum()), escala)
+
+    resultado['denominador'] = total_x
+    return resultado
@@ -0,0 +1,157 @@
+import os
+import json
+import queue
+import atexit
+import logging
+import threading
+import dataclasses
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger('auditoria')
+
+
+def _serializar(valor: Any) -> Any:
+
+    # Objetos ricos (ex.: MetricaResultado) só são convertidos na thread de
+    # escrita, fora do caminho da consulta
+    if hasattr(valor, 'to_dict'):
+        return valor.to_dict()
+    if dataclasses.is_dataclass(valor):
+        return dataclasses.asdict(valor)
+    return str(valor)
+
+
+class AuditoriaAssincrona:
+
+    # Trilha de auditoria única do processo. registrar() só monta o evento e o
+    # coloca numa fila sem bloquear; uma thread grava os eventos em lotes num
+    # arquivo JSONL somente de acréscimo, com rotação por tamanho
+    # (auditoria.jsonl, auditoria.jsonl.1, ...). Os eventos mais recentes da
+    # sessão ficam num buffer circular em memória.
+
+    def __init__(self, diretorio: str, max_bytes: int = 10 * 1024 * 1024, max_arquivos: int = 5,
+                 tamanho_lote: int = 500, intervalo_segundos: float = 1.0,
+                 tamanho_buffer: int = 1000, max_fila: int = 100000):
+
+        self.caminho = os.path.join(diretorio, 'auditoria.jsonl')
+        self.max_bytes = max_bytes
+        self.max_arquivos = max_arquivos
+        self.tamanho_lote = tamanho_lote
+        self.intervalo_segundos = intervalo_segundos
+        self.buffer = deque(maxlen=tamanho_buffer)
+        self.descartados = 0
+        self.gravados = 0
+        # Incrementado pelas threads produtoras e zerado pela gravadora
+        self._lock_descartados = threading.Lock()
+
+        self._fila: queue.Queue = queue.Queue(maxsize=max_fila)
+        self._encerrar = threading.Event()
+        os.makedirs(diretorio, exist_ok=True)
+
+        self._thread = threading.Thread(target=self._gravar_continuamente, name='auditoria', daemon=True)
+        self._thread.start()
+
+    def registrar(self, origem: str, acao: str, **detalhes) -> Dict[str, Any]:
+
+        evento = {'timestamp': datetime.now().isoformat(), 'origem': origem, 'acao': acao, **detalhes}
+        self.buffer.append(evento)
+        try:
+            self._fila.put_nowait(evento)
+        except queue.Full:
+            # Nunca segurar a consulta por causa da auditoria; a perda é
+            # registrada no próximo lote gravado
+            with self._lock_descartados:
+                self.descartados += 1
+        return evento
+
+    def recentes(self, limite: int = None, origem: str = None) -> List[Dict[str, Any]]:
+
+        eventos = [e for e in list(self.buffer) if origem is None or e['origem'] == origem]
+        return eventos[-limite:] if limite else eventos
+
+    def _rotacionar(self):
+
+        # O arquivo mais antigo é sobrescrito; os demais sobem um número
+        for i in range(self.max_arquivos - 1, 0, -1):
+            origem = self.caminho if i == 1 else f"{self.caminho}.{i - 1}"
+            if os.path.exists(origem):
+                os.replace(origem, f"{self.caminho}.{i}")
+
+    def _gravar(self, eventos: List[Dict[str, Any]]):
+
+        with self._lock_descartados:
+            descartados, self.descartados = self.descartados, 0
+        if descartados:
+            # Lista nova: o chamador conta os task_done pelos eventos da fila
+            eventos = eventos + [{'timestamp': datetime.now().isoformat(), 'origem': 'auditoria',
+                                  'acao': 'eventos_descartados', 'quantidade': descartados}]
+
+        linhas = ''.join(json.dumps(e, ensure_ascii=False, default=_serializar) + '\n' for e in eventos)
+        dados = linhas.encode('utf-8')
+
+        if os.path.exists(self.caminho) and os.path.getsize(self.caminho) + len(dados) > self.max_bytes:
+            self._rotacionar()
+
+        with open(self.caminho, 'ab') as f:
+            f.write(dados)
+        self.gravados += len(eventos)
+
+    def _gravar_continuamente(self):
+
+        while True:
+            try:
+                eventos = [self._fila.get(timeout=self.intervalo_segundos)]
+            except queue.Empty:
+                if self._encerrar.is_set():
+                    return
+                continue
+
+            while len(eventos) < self.tamanho_lote:
+                try:
+                    eventos.append(self._fila.get_nowait())
+                except queue.Empty:
+                    break
+
+            try:
+                self._gravar(eventos)
+            except Exception as e:
+                logger.error(f"Falha ao gravar {len(eventos)} eventos de auditoria: {e}")
+            finally:
+                for _ in eventos:
+                    self._fila.task_done()
+
+    def descarregar(self):
+
+        # Espera a gravação de tudo o que já foi registrado
+        self._fila.join()
+
+    def encerrar(self):
+
+        self.descarregar()
+        self._encerrar.set()
+        self._thread.join(timeout=5)
+
+
+_auditoria: Optional[AuditoriaAssincrona] = None
+_auditoria_lock = threading.Lock()
+
+
+def obter_auditoria() -> AuditoriaAssincrona:
+
+    global _auditoria
+    with _auditoria_lock:
+        if _auditoria is None:
+            # Import tardio: database_tool também registra eventos aqui
+            from tools.database_tool import get_project_root
+            diretorio = os.environ.get('SRAG_DIRETORIO_AUDITORIA') or \
+                os.path.join(get_project_root(), 'reports', 'auditoria')
+            _auditoria = AuditoriaAssincrona(diretorio)
+            atexit.register(_auditoria.encerrar)
+        return _auditoria
+
+
+def registrar_evento(origem: str, acao: str, **detalhes) -> Dict[str, Any]:
+
+    return obter_auditoria().registrar(origem, acao, **detalhes)
@@ -8,12 +8,14 @@ import pandas as pd
 import numpy as np
 import os
 import logging
-from typing import Optional, Tuple
-from datetime import datetime
+from typing import Callable, Dict, Optional, Tuple
 import sys
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from tools.database_tool import DatabaseTool, get_project_root
+from tools.database_tool import get_project_root
+from tools.auditoria import registrar_evento
+from tools.instrumentacao import cronometrado
+from tools.registro import obter_registro
 
 logging.basicConfig(
     level=logging.INFO,
@@ -40,7 +42,7 @@ class ChartsTool:
     def __init__(self, db_path: str = None,
                  output_dir: str = None):
 
-        self.db = DatabaseTool(db_path)
+        self.db = obter_registro(db_path).banco()
 
         if output_dir is None:
             root = get_project_root()
@@ -54,45 +56,29 @@ class ChartsTool:
 
     def _registrar_geracao(self, grafico: str, caminho: str):
 
-        registro = {
-            'timestamp': datetime.now().isoformat(),
-            'grafico': grafico,
-            'caminho': caminho
+        registrar_evento('graficos', 'geracao', grafico=grafico, caminho=caminho)
+
+    def consultas_criticas(self) -> Dict[str, Callable]:
+
+        return {
+            'grafico_ultimos_dias': self._obter_ultimos_dias,
+            'grafico_ultimos_meses': self._obter_ultimos_meses,
         }
-        logger.info(f"AUDITORIA GRÁFICO: {registro}")
 
     def _obter_ultimos_dias(self, dias: int = 30) -> pd.DataFrame:
 
-        query = f"""
-            SELECT 
-                DATE(DT_NOTIFIC) as data,
-                COUNT(*) as total_casos
-            FROM srag
-            WHERE DT_NOTIFIC IS NOT NULL
-              AND DATE(DT_NOTIFIC) >= (
-                  SELECT DATE(MAX(DT_NOTIFIC), '-{dias} days') FROM srag
-              )
-            GROUP BY DATE(DT_NOTIFIC)
-            ORDER BY data
-        """
-        return self.db.executar_query(query)
+        # Séries densas: dias e meses sem notificações aparecem com zero. A
+        # janela inclui o período de referência, como o antigo
+        # DT_NOTIFIC >= DATE(MAX(DT_NOTIFIC), '-30 days'): 31 dias, 13 meses
+        df = self.db.agregar_casos('dia', ultimos=dias + 1)
+        return df.rename(columns={'periodo': 'data'})
 
     def _obter_ultimos_meses(self, meses: int = 12) -> pd.DataFrame:
 
-        query = f"""
-            SELECT 
-                strftime('%Y-%m', DT_NOTIFIC) as ano_mes,
-                COUNT(*) as total_casos
-            FROM srag
-            WHERE DT_NOTIFIC IS NOT NULL
-              AND DT_NOTIFIC >= (
-                  SELECT DATE(MAX(DT_NOTIFIC), '-{meses} months') FROM srag
-              )
-            GROUP BY strftime('%Y-%m', DT_NOTIFIC)
-            ORDER BY ano_mes
-        """
-        return self.db.executar_query(query)
+        df = self.db.agregar_casos('mes', ultimos=meses + 1)
+        return df.rename(columns={'periodo': 'ano_mes'})
 
+    @cronometrado('graficos.casos_diarios')
     def gerar_grafico_casos_diarios(self, dias: int = 30,
                                     salvar: bool = True) -> Tuple[plt.Figure, str]:
 
@@ -149,6 +135,7 @@ class ChartsTool:
         plt.close(fig)  # Fechar figura para liberar memória
         return fig, caminho
 
+    @cronometrado('graficos.casos_mensais')
     def gerar_grafico_casos_mensais(self, meses: int = 12,
                                     salvar: bool = True) -> Tuple[plt.Figure, str]:
 
@@ -228,19 +215,21 @@ class ChartsTool:
 def criar_charts_tool(db_path: str = None,
                       output_dir: str = None) -> ChartsTool:
 
+    if output_dir is None:
+        return obter_registro(db_path).graficos()
     return ChartsTool(db_path, output_dir)
 
 
 def tool_gerar_grafico_diario() -> str:
 
-    charts = ChartsTool()
+    charts = obter_registro().graficos()
     _, caminho = charts.gerar_grafico_casos_diarios()
     return f"Gráfico de casos diários gerado em: {caminho}"
 
 
 def tool_gerar_grafico_mensal() -> str:
 
-    charts = ChartsTool()
+    charts = obter_registro().graficos()
     _, caminho = charts.gerar_grafico_casos_mensais()
     return f"Gráfico de casos mensais gerado em: {caminho}"
 
@@ -0,0 +1,446 @@
+import re
+import logging
+import functools
+from dataclasses import dataclass, replace
+from datetime import timedelta
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+import sys
+import os
+
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tools.database_tool import (
+    DIMENSOES_GRUPO,
+    EPOCA,
+    GRANULARIDADES,
+    data_para_dia,
+    dia_para_data,
+    sql_data_para_dia,
+    _inicio_periodo,
+    _periodo_do_dia,
+)
+
+logger = logging.getLogger('consulta')
+
+_IDENTIFICADOR = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+OPERADORES = ('=', '!=', '<', '<=', '>', '>=', 'IN', 'NOT IN', 'BETWEEN', 'IS NULL', 'IS NOT NULL')
+
+FUNCOES = {
+    'contagem': 'COUNT(*)',
+    'soma': 'SUM({coluna})',
+    'media': 'AVG({coluna})',
+    'minimo': 'MIN({coluna})',
+    'maximo': 'MAX({coluna})',
+    'distintos': 'COUNT(DISTINCT {coluna})',
+    # Conta as linhas que atendem as condições (ver normalizar_condicoes); no
+    # cubo, cada linha pesa total_casos
+    'contagem_se': 'SUM(CASE WHEN {condicao} THEN {peso} ELSE 0 END)',
+}
+
+FUNCOES_CONTAGEM = ('contagem', 'contagem_se')
+
+# Colunas presentes no cubo: consultas de contagem que só usam estas colunas
+# são respondidas pelo srag_cubo
+COLUNAS_CUBO = {'DT_NOTIFIC', *DIMENSOES_GRUPO}
+
+
+def _sql_periodo(granularidade: str, usar_cubo: bool) -> str:
+
+    # Sem o cubo, mês e ano vêm das colunas do índice de cobertura de DT_NOTIFIC
+    ano = "CAST(strftime('%Y', DT_NOTIFIC * 86400, 'unixepoch') AS INTEGER)"
+    mes = "CAST(strftime('%m', DT_NOTIFIC * 86400, 'unixepoch') AS INTEGER)"
+    if not usar_cubo:
+        ano, mes = 'ANO_NOTIFIC', 'MES_NOTIFIC'
+
+    return {
+        'dia': 'DT_NOTIFIC',
+        # 1970-01-01 foi quinta-feira: a semana p começa no domingo 7p - 4
+        'semana': '(DT_NOTIFIC + 4) / 7',
+        'mes': f'{ano} * 12 + {mes} - 1',
+        'ano': ano,
+    }[granularidade]
+
+
+def _rotulo_periodo(granularidade: str, periodo: int) -> str:
+
+    # Dia e semana pela data inicial; mês como AAAA-MM
+    if granularidade == 'mes':
+        return f"{periodo // 12:04d}-{periodo % 12 + 1:02d}"
+    if granularidade == 'ano':
+        return str(periodo)
+    return dia_para_data(_inicio_periodo(granularidade, periodo))
+
+
+def _semana_epidemiologica(periodo: int) -> Tuple[int, int]:
+
+    # A semana pertence ao ano da sua quarta-feira (a semana 1 é a primeira
+    # com ao menos quatro dias no ano), numerada como SEM_NOT
+    quarta = EPOCA + timedelta(days=7 * periodo - 1)
+    return quarta.year, (quarta.timetuple().tm_yday - 1) // 7 + 1
+
+
+def _validar_identificador(nome: str) -> str:
+
+    # Nomes de colunas entram no texto do SQL; valores só como parâmetros
+    if not isinstance(nome, str) or not _IDENTIFICADOR.match(nome):
+        raise ValueError(f"Identificador inválido: {nome!r}")
+    return nome
+
+
+def _condicao(coluna: str, operador: str, valor: Any = None) -> Tuple[str, str, Any]:
+
+    operador = operador.upper()
+    if operador not in OPERADORES:
+        raise ValueError(f"Operador não permitido: {operador}")
+    if operador in ('IN', 'NOT IN', 'BETWEEN'):
+        valor = tuple(valor)
+        if operador == 'BETWEEN' and len(valor) != 2:
+            raise ValueError("BETWEEN exige dois valores")
+        if not valor:
+            raise ValueError(f"{operador} exige ao menos um valor")
+    return _validar_identificador(coluna), operador, valor
+
+
+def normalizar_condicoes(condicoes: Any) -> Tuple[Tuple[str, str, Any], ...]:
+
+    # Conjunção de condições como tuplas (coluna, operador, valor). Aceita um
+    # dicionário como em filtrar (valor, lista para IN, None para IS NULL) ou
+    # uma sequência de tuplas (coluna, operador[, valor]) como em onde
+    if not condicoes:
+        return ()
+    if isinstance(condicoes, dict):
+        normalizadas = []
+        for coluna, valor in condicoes.items():
+            if valor is None:
+                normalizadas.append(_condicao(coluna, 'IS NULL'))
+            elif isinstance(valor, (list, tuple, set)):
+                normalizadas.append(_condicao(coluna, 'IN', valor))
+            else:
+                normalizadas.append(_condicao(coluna, '=', valor))
+        return tuple(normalizadas)
+    return tuple(_condicao(*condicao) for condicao in condicoes)
+
+
+def _forma_condicoes(condicoes: Tuple[Tuple[str, str, Any], ...]) -> tuple:
+
+    return tuple(
+        (coluna, operador, len(valor) if operador in ('IN', 'NOT IN') else None)
+        for coluna, operador, valor in condicoes
+    )
+
+
+def _sql_condicoes(forma: tuple) -> List[str]:
+
+    sql = []
+    for coluna, operador, aridade in forma:
+        if operador in ('IS NULL', 'IS NOT NULL'):
+            sql.append(f"{coluna} {operador}")
+        elif operador in ('IN', 'NOT IN'):
+            sql.append(f"{coluna} {operador} ({', '.join('?' * aridade)})")
+        elif operador == 'BETWEEN':
+            sql.append(f"{coluna} BETWEEN ? AND ?")
+        else:
+            sql.append(f"{coluna} {operador} ?")
+    return sql
+
+
+def _valores_condicoes(condicoes: Tuple[Tuple[str, str, Any], ...],
+                       codigo: Callable[[str, Any], Any] = lambda coluna, valor: valor) -> List[Any]:
+
+    # Na mesma ordem dos placeholders de _sql_condicoes
+    valores = []
+    for coluna, operador, valor in condicoes:
+        if operador in ('IN', 'NOT IN', 'BETWEEN'):
+            valores.extend(codigo(coluna, v) for v in valor)
+        elif operador not in ('IS NULL', 'IS NOT NULL'):
+            valores.append(codigo(coluna, valor))
+    return valores
+
+
+def compilar_condicoes(condicoes: Any) -> Tuple[str, List[Any]]:
+
+    # Conjunção como texto SQL com placeholders e os valores a vincular, para
+    # quem monta a própria consulta (ex.: contadores do MetricsTool)
+    condicoes = normalizar_condicoes(condicoes)
+    return ' AND '.join(_sql_condicoes(_forma_condicoes(condicoes))) or '1 = 1', _valores_condicoes(condicoes)
+
+
+@functools.lru_cache(maxsize=256)
+def _compilar(forma: tuple) -> str:
+
+    # SQL de uma forma de consulta: tabela, colunas, operadores, aridade dos
+    # filtros, janela, grupos, medidas e ordenação, sem os valores. Consultas
+    # que só diferem nos valores reaproveitam o texto compilado (e, pelo texto,
+    # o statement preparado de cada conexão).
+    tabela, colunas, filtros, janela, periodo, grupos, medidas, ordem, com_limite = forma
+    no_cubo = tabela == 'srag_cubo'
+
+    selecao = []
+    if periodo:
+        selecao.append(f"{_sql_periodo(periodo, no_cubo)} as periodo")
+    selecao.extend(grupos)
+    selecao.extend(colunas)
+    for nome, funcao, argumento in medidas:
+        if funcao == 'contagem_se':
+            expressao = FUNCOES[funcao].format(
+                condicao=' AND '.join(_sql_condicoes(argumento)) or '1 = 1',
+                peso='total_casos' if no_cubo else '1',
+            )
+        elif no_cubo and funcao == 'contagem':
+            expressao = 'SUM(total_casos)'
+        else:
+            expressao = FUNCOES[funcao].format(coluna=argumento)
+        selecao.append(f"{expressao} as {nome}")
+
+    condicoes = _sql_condicoes(filtros)
+
+    if janela:
+        condicoes.append('DT_NOTIFIC IS NOT NULL')
+        tipo, granularidade, com_inicio, com_fim = janela
+        if tipo == 'relativa':
+            # Os últimos N períodos até o último dia notificado, com o início
+            # calculado no próprio SQL a partir do MAX(DT_NOTIFIC)
+            referencia = f"(SELECT MAX(DT_NOTIFIC) FROM {tabela})"
+            inicio = {
+                'dia': f"{referencia} - ?",
+                'semana': f"(({referencia} + 4) / 7 - ?) * 7 - 4",
+                'mes': sql_data_para_dia(f"DATE({referencia} * 86400, 'unixepoch', 'start of month', ?)"),
+                'ano': sql_data_para_dia(f"DATE({referencia} * 86400, 'unixepoch', 'start of year', ?)"),
+            }[granularidade]
+            condicoes.append(f"DT_NOTIFIC >= {inicio}")
+        else:
+            if com_inicio:
+                condicoes.append('DT_NOTIFIC >= ?')
+            if com_fim:
+                condicoes.append('DT_NOTIFIC <= ?')
+
+    sql = f"SELECT {', '.join(selecao) or '*'} FROM {tabela}"
+    if condicoes:
+        sql += f" WHERE {' AND '.join(condicoes)}"
+    chaves = (['periodo'] if periodo else []) + list(grupos)
+    if chaves:
+        sql += f" GROUP BY {', '.join(chaves)}"
+    if ordem:
+        sql += f" ORDER BY {', '.join(f'{coluna} DESC' if decrescente else coluna for coluna, decrescente in ordem)}"
+    if com_limite:
+        sql += " LIMIT ?"
+    return sql
+
+
+@dataclass(frozen=True)
+class Consulta:
+
+    # Consulta composta de forma encadeada e preguiçosa sobre uma tabela do
+    # DatabaseTool. Cada chamada devolve uma nova Consulta, sem executar nada;
+    # executar()/linha()/escalar()/iterar() compilam tudo em um único SELECT
+    # parametrizado. Ex.:
+    #   db.consulta().filtrar(SG_UF_NOT='SP').janela(ultimos=3, granularidade='mes')
+    #     .agrupar('FAIXA_ETARIA', periodo='mes').agregar(total_casos='contagem').executar()
+    db: Any
+    tabela: str = 'srag'
+    colunas: Tuple[str, ...] = ()
+    filtros: Tuple[Tuple[str, str, Any], ...] = ()
+    intervalo: Optional[Tuple[Any, ...]] = None
+    periodo: Optional[str] = None
+    grupos: Tuple[str, ...] = ()
+    medidas: Tuple[Tuple[str, str, Optional[str]], ...] = ()
+    ordem: Tuple[Tuple[str, bool], ...] = ()
+    limite: Optional[int] = None
+
+    def selecionar(self, *colunas: str) -> 'Consulta':
+
+        return replace(self, colunas=self.colunas + tuple(map(_validar_identificador, colunas)))
+
+    def filtrar(self, **valores: Any) -> 'Consulta':
+
+        # coluna=valor (igualdade), coluna=[...] (IN) ou coluna=None (IS NULL).
+        # Nas dimensões, valores podem ser rótulos (ex.: SG_UF_NOT='SP')
+        return replace(self, filtros=self.filtros + normalizar_condicoes(valores))
+
+    def onde(self, coluna: str, operador: str, valor: Any = None) -> 'Consulta':
+
+        return replace(self, filtros=self.filtros + (_condicao(coluna, operador, valor),))
+
+    def janela(self, ultimos: int = None, data_inicio: str = None, data_fim: str = None,
+               granularidade: str = 'dia') -> 'Consulta':
+
+        # Janela sobre DT_NOTIFIC: os `ultimos` períodos (da granularidade) até o
+        # último dia notificado ou até data_fim, ou o intervalo absoluto
+        if granularidade not in GRANULARIDADES:
+            raise ValueError(f"Granularidade inválida: {granularidade} (use {', '.join(GRANULARIDADES)})")
+        if ultimos and data_inicio:
+            raise ValueError("Informe ultimos ou data_inicio, não ambos")
+
+        inicio = data_para_dia(data_inicio) if data_inicio else None
+        fim = data_para_dia(data_fim) if data_fim else None
+        if ultimos and fim is not None:
+            # Com o fim conhecido, a janela relativa vira absoluta
+            inicio = _inicio_periodo(granularidade, _periodo_do_dia(granularidade, fim) - ultimos + 1)
+        elif ultimos:
+            return replace(self, intervalo=('relativa', granularidade, int(ultimos)))
+
+        return replace(self, intervalo=('absoluta', granularidade, inicio, fim))
+
+    def agrupar(self, *colunas: str, periodo: str = None) -> 'Consulta':
+
+        # periodo: agrupa também por dia, semana epidemiológica, mês ou ano
+        if periodo is not None and periodo not in GRANULARIDADES:
+            raise ValueError(f"Granularidade inválida: {periodo} (use {', '.join(GRANULARIDADES)})")
+        return replace(
+            self,
+            grupos=self.grupos + tuple(map(_validar_identificador, colunas)),
+            periodo=periodo or self.periodo,
+        )
+
+    def agregar(self, **medidas: Any) -> 'Consulta':
+
+        # nome='contagem', nome=(coluna, funcao), funcao em FUNCOES, ou
+        # nome=(condicoes, 'contagem_se'), com condições como em
+        # normalizar_condicoes (ex.: obitos=({'EVOLUCAO': [2, 3]}, 'contagem_se'))
+        novas = []
+        for nome, especificacao in medidas.items():
+            argumento, funcao = (None, especificacao) if isinstance(especificacao, str) else especificacao
+            if funcao not in FUNCOES:
+                raise ValueError(f"Função de agregação não permitida: {funcao}")
+            if funcao == 'contagem_se':
+                argumento = normalizar_condicoes(argumento)
+            elif funcao != 'contagem':
+                _validar_identificador(argumento)
+            novas.append((_validar_identificador(nome), funcao, argumento))
+        return replace(self, medidas=self.medidas + tuple(novas))
+
+    def ordenar(self, *colunas: str) -> 'Consulta':
+
+        # '-coluna' ordena de forma decrescente
+        ordem = tuple((_validar_identificador(c.lstrip('-')), c.startswith('-')) for c in colunas)
+        return replace(self, ordem=self.ordem + ordem)
+
+    def limitar(self, quantidade: int) -> 'Consulta':
+
+        return replace(self, limite=int(quantidade))
+
+    def _tabela_efetiva(self) -> str:
+
+        # Contagens que só filtram e agrupam por colunas do cubo leem o cubo
+        if self.tabela != 'srag' or not self.db.usar_cubo or self.colunas or not self.medidas:
+            return self.tabela
+        if any(funcao not in FUNCOES_CONTAGEM for _, funcao, _ in self.medidas):
+            return self.tabela
+
+        nomes_medidas = {nome for nome, _, _ in self.medidas}
+        usadas = {coluna for coluna, _, _ in self.filtros} | set(self.grupos) | \
+                 {coluna for coluna, _ in self.ordem if coluna not in nomes_medidas and coluna != 'periodo'} | \
+                 {coluna for _, funcao, argumento in self.medidas if funcao == 'contagem_se' for coluna, _, _ in argumento}
+        return 'srag_cubo' if usadas <= COLUNAS_CUBO else self.tabela
+
+    def _forma(self) -> tuple:
+
+        janela = None
+        if self.intervalo is not None:
+            tipo, granularidade = self.intervalo[:2]
+            if tipo == 'relativa':
+                janela = (tipo, granularidade, False, False)
+            else:
+                janela = (tipo, granularidade, self.intervalo[2] is not None, self.intervalo[3] is not None)
+
+        medidas = tuple(
+            (nome, funcao, _forma_condicoes(argumento) if funcao == 'contagem_se' else argumento)
+            for nome, funcao, argumento in self.medidas
+        )
+        return (self._tabela_efetiva(), self.colunas, _forma_condicoes(self.filtros), janela, self.periodo,
+                self.grupos, medidas, self.ordem, self.limite is not None)
+
+    def _codigo(self, coluna: str, valor: Any) -> Any:
+
+        # Rótulo -> código nas dimensões com tabela de consulta
+        if coluna not in DIMENSOES_GRUPO or not isinstance(valor, str):
+            return valor
+        codigos = {rotulo: codigo for codigo, rotulo in self.db.dicionario_dimensao(coluna).items()}
+        codigo = codigos.get(valor, valor)
+        return int(codigo) if hasattr(codigo, 'item') else codigo
+
+    def _parametros(self) -> List[Any]:
+
+        # Na mesma ordem dos placeholders gerados por _compilar: medidas do
+        # SELECT, filtros, janela e limite
+        parametros = []
+        for _, funcao, argumento in self.medidas:
+            if funcao == 'contagem_se':
+                parametros.extend(_valores_condicoes(argumento, self._codigo))
+        parametros.extend(_valores_condicoes(self.filtros, self._codigo))
+
+        if self.intervalo is not None:
+            tipo, granularidade = self.intervalo[:2]
+            if tipo == 'relativa':
+                recuo = self.intervalo[2] - 1
+                parametros.append({'mes': f'-{recuo} months', 'ano': f'-{recuo} years'}.get(granularidade, recuo))
+            else:
+                parametros.extend(dia for dia in self.intervalo[2:] if dia is not None)
+
+        if self.limite is not None:
+            parametros.append(self.limite)
+        return parametros
+
+    def compilar(self) -> Tuple[str, List[Any]]:
+
+        tabela = self._tabela_efetiva()
+        if tabela not in self.db.TABELAS_PERMITIDAS:
+            raise ValueError(f"Tabela não permitida: {tabela}")
+        return _compilar(self._forma()), self._parametros()
+
+    def decodificar(self, df: pd.DataFrame, dimensoes: bool = True) -> pd.DataFrame:
+
+        # Períodos como datas (dia, início da semana), AAAA-MM ou ano, com o
+        # ano e o número da semana epidemiológica; com dimensoes=True, códigos
+        # das dimensões agrupadas como rótulos
+        if self.periodo and 'periodo' in df.columns:
+            if self.periodo == 'semana':
+                semanas = [_semana_epidemiologica(p) for p in df['periodo']]
+                df.insert(1, 'ano_epidemiologico', [ano for ano, _ in semanas])
+                df.insert(2, 'semana_epidemiologica', [semana for _, semana in semanas])
+            df['periodo'] = [_rotulo_periodo(self.periodo, p) for p in df['periodo']]
+
+        for dimensao in (self.grupos if dimensoes else ()):
+            if dimensao in DIMENSOES_GRUPO:
+                rotulos = self.db.dicionario_dimensao(dimensao)
+                if rotulos:
+                    df[dimensao] = df[dimensao].map(lambda codigo: rotulos.get(codigo, codigo))
+        return df
+
+    def executar(self, usar_cache: bool = True, decodificar: bool = True) -> pd.DataFrame:
+
+        sql, parametros = self.compilar()
+        df = self.db.executar_query(sql, usar_cache=usar_cache, parametros=parametros)
+        return self.decodificar(df) if decodificar else df
+
+    def linha(self, usar_cache: bool = True) -> Optional[Tuple]:
+
+        sql, parametros = self.compilar()
+        return self.db.executar_linha(sql, usar_cache=usar_cache, parametros=parametros)
+
+    def escalar(self, usar_cache: bool = True) -> Any:
+
+        linha = self.linha(usar_cache)
+        return None if linha is None else linha[0]
+
+    def iterar(self, tamanho_lote: int = 10000, formato: str = 'tuplas') -> Iterator[Any]:
+
+        sql, parametros = self.compilar()
+        return self.db.iterar_query(sql, tamanho_lote=tamanho_lote, formato=formato, parametros=parametros)
+
+    def plano(self) -> List[str]:
+
+        sql, parametros = self.compilar()
+        return self.db.plano_query(sql, parametros)
+
+    def __str__(self) -> str:
+
+        return self.compilar()[0]
+
+
+def estatisticas_compilacao() -> Dict[str, Any]:
+
+    info = _compilar.cache_info()
+    return {'formas': info.currsize, 'acertos': info.hits, 'falhas': info.misses}
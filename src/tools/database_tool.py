@@ -1,9 +1,28 @@
 import sqlite3
 import pandas as pd
 import os
+import re
+import time
+import atexit
+import functools
+import threading
+import weakref
+from collections import OrderedDict, namedtuple
 import logging
-from typing import Optional, List, Dict, Any
-from datetime import datetime, timedelta
+from urllib.parse import quote
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Optional, List, Dict, Any, Tuple, Callable, Iterator, Sequence
+from datetime import date, timedelta
+import sys
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+
+    PYARROW_DISPONIVEL = True
+except ImportError:
+    PYARROW_DISPONIVEL = False
 
 logging.basicConfig(
     level=logging.INFO,
@@ -11,6 +30,15 @@ logging.basicConfig(
 )
 logger = logging.getLogger('database_tool')
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tools.auditoria import registrar_evento
+from tools.instrumentacao import medir, obter_instrumentacao
+from tools.amostragem import estimar_razao, estimar_total
+
+if TYPE_CHECKING:
+    # tools.consulta importa este módulo; em tempo de execução o import é tardio
+    from tools.consulta import Consulta
+
 def get_project_root():
 
     current = os.path.dirname(os.path.abspath(__file__))
@@ -32,20 +60,498 @@ def get_default_db_path():
     return os.path.join(root, 'data', 'processed', 'srag.db')
 
 
+# Datas ficam gravadas como número de dias desde 1970-01-01 (ver
+# codificar_para_armazenamento em preprocessing.py)
+def sql_dia_para_data(expressao: str) -> str:
+
+    return f"DATE({expressao} * 86400, 'unixepoch')"
+
+
+def sql_data_para_dia(expressao: str) -> str:
+
+    return f"(CAST(strftime('%s', {expressao}) AS INTEGER) / 86400)"
+
+
+EPOCA = date(1970, 1, 1)
+
+
+def dia_para_data(dia: Optional[int]) -> Optional[str]:
+
+    if dia is None:
+        return None
+    return (EPOCA + timedelta(days=int(dia))).isoformat()
+
+
+def data_para_dia(data: str) -> int:
+
+    return (date.fromisoformat(str(data)[:10]) - EPOCA).days
+
+
+# Dimensões de agrupamento e filtro das contagens (todas presentes no cubo) e
+# a tabela de consulta que traduz seus códigos
+DIMENSOES_GRUPO = {
+    'SG_UF_NOT': ('dim_uf', 'sigla'),
+    'FAIXA_ETARIA': ('dim_faixa_etaria', 'faixa'),
+    'CS_SEXO': ('dim_sexo', 'sexo'),
+    'CLASSI_FIN': (None, None),
+}
+
+ROTULOS_CLASSI_FIN = {
+    1: 'Influenza',
+    2: 'Outro vírus respiratório',
+    3: 'Outro agente etiológico',
+    4: 'Não especificado',
+    5: 'COVID-19',
+}
+
+# Períodos de agregação no tempo. Cada período é identificado por um inteiro:
+# o próprio dia, a semana desde a época (semana epidemiológica, de domingo a
+# sábado, as mesmas fronteiras de SEM_NOT), ano * 12 + mês - 1 ou o ano.
+GRANULARIDADES = ('dia', 'semana', 'mes', 'ano')
+
+
+def _periodo_do_dia(granularidade: str, dia: int) -> int:
+
+    if granularidade == 'dia':
+        return dia
+    if granularidade == 'semana':
+        return (dia + 4) // 7
+
+    data = EPOCA + timedelta(days=int(dia))
+    return data.year * 12 + data.month - 1 if granularidade == 'mes' else data.year
+
+
+def _inicio_periodo(granularidade: str, periodo: int) -> int:
+
+    if granularidade == 'dia':
+        return periodo
+    if granularidade == 'semana':
+        return 7 * periodo - 4
+    if granularidade == 'mes':
+        return (date(periodo // 12, periodo % 12 + 1, 1) - EPOCA).days
+    return (date(periodo, 1, 1) - EPOCA).days
+
+
+def _valor_python(valor: Any) -> Any:
+
+    # Códigos lidos com pandas vêm como escalares numpy, que o sqlite3 não vincula
+    return valor.item() if isinstance(valor, np.generic) else valor
+
+
+class OrcamentoConsultaExcedido(RuntimeError):
+
+    pass
+
+
+# Catálogo do SQLite: legível só na introspecção interna (_tabela_existe),
+# nunca pelo SQL recebido em executar_query e afins
+TABELAS_SISTEMA = ('sqlite_master', 'sqlite_schema')
+
+ACOES_LEITURA = {sqlite3.SQLITE_SELECT, sqlite3.SQLITE_FUNCTION, sqlite3.SQLITE_RECURSIVE}
+
+
+def _autorizar(acao: int, arg1: Optional[str], arg2: Optional[str], banco: Optional[str], origem: Optional[str]) -> int:
+
+    # Autorizador do SQLite: além da validação textual, o próprio motor só
+    # aceita leituras das tabelas permitidas. Qualquer outra ação (escrita,
+    # ATTACH, PRAGMA, outras tabelas) faz a preparação da query falhar.
+    if acao in ACOES_LEITURA:
+        return sqlite3.SQLITE_OK
+    if acao == sqlite3.SQLITE_READ and arg1 in DatabaseTool.TABELAS_PERMITIDAS:
+        return sqlite3.SQLITE_OK
+
+    logger.warning(f"Autorizador negou acesso: ação {acao} sobre {arg1}.{arg2}")
+    return sqlite3.SQLITE_DENY
+
+
+def _autorizar_introspeccao(acao: int, arg1: Optional[str], arg2: Optional[str], banco: Optional[str],
+                            origem: Optional[str]) -> int:
+
+    if acao == sqlite3.SQLITE_READ and arg1 in TABELAS_SISTEMA:
+        return sqlite3.SQLITE_OK
+    return _autorizar(acao, arg1, arg2, banco, origem)
+
+
+class OrcamentoConsulta:
+
+    # Limite de tempo e de instruções da VM do SQLite para uma query, via
+    # progress handler: chamado a cada INTERVALO instruções, cancela a query
+    # (sqlite3.OperationalError 'interrupted') ao passar de um dos limites.
+    # O tempo só conta enquanto o SQLite executa (instalar/remover), o que
+    # permite leituras em lotes com pausas entre um lote e outro.
+    INTERVALO = 10000
+
+    def __init__(self, segundos: Optional[float], passos: Optional[int]):
+
+        self.segundos = segundos
+        self.passos = passos
+        self.passos_executados = 0
+        self.segundos_executados = 0.0
+        self.motivo = None
+        self._inicio = None
+
+    def _verificar(self) -> int:
+
+        self.passos_executados += self.INTERVALO
+        if self.passos is not None and self.passos_executados > self.passos:
+            self.motivo = f"mais de {self.passos} instruções da VM"
+        elif self.segundos is not None and \
+                self.segundos_executados + time.perf_counter() - self._inicio > self.segundos:
+            self.motivo = f"mais de {self.segundos}s de execução"
+
+        return 1 if self.motivo else 0
+
+    @contextmanager
+    def aplicar(self, conn: sqlite3.Connection):
+
+        if self.segundos is None and self.passos is None:
+            yield
+            return
+
+        self._inicio = time.perf_counter()
+        conn.set_progress_handler(self._verificar, self.INTERVALO)
+        try:
+            yield
+        finally:
+            conn.set_progress_handler(None, 0)
+            self.segundos_executados += time.perf_counter() - self._inicio
+
+
+class _ConexaoThread:
+
+    # Conexão de uma thread do pool. Quando a thread termina, o threading.local
+    # descarta este objeto e o finalizador registrado pelo pool fecha a conexão.
+
+    def __init__(self, conn: sqlite3.Connection, identidade: Tuple[int, int]):
+
+        self.conn = conn
+        self.identidade = identidade
+        self.finalizar: Optional[weakref.finalize] = None
+
+
+class PoolConexoes:
+
+    # Conexões somente leitura persistentes, uma por thread, compartilhadas por
+    # todas as ferramentas do processo que usam o mesmo banco. A conexão é
+    # reaberta quando o arquivo do banco é trocado (carga completa via
+    # os.replace); alterações feitas no próprio arquivo (carga incremental) são
+    # vistas normalmente, por isso mode=ro e não immutable.
+
+    MMAP_SIZE = 256 * 1024 * 1024  # bytes
+    CACHE_SIZE_KB = 64 * 1024
+    # Statements preparados reaproveitados por conexão, pelo texto do SQL:
+    # consultas parametrizadas de mesma forma compilam uma única vez
+    STATEMENTS_PREPARADOS = 256
+
+    def __init__(self, db_path: str):
+
+        self.db_path = db_path
+        self.uri = f"file:{quote(os.path.abspath(db_path))}?mode=ro"
+        self._local = threading.local()
+        self._conexoes: set = set()
+        self._lock = threading.Lock()
+
+    def _identidade_arquivo(self) -> Tuple[int, int]:
+
+        info = os.stat(self.db_path)
+        return info.st_ino, info.st_mtime_ns
+
+    def versao(self) -> Tuple[int, int, int]:
+
+        # Versão do conjunto de dados: muda a cada recarga (novo arquivo) e a
+        # cada carga incremental (arquivo alterado)
+        info = os.stat(self.db_path)
+        return info.st_ino, info.st_mtime_ns, info.st_size
+
+    def _abrir(self, identidade: Tuple[int, int]) -> _ConexaoThread:
+
+        conn = sqlite3.connect(self.uri, uri=True, check_same_thread=False,
+                               cached_statements=self.STATEMENTS_PREPARADOS)
+        conn.execute(f'PRAGMA mmap_size = {self.MMAP_SIZE}')
+        conn.execute(f'PRAGMA cache_size = -{self.CACHE_SIZE_KB}')
+        conn.execute('PRAGMA temp_store = MEMORY')
+        conn.execute('PRAGMA query_only = ON')
+        conn.set_authorizer(_autorizar)
+
+        # A conexão vive enquanto a thread dona (ex.: executores de
+        # ferramentas do agente, de vida curta) ou até a troca do arquivo
+        atual = _ConexaoThread(conn, identidade)
+        atual.finalizar = weakref.finalize(atual, self._descartar, conn)
+        with self._lock:
+            self._conexoes.add(conn)
+        return atual
+
+    def _descartar(self, conn: sqlite3.Connection):
+
+        with self._lock:
+            self._conexoes.discard(conn)
+        conn.close()
+
+    def conexoes_abertas(self) -> int:
+
+        with self._lock:
+            return len(self._conexoes)
+
+    def conexao(self) -> sqlite3.Connection:
+
+        atual = getattr(self._local, 'atual', None)
+        identidade = self._identidade_arquivo()
+
+        if atual is not None and atual.identidade != identidade:
+            logger.info(f"Banco substituído, reabrindo conexão: {self.db_path}")
+            atual.finalizar()
+            atual = None
+
+        if atual is None:
+            atual = self._local.atual = self._abrir(identidade)
+
+        return atual.conn
+
+    def fechar(self):
+
+        with self._lock:
+            conexoes = list(self._conexoes)
+            self._conexoes.clear()
+        for conn in conexoes:
+            conn.close()
+        self._local = threading.local()
+
+
+def _copiar_resultado(resultado: Any) -> Any:
+
+    # DataFrames são copiados para que quem recebe possa alterá-los; linhas
+    # (tuplas) são imutáveis
+    return resultado.copy() if isinstance(resultado, pd.DataFrame) else resultado
+
+
+def _array_arrow(valores: Sequence[Any], tipo: Optional[Any]) -> 'pa.Array':
+
+    # O SQLite é tipado por valor e o sqlite3 não expõe o tipo declarado das
+    # colunas: o tipo vem dos lotes anteriores e é promovido quando um lote não
+    # cabe nele, de inteiro para double (lotes que pa.concat_tables(...,
+    # promote_options='permissive') junta) ou, com valores de tipos
+    # misturados, para texto
+    try:
+        array = pa.array(valores)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        array = None
+
+    if array is not None and (tipo is None or array.type in (tipo, pa.null())):
+        return array if tipo is None else array.cast(tipo)
+    numerico = tipo is None or pa.types.is_integer(tipo) or pa.types.is_floating(tipo)
+    if numerico and all(v is None or isinstance(v, (int, float)) for v in valores):
+        return pa.array(valores, type=pa.float64())
+    return pa.array([None if v is None else str(v) for v in valores], type=pa.string())
+
+
+def _chave_consulta(query: str, parametros: Sequence[Any]) -> str:
+
+    # Os valores dos parâmetros fazem parte da chave do cache de resultados
+    return f"{query} {tuple(parametros)!r}" if parametros else query
+
+
+@functools.lru_cache(maxsize=256)
+def _tipo_linha(colunas: Tuple[str, ...]) -> type:
+
+    # Um tipo de tupla nomeada por conjunto de colunas; rename troca nomes que
+    # não são identificadores válidos (ex.: COUNT(*)) por _0, _1, ...
+    return namedtuple('Linha', colunas, rename=True)
+
+
+class CacheConsultas:
+
+    # Cache LRU de resultados, chaveado pelo texto normalizado da query e pela
+    # versão do banco. Quando a versão muda, todas as entradas são descartadas.
+
+    def __init__(self, max_entradas: int = 128, ttl_segundos: float = 600):
+
+        self.max_entradas = max_entradas
+        self.ttl_segundos = ttl_segundos
+        self._entradas: 'OrderedDict[str, Tuple[float, pd.DataFrame]]' = OrderedDict()
+        self._versao = None
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+
+    @staticmethod
+    def normalizar(query: str) -> str:
+
+        return ' '.join(query.split())
+
+    def obter(self, query: str, versao: tuple) -> Optional[pd.DataFrame]:
+
+        chave = self.normalizar(query)
+        with self._lock:
+            if versao != self._versao:
+                if self._entradas:
+                    logger.info("Banco alterado, cache de consultas invalidado")
+                self._entradas.clear()
+                self._versao = versao
+
+            entrada = self._entradas.get(chave)
+            if entrada is None or time.monotonic() - entrada[0] > self.ttl_segundos:
+                if entrada is not None:
+                    del self._entradas[chave]
+                self.falhas += 1
+                return None
+
+            self._entradas.move_to_end(chave)
+            self.acertos += 1
+            return _copiar_resultado(entrada[1])
+
+    def guardar(self, query: str, versao: tuple, df: pd.DataFrame):
+
+        chave = self.normalizar(query)
+        with self._lock:
+            if versao != self._versao:
+                return
+
+            self._entradas[chave] = (time.monotonic(), _copiar_resultado(df))
+            self._entradas.move_to_end(chave)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+
+    def limpar(self):
+
+        with self._lock:
+            self._entradas.clear()
+            self._versao = None
+
+    def estatisticas(self) -> Dict[str, Any]:
+
+        with self._lock:
+            total = self.acertos + self.falhas
+            return {
+                'entradas': len(self._entradas),
+                'max_entradas': self.max_entradas,
+                'ttl_segundos': self.ttl_segundos,
+                'acertos': self.acertos,
+                'falhas': self.falhas,
+                'taxa_acerto': round(self.acertos / total * 100, 2) if total else 0.0,
+            }
+
+
+_pools: Dict[str, PoolConexoes] = {}
+_caches: Dict[str, CacheConsultas] = {}
+_pools_lock = threading.Lock()
+
+
+def obter_pool(db_path: str) -> PoolConexoes:
+
+    chave = os.path.abspath(db_path)
+    with _pools_lock:
+        if chave not in _pools:
+            _pools[chave] = PoolConexoes(db_path)
+        return _pools[chave]
+
+
+def obter_cache(db_path: str) -> CacheConsultas:
+
+    chave = os.path.abspath(db_path)
+    with _pools_lock:
+        if chave not in _caches:
+            _caches[chave] = CacheConsultas(
+                max_entradas=DatabaseTool.CACHE_MAX_ENTRADAS,
+                ttl_segundos=DatabaseTool.CACHE_TTL_SEGUNDOS
+            )
+        return _caches[chave]
+
+
+def fechar_conexoes():
+
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.fechar()
+    logger.info(f"Conexões com o banco encerradas ({len(pools)} pool(s))")
+
+
+atexit.register(fechar_conexoes)
+
+
+_captura = threading.local()
+
+
+@contextmanager
+def capturar_queries():
+
+    # Registra as queries executadas na thread atual por qualquer DatabaseTool,
+    # junto com a ferramenta que as executou
+    _captura.queries = []
+    try:
+        yield _captura.queries
+    finally:
+        _captura.queries = None
+
+
+def _varreduras_completas(plano: List[str]) -> List[str]:
+
+    # SCAN de tabela (com ou sem índice de cobertura) lê a tabela inteira; só
+    # são aceitos a linha constante e subconsultas materializadas
+    materializadas = {m.group(1) for linha in plano for m in [re.match(r'MATERIALIZE (\S+)', linha)] if m}
+    varreduras = []
+    for linha in plano:
+        match = re.match(r'SCAN (\S+)', linha)
+        if match and match.group(1) != 'CONSTANT' and match.group(1) not in materializadas:
+            varreduras.append(linha)
+
+    return varreduras
+
+
+def verificar_planos(consultas: Dict[str, Callable]) -> List[Dict[str, Any]]:
+
+    # Executa cada consulta crítica, obtém o EXPLAIN QUERY PLAN das queries
+    # geradas e aponta as que varrem uma tabela inteira
+    resultados = []
+    for nome, consulta in consultas.items():
+        with capturar_queries() as queries:
+            consulta()
+
+        for ferramenta, query, parametros in queries:
+            plano = ferramenta.plano_query(query, parametros)
+            varreduras = _varreduras_completas(plano)
+            resultados.append({
+                'consulta': nome,
+                'plano': plano,
+                'varreduras_completas': varreduras,
+                'ok': not varreduras,
+            })
+            if varreduras:
+                logger.warning(f"Varredura completa em consulta crítica '{nome}': {varreduras}")
+
+    return resultados
+
+
 class DatabaseTool:
 
-    TABELAS_PERMITIDAS = ['srag']
+    TABELAS_PERMITIDAS = ['srag', 'srag_cubo', 'srag_amostra', 'dim_uf', 'dim_sexo', 'dim_faixa_etaria']
     KEYWORDS_BLOQUEADAS = [
         'DROP', 'DELETE', 'UPDATE', 'INSERT', 'ALTER', 'CREATE',
         'TRUNCATE', 'EXEC', 'EXECUTE', '--', ';--', '/*', '*/',
         'UNION SELECT', 'OR 1=1', 'OR 1 = 1'
     ]
+    CACHE_MAX_ENTRADAS = 128
+    CACHE_TTL_SEGUNDOS = 600
+    # Orçamento padrão por query (None desliga o limite). As consultas do
+    # relatório usam poucos milhões de instruções mesmo sem o cubo.
+    ORCAMENTO_SEGUNDOS = 30.0
+    ORCAMENTO_PASSOS_VM = 2_000_000_000
 
-    def __init__(self, db_path: str = None):
+    def __init__(self, db_path: str = None, orcamento_segundos: Optional[float] = ORCAMENTO_SEGUNDOS,
+                 orcamento_passos: Optional[int] = ORCAMENTO_PASSOS_VM):
 
         self.db_path = db_path if db_path else get_default_db_path()
+        self.orcamento_segundos = orcamento_segundos
+        self.orcamento_passos = orcamento_passos
         self._validar_banco()
-        logger.info(f"DatabaseTool inicializado com banco: {self.db_path}")
+        self.pool = obter_pool(self.db_path)
+        self.cache = obter_cache(self.db_path)
+        self._derivadas = None
+        logger.info(
+            f"DatabaseTool inicializado com banco: {self.db_path} "
+            f"(cubo: {self.usar_cubo}, amostra: {self.usar_amostra})"
+        )
 
     def _validar_banco(self):
 
@@ -55,6 +561,50 @@ class DatabaseTool:
                 "Execute primeiro: python src/data/preprocessing.py"
             )
 
+    def _tabela_existe(self, tabela: str) -> bool:
+
+        # O catálogo só é liberado durante esta leitura. Trocar o autorizador
+        # expira os statements preparados da conexão, então nem o texto desta
+        # query reaproveitado do cache escapa da regra restrita depois.
+        conn = self.pool.conexao()
+        conn.set_authorizer(_autorizar_introspeccao)
+        try:
+            existe = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (tabela,)
+            ).fetchone()
+        finally:
+            conn.set_authorizer(_autorizar)
+        return existe is not None
+
+    def _tabelas_derivadas(self) -> Tuple[bool, bool]:
+
+        # Presença do cubo e da amostra, reavaliada a cada nova versão do
+        # arquivo (como o cache e o pool): um banco trocado por outro sem essas
+        # tabelas volta a ser consultado direto na srag
+        versao = self.pool.versao()
+        derivadas = self._derivadas
+        if derivadas is None or derivadas[0] != versao:
+            derivadas = self._derivadas = (versao, self._tabela_existe('srag_cubo'), self._tabela_existe('srag_amostra'))
+        return derivadas[1], derivadas[2]
+
+    @property
+    def usar_cubo(self) -> bool:
+
+        return self._tabelas_derivadas()[0]
+
+    @property
+    def usar_amostra(self) -> bool:
+
+        return self._tabelas_derivadas()[1]
+
+    def fonte_casos(self) -> Tuple[str, str]:
+
+        # Tabela e expressão de contagem de casos: o cubo de agregação, quando
+        # existe, responde com milhares de linhas em vez de milhões
+        if self.usar_cubo:
+            return 'srag_cubo', 'SUM(total_casos)'
+        return 'srag', 'COUNT(*)'
+
     def _validar_query(self, query: str) -> bool:
 
         query_upper = query.upper().strip()
@@ -69,167 +619,515 @@ class DatabaseTool:
 
         return True
 
-    def _registrar_auditoria(self, query: str, sucesso: bool, erro: str = None):
+    def _registrar_auditoria(self, query: str, sucesso: bool, erro: str = None, **detalhes):
 
-        registro = {
-            'timestamp': datetime.now().isoformat(),
-            'query': query[:500],  # Limitar tamanho
-            'sucesso': sucesso,
-            'erro': erro
-        }
-        logger.info(f"AUDITORIA: {registro}")
+        registrar_evento('database', 'query', query=query[:500], sucesso=sucesso, erro=erro, **detalhes)  # Limitar tamanho
 
-    def executar_query(self, query: str) -> pd.DataFrame:
+    def _preparar_query(self, query: str, parametros: Sequence[Any] = ()):
 
+        # Validação e captura comuns a todos os modos de resultado
         if not self._validar_query(query):
             self._registrar_auditoria(query, False, "Query não permitida")
             raise ValueError("Query não permitida. Apenas SELECT é aceito.")
 
+        if getattr(_captura, 'queries', None) is not None:
+            _captura.queries.append((self, query, tuple(parametros)))
+
+    def _novo_orcamento(self) -> OrcamentoConsulta:
+
+        return OrcamentoConsulta(self.orcamento_segundos, self.orcamento_passos)
+
+    def _falha_execucao(self, query: str, erro: Exception, orcamento: OrcamentoConsulta) -> Exception:
+
+        # Registra a falha e devolve a exceção a propagar: query cancelada pelo
+        # orçamento ou negada pelo autorizador viram erros explícitos
+        if orcamento.motivo:
+            mensagem = f"Consulta cancelada por exceder o orçamento: {orcamento.motivo}"
+            self._registrar_auditoria(query, False, mensagem)
+            logger.warning(f"{mensagem}: {query[:200]}")
+            return OrcamentoConsultaExcedido(mensagem)
+
+        # Mensagens do SQLite para ações negadas pelo autorizador
+        if 'not authorized' in str(erro) or 'is prohibited' in str(erro):
+            mensagem = "Query não permitida: acesso negado pelo autorizador do banco"
+            self._registrar_auditoria(query, False, mensagem)
+            return ValueError(mensagem)
+
+        self._registrar_auditoria(query, False, str(erro))
+        logger.error(f"Erro ao executar query: {erro}")
+        return erro
+
+    def executar_query(self, query: str, usar_cache: bool = True, parametros: Sequence[Any] = ()) -> pd.DataFrame:
+
+        # parametros: valores dos placeholders ? da query
+        with medir('database.executar_query') as atributos:
+            self._preparar_query(query, parametros)
+
+            chave = _chave_consulta(query, parametros)
+            versao = self.pool.versao()
+            if usar_cache:
+                df = self.cache.obter(chave, versao)
+                if df is not None:
+                    atributos.update(cache=True, linhas=len(df))
+                    self._registrar_auditoria(query, True)
+                    logger.info(f"Query servida do cache. Retornou {len(df)} registros.")
+                    return df
+
+            orcamento = self._novo_orcamento()
+            try:
+                conn = self.pool.conexao()
+                with orcamento.aplicar(conn):
+                    df = pd.read_sql_query(query, conn, params=tuple(parametros) or None)
+                if usar_cache:
+                    self.cache.guardar(chave, versao, df)
+
+                atributos['linhas'] = len(df)
+                self._registrar_auditoria(query, True)
+                logger.info(f"Query executada com sucesso. Retornou {len(df)} registros.")
+
+                return df
+
+            except Exception as e:
+                erro = self._falha_execucao(query, e, orcamento)
+                if erro is e:
+                    raise
+                raise erro from e
+
+    def executar_linha(self, query: str, usar_cache: bool = True, parametros: Sequence[Any] = ()) -> Optional[Tuple]:
+
+        # Caminho leve para agregados de uma linha: devolve a primeira linha
+        # como tupla nomeada (linha.total, linha[0]) sem montar um DataFrame.
+        # None se a query não retornar linhas.
+        with medir('database.executar_linha') as atributos:
+            self._preparar_query(query, parametros)
+
+            # Prefixo na chave: a mesma query via executar_query guarda um DataFrame
+            chave = f"LINHA {_chave_consulta(query, parametros)}"
+            versao = self.pool.versao()
+            if usar_cache:
+                linha = self.cache.obter(chave, versao)
+                if linha is not None:
+                    atributos['cache'] = True
+                    self._registrar_auditoria(query, True)
+                    return linha
+
+            orcamento = self._novo_orcamento()
+            try:
+                conn = self.pool.conexao()
+                with orcamento.aplicar(conn):
+                    cursor = conn.execute(query, parametros)
+                    try:
+                        valores = cursor.fetchone()
+                        colunas = tuple(d[0] for d in cursor.description)
+                    finally:
+                        cursor.close()
+
+                linha = None if valores is None else _tipo_linha(colunas)(*valores)
+                if usar_cache and linha is not None:
+                    self.cache.guardar(chave, versao, linha)
+
+                self._registrar_auditoria(query, True)
+                return linha
+
+            except Exception as e:
+                erro = self._falha_execucao(query, e, orcamento)
+                if erro is e:
+                    raise
+                raise erro from e
+
+    def executar_escalar(self, query: str, usar_cache: bool = True, parametros: Sequence[Any] = ()) -> Any:
+
+        linha = self.executar_linha(query, usar_cache, parametros)
+        return None if linha is None else linha[0]
+
+    def iterar_query(self, query: str, tamanho_lote: int = 10000,
+                     formato: str = 'tuplas', parametros: Sequence[Any] = ()) -> Iterator[Any]:
+
+        # Leitura em lotes direto do cursor, para extrações grandes: a memória
+        # fica limitada a um lote. formato: 'tuplas' (lista de tuplas),
+        # 'dataframe' ou 'arrow' (pyarrow.RecordBatch). Sem cache. Validação,
+        # autorizador e orçamento valem já na chamada; só a leitura dos lotes
+        # é preguiçosa.
+        if formato not in ('tuplas', 'dataframe', 'arrow'):
+            raise ValueError(f"Formato inválido: {formato}")
+        if formato == 'arrow' and not PYARROW_DISPONIVEL:
+            raise ImportError("pyarrow não está instalado. Execute: pip install pyarrow")
+
+        self._preparar_query(query, parametros)
+
+        orcamento = self._novo_orcamento()
         try:
-            conn = sqlite3.connect(self.db_path)
-            df = pd.read_sql_query(query, conn)
-            conn.close()
+            conn = self.pool.conexao()
+            with orcamento.aplicar(conn):
+                cursor = conn.execute(query, parametros)
+        except Exception as e:
+            erro = self._falha_execucao(query, e, orcamento)
+            if erro is e:
+                raise
+            raise erro from e
+
+        return self._ler_lotes(query, conn, cursor, orcamento, tamanho_lote, formato)
+
+    def _ler_lotes(self, query: str, conn: sqlite3.Connection, cursor: sqlite3.Cursor,
+                   orcamento: OrcamentoConsulta, tamanho_lote: int, formato: str) -> Iterator[Any]:
+
+        total = 0
+        concluida = False
+        falhou = False
+        try:
+            colunas = [d[0] for d in cursor.description]
+            tipos: Dict[int, Any] = {}
+
+            while True:
+                # O orçamento vale para a extração inteira, somando só o tempo
+                # gasto no SQLite (não o de quem consome os lotes)
+                with orcamento.aplicar(conn):
+                    linhas = cursor.fetchmany(tamanho_lote)
+                if not linhas:
+                    break
+                total += len(linhas)
 
-            self._registrar_auditoria(query, True)
-            logger.info(f"Query executada com sucesso. Retornou {len(df)} registros.")
+                if formato == 'tuplas':
+                    yield linhas
+                elif formato == 'dataframe':
+                    yield pd.DataFrame.from_records(linhas, columns=colunas)
+                else:
+                    arrays = []
+                    for i, valores in enumerate(zip(*linhas)):
+                        array = _array_arrow(valores, tipos.get(i))
+                        if array.type != pa.null():
+                            tipos[i] = array.type
+                        arrays.append(array)
+                    yield pa.RecordBatch.from_arrays(arrays, names=colunas)
 
-            return df
+            concluida = True
+            logger.info(f"Query em lotes concluída. Retornou {total} registros.")
 
         except Exception as e:
-            self._registrar_auditoria(query, False, str(e))
-            logger.error(f"Erro ao executar query: {e}")
-            raise
+            falhou = True
+            erro = self._falha_execucao(query, e, orcamento)
+            if erro is e:
+                raise
+            raise erro from e
+
+        finally:
+            cursor.close()
+            # Também quando quem consome interrompe a leitura (break, close())
+            if not falhou:
+                self._registrar_auditoria(query, True, linhas=total, interrompida=not concluida)
+            # Só o tempo gasto no SQLite, como o orçamento
+            obter_instrumentacao().registrar('database.iterar_query', orcamento.segundos_executados, linhas=total)
+
+    def plano_query(self, query: str, parametros: Sequence[Any] = ()) -> List[str]:
+
+        if not self._validar_query(query):
+            raise ValueError("Query não permitida. Apenas SELECT é aceito.")
+
+        linhas = self.pool.conexao().execute(f"EXPLAIN QUERY PLAN {query}", parametros).fetchall()
+        return [linha[3] for linha in linhas]
+
+    def consultas_criticas(self) -> Dict[str, Callable]:
+
+        # Consultas do caminho do relatório que não podem varrer a tabela
+        # inteira. Com o cubo, óbitos e UTI somam o cubo todo por definição.
+        consultas = {
+            'periodo_dados': self.obter_periodo_dados,
+            'casos_por_dia': self.casos_por_dia,
+            'casos_por_mes': self.casos_por_mes,
+            'aumento_casos': self.obter_aumento_casos,
+        }
+        if not self.usar_cubo:
+            consultas['dados_obitos'] = self.obter_dados_obitos
+            consultas['dados_uti'] = self.obter_dados_uti
+
+        return consultas
+
+    def estatisticas_cache(self) -> Dict[str, Any]:
+
+        return self.cache.estatisticas()
+
+    def contar_registros(self, **valores) -> int:
+
+        # Filtros por coluna como em Consulta.filtrar (ex.:
+        # contar_registros(EVOLUCAO=2, SG_UF_NOT='SP')), vinculados como parâmetros
+        return int(self.consulta().filtrar(**valores).agregar(total='contagem').escalar() or 0)
+
+    def contagens_por_estrato(self, condicoes: Dict[str, Any], filtros: Dict[str, Any] = None,
+                              exato: bool = False) -> pd.DataFrame:
+
+        # Uma linha por estrato UF x mês da amostra, com os tamanhos do estrato
+        # e da amostra e quantas linhas sorteadas atendem cada condição. Exato
+        # (ou banco sem amostra): a tabela srag inteira como um único estrato.
+        # Condições e filtros como em Consulta (dicionário ou tuplas
+        # (coluna, operador, valor)), sempre com valores vinculados.
+        if not exato and not self.usar_amostra:
+            logger.info("Banco sem amostra estratificada (srag_amostra): cálculo exato")
+            exato = True
+
+        medidas = {nome: (condicao, 'contagem_se') if condicao else 'contagem' for nome, condicao in condicoes.items()}
+        if exato:
+            consulta = self.consulta().agregar(TOTAL_ESTRATO='contagem', AMOSTRA_ESTRATO='contagem', **medidas)
+        else:
+            consulta = self.consulta('srag_amostra') \
+                .agrupar('SG_UF_NOT', 'ESTRATO_MES') \
+                .agregar(TOTAL_ESTRATO=('TOTAL_ESTRATO', 'maximo'), AMOSTRA_ESTRATO=('AMOSTRA_ESTRATO', 'maximo'),
+                         **medidas)
+
+        return consulta.filtrar(**(filtros or {})).executar(decodificar=False).fillna(0)
+
+    def estimar_contagem(self, condicao: Any = None, filtros: Dict[str, Any] = None,
+                         exato: bool = False) -> Dict[str, Any]:
+
+        # Total de registros que atendem a condição, estimado pela amostra
+        # estratificada com erro padrão e intervalo de 95%
+        exato = exato or not self.usar_amostra
+        estratos = self.contagens_por_estrato({'contagem': condicao}, filtros, exato)
+        return {**estimar_total(estratos, 'contagem'), 'exato': exato}
+
+    def estimar_proporcao(self, numerador: Any, denominador: Any = None, filtros: Dict[str, Any] = None,
+                          exato: bool = False) -> Dict[str, Any]:
 
-    def contar_registros(self, filtro: str = None) -> int:
+        # Percentual dos registros do denominador que também atendem o
+        # numerador (ex.: casos de 60 anos ou mais entre os casos de SP)
+        from tools.consulta import normalizar_condicoes
+        numerador, denominador = normalizar_condicoes(numerador), normalizar_condicoes(denominador)
 
-        query = "SELECT COUNT(*) as total FROM srag"
-        if filtro:
-            # Guardrail: sanitizar filtro básico
-            filtro_limpo = filtro.replace(';', '').replace('--', '')
-            query += f" WHERE {filtro_limpo}"
+        exato = exato or not self.usar_amostra
+        estratos = self.contagens_por_estrato(
+            {'numerador': numerador + denominador, 'denominador': denominador}, filtros, exato
+        )
+        return {**estimar_razao(estratos, 'numerador', 'denominador', escala=100), 'exato': exato}
 
-        df = self.executar_query(query)
-        return int(df['total'].iloc[0])
+    def consulta(self, tabela: str = 'srag') -> 'Consulta':
+
+        # Construtor encadeado de consultas (tools/consulta.py); import tardio
+        # porque ele usa as funções de período deste módulo
+        from tools.consulta import Consulta
+        if tabela not in self.TABELAS_PERMITIDAS:
+            raise ValueError(f"Tabela não permitida: {tabela}")
+        return Consulta(self, tabela)
+
+    def dicionario_dimensao(self, dimensao: str) -> Dict[Any, str]:
+
+        # Código -> rótulo; vazio se o banco não tiver a tabela de consulta
+        tabela, coluna = DIMENSOES_GRUPO[dimensao]
+        if tabela is None:
+            return dict(ROTULOS_CLASSI_FIN)
+        if not self._tabela_existe(tabela):
+            return {}
+
+        df = self.executar_query(f"SELECT codigo, {coluna} FROM {tabela}")
+        return dict(zip(df['codigo'], df[coluna]))
+
+    def filtros_dimensoes(self, filtros: Dict[str, Any]) -> Tuple[str, List[Any]]:
+
+        # Conjunção SQL com placeholders e os valores a vincular. Valores por
+        # código ou por rótulo (ex.: 'SP', 'F', '60-74'); rótulos são
+        # traduzidos pela tabela de consulta da dimensão
+        from tools.consulta import compilar_condicoes
+        condicoes = []
+        for dimensao, valores in (filtros or {}).items():
+            if dimensao not in DIMENSOES_GRUPO:
+                raise ValueError(f"Dimensão não permitida: {dimensao}")
+
+            valores = valores if isinstance(valores, (list, tuple, set)) else [valores]
+            codigos = {rotulo: codigo for codigo, rotulo in self.dicionario_dimensao(dimensao).items()}
+            condicoes.append((dimensao, 'IN', [_valor_python(codigos.get(v, v)) for v in valores]))
+
+        if not condicoes:
+            return '', []
+        return compilar_condicoes(condicoes)
+
+    def agregar_casos(self, granularidade: str = 'dia', agrupar_por: List[str] = None,
+                      filtros: Dict[str, Any] = None, ultimos: int = None,
+                      data_inicio: str = None, data_fim: str = None,
+                      decodificar: bool = True) -> pd.DataFrame:
+
+        # Casos por período, opcionalmente por dimensão, em uma única consulta
+        # agrupada (sobre o cubo, quando existe) com a janela aplicada a
+        # DT_NOTIFIC, resolvida pelo índice. Janela absoluta (data_inicio,
+        # data_fim) ou relativa: os `ultimos` períodos até o último dia
+        # notificado (ou até data_fim). A série volta densa: todos os períodos
+        # da janela para cada combinação de grupos, com zero onde não há casos.
+        if granularidade not in GRANULARIDADES:
+            raise ValueError(f"Granularidade inválida: {granularidade} (use {', '.join(GRANULARIDADES)})")
+        if ultimos and data_inicio:
+            raise ValueError("Informe ultimos ou data_inicio, não ambos")
+
+        agrupar_por = list(agrupar_por or [])
+        for dimensao in [*agrupar_por, *(filtros or {})]:
+            if dimensao not in DIMENSOES_GRUPO:
+                raise ValueError(f"Dimensão não permitida: {dimensao}")
+
+        inicio = data_para_dia(data_inicio) if data_inicio else None
+        fim = data_para_dia(data_fim) if data_fim else None
+        if ultimos:
+            if fim is None:
+                fim = self.consulta().agregar(dia=('DT_NOTIFIC', 'maximo')).escalar()
+            if fim is not None:
+                inicio = _inicio_periodo(granularidade, _periodo_do_dia(granularidade, fim) - ultimos + 1)
+
+        consulta = self.consulta() \
+            .filtrar(**(filtros or {})) \
+            .janela(data_inicio=dia_para_data(inicio), data_fim=dia_para_data(fim), granularidade=granularidade) \
+            .agrupar(*agrupar_por, periodo=granularidade) \
+            .agregar(total_casos='contagem')
+        df = consulta.executar(decodificar=False).astype({'periodo': np.int64})
+
+        # Preenchimento com zeros: todos os períodos x combinações observadas
+        primeiro = _periodo_do_dia(granularidade, inicio) if inicio is not None else df['periodo'].min()
+        ultimo = _periodo_do_dia(granularidade, fim) if fim is not None else df['periodo'].max()
+        if pd.isna(primeiro) or pd.isna(ultimo):
+            periodos = np.array([], dtype=np.int64)
+        else:
+            periodos = np.arange(primeiro, ultimo + 1, dtype=np.int64)
+
+        grade = pd.DataFrame({'periodo': periodos})
+        if agrupar_por:
+            grade = grade.merge(df[agrupar_por].drop_duplicates(), how='cross')
+        chaves = ['periodo', *agrupar_por]
+        df = grade.merge(df, on=chaves, how='left')
+        df['total_casos'] = df['total_casos'].fillna(0).astype(np.int64)
+        df = df.sort_values(chaves, na_position='last').reset_index(drop=True)
+
+        return consulta.decodificar(df, dimensoes=decodificar)
 
     def obter_periodo_dados(self) -> Dict[str, str]:
 
-        query = """
-                SELECT MIN(DT_NOTIFIC) as data_inicio, \
-                       MAX(DT_NOTIFIC) as data_fim
-                FROM srag
-                WHERE DT_NOTIFIC IS NOT NULL \
+        # MIN e MAX em subconsultas separadas: cada uma é resolvida com uma
+        # única busca no índice de DT_NOTIFIC
+        tabela, _ = self.fonte_casos()
+        query = f"""
+                SELECT (SELECT {sql_dia_para_data('MIN(DT_NOTIFIC)')} FROM {tabela} WHERE DT_NOTIFIC IS NOT NULL) as data_inicio, \
+                       (SELECT {sql_dia_para_data('MAX(DT_NOTIFIC)')} FROM {tabela}) as data_fim \
                 """
-        df = self.executar_query(query)
+        linha = self.executar_linha(query)
 
         return {
-            'data_inicio': df['data_inicio'].iloc[0],
-            'data_fim': df['data_fim'].iloc[0]
+            'data_inicio': linha.data_inicio,
+            'data_fim': linha.data_fim
         }
 
     def casos_por_dia(self, dias: int = 30) -> pd.DataFrame:
 
-        query = f"""
-            SELECT 
-                DATE(DT_NOTIFIC) as data,
-                COUNT(*) as total_casos
-            FROM srag
-            WHERE DT_NOTIFIC IS NOT NULL
-              AND DT_NOTIFIC >= DATE('now', '-{dias} days')
-            GROUP BY DATE(DT_NOTIFIC)
-            ORDER BY data
-        """
-        return self.executar_query(query)
+        inicio = (date.today() - timedelta(days=dias)).isoformat()
+        df = self.agregar_casos('dia', data_inicio=inicio)
+        return df.rename(columns={'periodo': 'data'})
 
     def casos_por_mes(self, meses: int = 12) -> pd.DataFrame:
 
-        query = f"""
-            SELECT 
-                strftime('%Y-%m', DT_NOTIFIC) as ano_mes,
-                COUNT(*) as total_casos
-            FROM srag
-            WHERE DT_NOTIFIC IS NOT NULL
-              AND DT_NOTIFIC >= DATE('now', '-{meses} months')
-            GROUP BY strftime('%Y-%m', DT_NOTIFIC)
-            ORDER BY ano_mes
-        """
-        return self.executar_query(query)
+        inicio = (pd.Timestamp.today() - pd.DateOffset(months=meses)).strftime('%Y-%m-%d')
+        df = self.agregar_casos('mes', data_inicio=inicio)
+        return df.rename(columns={'periodo': 'ano_mes'})
 
     def obter_dados_obitos(self) -> pd.DataFrame:
 
-        query = """
-                SELECT COUNT(*)                                            as total_casos, \
-                       SUM(CASE WHEN EVOLUCAO IN (2, 3) THEN 1 ELSE 0 END) as total_obitos, \
-                       SUM(CASE WHEN EVOLUCAO = 2 THEN 1 ELSE 0 END)       as obitos_srag, \
-                       SUM(CASE WHEN EVOLUCAO = 3 THEN 1 ELSE 0 END)       as obitos_outras_causas
-                FROM srag
-                WHERE EVOLUCAO IS NOT NULL \
-                """
+        if self.usar_cubo:
+            query = """
+                    SELECT SUM(casos_com_evolucao)   as total_casos, \
+                           SUM(obitos)               as total_obitos, \
+                           SUM(obitos_srag)          as obitos_srag, \
+                           SUM(obitos_outras_causas) as obitos_outras_causas
+                    FROM srag_cubo \
+                    """
+        else:
+            query = """
+                    SELECT COUNT(*)                                            as total_casos, \
+                           SUM(CASE WHEN EVOLUCAO IN (2, 3) THEN 1 ELSE 0 END) as total_obitos, \
+                           SUM(CASE WHEN EVOLUCAO = 2 THEN 1 ELSE 0 END)       as obitos_srag, \
+                           SUM(CASE WHEN EVOLUCAO = 3 THEN 1 ELSE 0 END)       as obitos_outras_causas
+                    FROM srag
+                    WHERE EVOLUCAO IS NOT NULL \
+                    """
         return self.executar_query(query)
 
     def obter_dados_uti(self) -> pd.DataFrame:
 
-        query = """
-                SELECT COUNT(*)                                 as total_internacoes, \
-                       SUM(CASE WHEN UTI = 1 THEN 1 ELSE 0 END) as internacoes_uti, \
-                       SUM(CASE WHEN UTI = 2 THEN 1 ELSE 0 END) as nao_uti
-                FROM srag
-                WHERE HOSPITAL = 1 \
-                """
+        if self.usar_cubo:
+            query = """
+                    SELECT SUM(internacoes)         as total_internacoes, \
+                           SUM(internacoes_uti)     as internacoes_uti, \
+                           SUM(internacoes_nao_uti) as nao_uti
+                    FROM srag_cubo \
+                    """
+        else:
+            query = """
+                    SELECT COUNT(*)                                 as total_internacoes, \
+                           SUM(CASE WHEN UTI = 1 THEN 1 ELSE 0 END) as internacoes_uti, \
+                           SUM(CASE WHEN UTI = 2 THEN 1 ELSE 0 END) as nao_uti
+                    FROM srag
+                    WHERE HOSPITAL = 1 \
+                    """
         return self.executar_query(query)
 
     def obter_dados_vacinacao(self) -> pd.DataFrame:
 
-        query = """
-                SELECT COUNT(*)                                        as total_casos, \
-                       SUM(CASE WHEN VACINA_COV = 1 THEN 1 ELSE 0 END) as vacinados_covid, \
-                       SUM(CASE WHEN VACINA_COV = 2 THEN 1 ELSE 0 END) as nao_vacinados_covid, \
-                       SUM(CASE WHEN VACINA = 1 THEN 1 ELSE 0 END)     as vacinados_gripe, \
-                       SUM(CASE WHEN VACINA = 2 THEN 1 ELSE 0 END)     as nao_vacinados_gripe
-                FROM srag \
-                """
+        if self.usar_cubo:
+            query = """
+                    SELECT SUM(total_casos)         as total_casos, \
+                           SUM(vacinados_covid)     as vacinados_covid, \
+                           SUM(nao_vacinados_covid) as nao_vacinados_covid, \
+                           SUM(vacinados_gripe)     as vacinados_gripe, \
+                           SUM(nao_vacinados_gripe) as nao_vacinados_gripe
+                    FROM srag_cubo \
+                    """
+        else:
+            query = """
+                    SELECT COUNT(*)                                        as total_casos, \
+                           SUM(CASE WHEN VACINA_COV = 1 THEN 1 ELSE 0 END) as vacinados_covid, \
+                           SUM(CASE WHEN VACINA_COV = 2 THEN 1 ELSE 0 END) as nao_vacinados_covid, \
+                           SUM(CASE WHEN VACINA = 1 THEN 1 ELSE 0 END)     as vacinados_gripe, \
+                           SUM(CASE WHEN VACINA = 2 THEN 1 ELSE 0 END)     as nao_vacinados_gripe
+                    FROM srag \
+                    """
         return self.executar_query(query)
 
     def obter_aumento_casos(self, periodo_dias: int = 7) -> pd.DataFrame:
 
+        # A data de referência é calculada uma vez e o filtro por intervalo
+        # limita a leitura às duas janelas, via índice de DT_NOTIFIC
+        tabela, _ = self.fonte_casos()
+        casos = 't.total_casos' if self.usar_cubo else '1'
         query = f"""
             SELECT 
                 SUM(CASE 
-                    WHEN DATE(DT_NOTIFIC) >= DATE((SELECT MAX(DATE(DT_NOTIFIC)) FROM srag), '-{periodo_dias} days') 
-                    THEN 1 ELSE 0 
+                    WHEN t.DT_NOTIFIC >= ref.dia - ? 
+                    THEN {casos} ELSE 0 
                 END) as casos_periodo_atual,
                 SUM(CASE 
-                    WHEN DATE(DT_NOTIFIC) >= DATE((SELECT MAX(DATE(DT_NOTIFIC)) FROM srag), '-{periodo_dias * 2} days')
-                     AND DATE(DT_NOTIFIC) < DATE((SELECT MAX(DATE(DT_NOTIFIC)) FROM srag), '-{periodo_dias} days')
-                    THEN 1 ELSE 0 
+                    WHEN t.DT_NOTIFIC < ref.dia - ?
+                    THEN {casos} ELSE 0 
                 END) as casos_periodo_anterior,
-                (SELECT MAX(DATE(DT_NOTIFIC)) FROM srag) as data_referencia
-            FROM srag
-            WHERE DT_NOTIFIC IS NOT NULL
+                {sql_dia_para_data('MAX(ref.dia)')} as data_referencia
+            FROM (SELECT MAX(DT_NOTIFIC) as dia FROM {tabela}) as ref
+            JOIN {tabela} as t ON t.DT_NOTIFIC >= ref.dia - ?
         """
-        return self.executar_query(query)
+        return self.executar_query(query, parametros=(periodo_dias, periodo_dias, periodo_dias * 2))
 
     def obter_estatisticas_gerais(self) -> Dict[str, Any]:
 
-        query = """
-                SELECT COUNT(*)                  as total_registros, \
+        tabela, contagem = self.fonte_casos()
+        query = f"""
+                SELECT {contagem}                as total_registros, \
                        COUNT(DISTINCT SG_UF_NOT) as total_estados, \
-                       MIN(DT_NOTIFIC)           as primeira_notificacao, \
-                       MAX(DT_NOTIFIC)           as ultima_notificacao
-                FROM srag \
+                       {sql_dia_para_data('MIN(DT_NOTIFIC)')} as primeira_notificacao, \
+                       {sql_dia_para_data('MAX(DT_NOTIFIC)')} as ultima_notificacao
+                FROM {tabela} \
                 """
-        df = self.executar_query(query)
+        linha = self.executar_linha(query)
 
         return {
-            'total_registros': int(df['total_registros'].iloc[0]),
-            'total_estados': int(df['total_estados'].iloc[0]),
-            'primeira_notificacao': df['primeira_notificacao'].iloc[0],
-            'ultima_notificacao': df['ultima_notificacao'].iloc[0]
+            'total_registros': int(linha.total_registros or 0),
+            'total_estados': int(linha.total_estados),
+            'primeira_notificacao': linha.primeira_notificacao,
+            'ultima_notificacao': linha.ultima_notificacao
         }
 
 
-def criar_database_tool(db_path: str = "data/processed/srag.db") -> DatabaseTool:
+def criar_database_tool(db_path: str = None) -> DatabaseTool:
 
-    return DatabaseTool(db_path)
+    from tools.registro import obter_registro
+    return obter_registro(db_path).banco()
 
 if __name__ == "__main__":
 
@@ -0,0 +1,179 @@
+import threading
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tools.database_tool import DatabaseTool, data_para_dia, dia_para_data
+
+logger = logging.getLogger('indice_diario')
+
+
+class IndiceDiario:
+
+    # Contagem diária densa (um dia por posição, inclusive dias sem casos) com
+    # somas acumuladas: acumulado[i] = casos de dia_inicial até dia_inicial + i - 1.
+    # A soma de qualquer intervalo de dias vira a diferença de duas posições.
+    # Linha 0 é o total nacional; as demais, uma por UF.
+
+    def __init__(self, dia_inicial: Optional[int], diarios: np.ndarray, ufs: List[Any],
+                 siglas: Dict[str, Any] = None):
+
+        self.dia_inicial = dia_inicial
+        self.dia_final = None if dia_inicial is None else dia_inicial + diarios.shape[1] - 1
+        self.diarios = diarios
+        self.acumulado = np.zeros((diarios.shape[0], diarios.shape[1] + 1), dtype=np.int64)
+        np.cumsum(diarios, axis=1, out=self.acumulado[:, 1:])
+        self.linhas_uf = {uf: i + 1 for i, uf in enumerate(ufs)}
+        self.siglas = siglas or {}
+
+    @classmethod
+    def construir(cls, db: DatabaseTool) -> 'IndiceDiario':
+
+        # Uma única agregação por dia x UF; com o cubo, ela lê o cubo
+        tabela, contagem = db.fonte_casos()
+        df = db.executar_query(f"""
+            SELECT DT_NOTIFIC as dia, SG_UF_NOT as uf, {contagem} as casos
+            FROM {tabela}
+            WHERE DT_NOTIFIC IS NOT NULL
+            GROUP BY DT_NOTIFIC, SG_UF_NOT
+        """, usar_cache=False)
+
+        siglas = {}
+        if db._tabela_existe('dim_uf'):
+            dim = db.executar_query('SELECT codigo, sigla FROM dim_uf')
+            siglas = dict(zip(dim['sigla'], dim['codigo']))
+
+        if df.empty:
+            return cls(None, np.zeros((1, 0), dtype=np.int64), [], siglas)
+
+        dias = df['dia'].to_numpy(dtype=np.int64)
+        dia_inicial = int(dias.min())
+        posicoes = dias - dia_inicial
+        casos = df['casos'].fillna(0).to_numpy(dtype=np.int64)
+
+        ufs = sorted(df['uf'].dropna().unique().tolist())
+        linhas = df['uf'].map({uf: i + 1 for i, uf in enumerate(ufs)}).fillna(-1).to_numpy(dtype=np.int64)
+
+        diarios = np.zeros((len(ufs) + 1, int(posicoes.max()) + 1), dtype=np.int64)
+        np.add.at(diarios[0], posicoes, casos)
+        por_uf = linhas > 0
+        np.add.at(diarios, (linhas[por_uf], posicoes[por_uf]), casos[por_uf])
+
+        logger.info(f"Índice diário construído: {diarios.shape[1]} dias, {len(ufs)} UFs")
+        return cls(dia_inicial, diarios, ufs, siglas)
+
+    def _linha(self, uf: Any = None) -> Optional[int]:
+
+        if uf is None:
+            return 0
+        uf = self.siglas.get(uf, uf)
+        return self.linhas_uf.get(uf)
+
+    def _posicao(self, dia):
+
+        # Posição no acumulado do fim do dia (inclusive), limitada ao intervalo
+        return np.clip(np.asarray(dia) - self.dia_inicial + 1, 0, self.acumulado.shape[1] - 1)
+
+    def soma(self, inicio, fim, uf: Any = None):
+
+        # Casos entre os dias inicio e fim (inclusive); aceita escalares ou arrays
+        linha = self._linha(uf)
+        if self.dia_inicial is None or linha is None:
+            return np.zeros(np.broadcast(np.asarray(inicio), np.asarray(fim)).shape, dtype=np.int64)[()]
+
+        acumulado = self.acumulado[linha]
+        total = acumulado[self._posicao(fim)] - acumulado[self._posicao(np.asarray(inicio) - 1)]
+        return np.where(np.asarray(fim) >= np.asarray(inicio), total, 0)[()]
+
+    def aumento_casos(self, periodo_dias: int = 7, data_referencia: str = None, uf: Any = None) -> Dict[str, Any]:
+
+        # Mesmas janelas de DatabaseTool.obter_aumento_casos: atual cobre
+        # [ref - N, ref] e anterior [ref - 2N, ref - N)
+        referencia = self.dia_final if data_referencia is None else data_para_dia(data_referencia)
+        if referencia is None:
+            return {'casos_periodo_atual': 0, 'casos_periodo_anterior': 0, 'data_referencia': None}
+
+        return {
+            'casos_periodo_atual': int(self.soma(referencia - periodo_dias, referencia, uf)),
+            'casos_periodo_anterior': int(self.soma(referencia - 2 * periodo_dias, referencia - periodo_dias - 1, uf)),
+            'data_referencia': dia_para_data(referencia),
+        }
+
+    def serie_diaria(self, dias: int = None, uf: Any = None, incluir_zeros: bool = True) -> pd.DataFrame:
+
+        # Casos por dia a partir de MAX(DT_NOTIFIC) - dias (todo o período se dias=None)
+        linha = self._linha(uf)
+        if self.dia_inicial is None or linha is None:
+            return pd.DataFrame({'data': pd.Series(dtype=object), 'total_casos': pd.Series(dtype=np.int64)})
+
+        inicio = 0 if dias is None else max(self.dia_final - dias - self.dia_inicial, 0)
+        valores = self.diarios[linha, inicio:]
+        df = pd.DataFrame({
+            'dia': np.arange(self.dia_inicial + inicio, self.dia_final + 1),
+            'total_casos': valores,
+        })
+        if not incluir_zeros:
+            df = df[df['total_casos'] > 0]
+
+        df.insert(0, 'data', [dia_para_data(d) for d in df.pop('dia')])
+        return df.reset_index(drop=True)
+
+    def media_movel(self, janela: int = 7, uf: Any = None) -> pd.DataFrame:
+
+        # Média dos casos nos `janela` dias terminados em cada dia do período
+        df = self.serie_diaria(uf=uf)
+        if df.empty:
+            return df.assign(media_movel=pd.Series(dtype=float))
+
+        dias = np.arange(self.dia_inicial, self.dia_final + 1)
+        inicio = np.maximum(dias - janela + 1, self.dia_inicial)
+        df['media_movel'] = self.soma(inicio, dias, uf) / (dias - inicio + 1)
+        return df
+
+    def serie_aumento(self, periodo_dias: int = 7, uf: Any = None) -> pd.DataFrame:
+
+        # Taxa de aumento tendo cada dia do período como data de referência
+        if self.dia_inicial is None:
+            return pd.DataFrame(columns=['data_referencia', 'casos_periodo_atual',
+                                         'casos_periodo_anterior', 'taxa_aumento'])
+
+        referencias = np.arange(self.dia_inicial, self.dia_final + 1)
+        atual = self.soma(referencias - periodo_dias, referencias, uf)
+        anterior = self.soma(referencias - 2 * periodo_dias, referencias - periodo_dias - 1, uf)
+
+        # Evitar divisão por zero (mesma regra da métrica de aumento)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            taxa = np.where(anterior > 0, (atual - anterior) / np.maximum(anterior, 1) * 100,
+                            np.where(atual > 0, 100.0, 0.0))
+
+        return pd.DataFrame({
+            'data_referencia': [dia_para_data(d) for d in referencias],
+            'casos_periodo_atual': atual,
+            'casos_periodo_anterior': anterior,
+            'taxa_aumento': np.round(taxa, 2),
+        })
+
+
+_indices: Dict[str, Tuple[tuple, IndiceDiario]] = {}
+_indices_lock = threading.Lock()
+
+
+def obter_indice_diario(db: DatabaseTool) -> IndiceDiario:
+
+    # Um índice por banco, reconstruído quando o arquivo muda (mesma versão
+    # usada pelo cache de consultas)
+    versao = db.pool.versao()
+    with _indices_lock:
+        guardado = _indices.get(db.db_path)
+        if guardado and guardado[0] == versao:
+            return guardado[1]
+
+    indice = IndiceDiario.construir(db)
+    with _indices_lock:
+        _indices[db.db_path] = (versao, indice)
+    return indice
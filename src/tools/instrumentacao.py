@@ -0,0 +1,159 @@
+import os
+import json
+import time
+import bisect
+import functools
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+import pandas as pd
+
+# Limites superiores (ms) dos baldes dos histogramas, em escala aproximadamente
+# logarítmica; o último balde recebe tudo acima de 60s
+LIMITES_MS = [0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000]
+
+
+class Histograma:
+
+    # Histograma de latências com baldes fixos: memória constante por etapa,
+    # independente do número de chamadas. Os percentis são estimados pelo
+    # limite superior do balde (no último, pelo máximo observado).
+
+    def __init__(self):
+
+        self.baldes = [0] * (len(LIMITES_MS) + 1)
+        self.chamadas = 0
+        self.total_ms = 0.0
+        self.min_ms = None
+        self.max_ms = None
+        self.contadores: Dict[str, float] = {}
+
+    def adicionar(self, ms: float, **atributos):
+
+        self.baldes[bisect.bisect_left(LIMITES_MS, ms)] += 1
+        self.chamadas += 1
+        self.total_ms += ms
+        self.min_ms = ms if self.min_ms is None else min(self.min_ms, ms)
+        self.max_ms = ms if self.max_ms is None else max(self.max_ms, ms)
+
+        # Atributos numéricos são somados (ex.: linhas) e booleanos contados
+        # (ex.: cache=True vira o número de acertos)
+        for nome, valor in atributos.items():
+            if isinstance(valor, (bool, int, float)):
+                self.contadores[nome] = self.contadores.get(nome, 0) + valor
+
+    def percentil(self, p: float) -> Optional[float]:
+
+        if not self.chamadas:
+            return None
+
+        alvo = p / 100 * self.chamadas
+        acumulado = 0
+        for i, quantidade in enumerate(self.baldes):
+            acumulado += quantidade
+            if acumulado >= alvo:
+                return min(LIMITES_MS[i], self.max_ms) if i < len(LIMITES_MS) else self.max_ms
+        return self.max_ms
+
+    def resumo(self) -> Dict[str, Any]:
+
+        return {
+            'chamadas': self.chamadas,
+            'total_ms': round(self.total_ms, 3),
+            'media_ms': round(self.total_ms / self.chamadas, 3) if self.chamadas else None,
+            'min_ms': round(self.min_ms, 3) if self.min_ms is not None else None,
+            **{f'p{p}_ms': round(self.percentil(p), 3) if self.chamadas else None for p in (50, 95, 99)},
+            'max_ms': round(self.max_ms, 3) if self.max_ms is not None else None,
+            **{nome: round(valor, 3) for nome, valor in self.contadores.items()},
+            'baldes': dict(zip([*map(str, LIMITES_MS), 'inf'], self.baldes)),
+        }
+
+
+class Instrumentacao:
+
+    # Histogramas de latência por etapa (ex.: 'database.executar_query',
+    # 'metricas.calcular_metricas'), agregados no processo
+
+    def __init__(self):
+
+        self._histogramas: Dict[str, Histograma] = {}
+        self._lock = threading.Lock()
+        self.inicio = datetime.now().isoformat(timespec='seconds')
+
+    def registrar(self, etapa: str, segundos: float, **atributos):
+
+        with self._lock:
+            histograma = self._histogramas.get(etapa)
+            if histograma is None:
+                histograma = self._histogramas[etapa] = Histograma()
+            histograma.adicionar(segundos * 1000, **atributos)
+
+    @contextmanager
+    def medir(self, etapa: str, **atributos):
+
+        # Os atributos podem ser completados dentro do bloco:
+        #   with medir('etapa') as atributos: atributos['linhas'] = n
+        inicio = time.perf_counter()
+        try:
+            yield atributos
+        except BaseException:
+            atributos['erros'] = True
+            raise
+        finally:
+            self.registrar(etapa, time.perf_counter() - inicio, **atributos)
+
+    def estatisticas(self) -> Dict[str, Dict[str, Any]]:
+
+        with self._lock:
+            return {etapa: h.resumo() for etapa, h in sorted(self._histogramas.items())}
+
+    def tabela(self) -> pd.DataFrame:
+
+        colunas = ['etapa', 'chamadas', 'total_ms', 'media_ms', 'p50_ms', 'p95_ms', 'max_ms']
+        linhas = [{'etapa': etapa, **resumo} for etapa, resumo in self.estatisticas().items()]
+        return pd.DataFrame(linhas, columns=colunas)
+
+    def salvar_json(self, caminho: str) -> str:
+
+        os.makedirs(os.path.dirname(caminho) or '.', exist_ok=True)
+        with open(caminho, 'w', encoding='utf-8') as f:
+            json.dump({
+                'inicio': self.inicio,
+                'fim': datetime.now().isoformat(timespec='seconds'),
+                'etapas': self.estatisticas(),
+            }, f, indent=2, ensure_ascii=False)
+        return caminho
+
+    def limpar(self):
+
+        with self._lock:
+            self._histogramas.clear()
+            self.inicio = datetime.now().isoformat(timespec='seconds')
+
+
+_instrumentacao = Instrumentacao()
+
+
+def obter_instrumentacao() -> Instrumentacao:
+
+    return _instrumentacao
+
+
+def medir(etapa: str, **atributos):
+
+    return _instrumentacao.medir(etapa, **atributos)
+
+
+def cronometrado(etapa: str) -> Callable:
+
+    def decorador(funcao: Callable) -> Callable:
+        @functools.wraps(funcao)
+        def envoltorio(*args, **kwargs):
+            with _instrumentacao.medir(etapa):
+                return funcao(*args, **kwargs)
+
+        return envoltorio
+
+    return decorador
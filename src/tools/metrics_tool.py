@@ -1,12 +1,21 @@
+import math
 import logging
-from typing import Dict, Any, Optional
+import numpy as np
+import pandas as pd
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
 from dataclasses import dataclass
 import sys
 import os
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from tools.database_tool import DatabaseTool
+from tools.auditoria import registrar_evento
+from tools.instrumentacao import cronometrado
+from tools.registro import memorizado, obter_registro
+from tools.amostragem import estimar_razao, estimar_total
+from tools.database_tool import DIMENSOES_GRUPO
+from tools.consulta import compilar_condicoes, normalizar_condicoes
+from tools.indice_diario import data_para_dia, dia_para_data, obter_indice_diario
 
 logging.basicConfig(
     level=logging.INFO,
@@ -42,211 +51,531 @@ class MetricaResultado:
         return f"{self.nome}: {self.valor:.2f} {self.unidade}"
 
 
-class MetricsTool:
+@dataclass(frozen=True)
+class Contador:
 
-    def __init__(self, db_path: str = "data/processed/srag.db"):
+    # condicao: predicado sobre as linhas da tabela srag, como em
+    # Consulta.filtrar/onde (vazio: todas as linhas)
+    # medida_cubo: expressão equivalente sobre as medidas do srag_cubo
+    condicao: Any = ()
+    medida_cubo: Optional[str] = None
 
-        self.db = DatabaseTool(db_path)
-        logger.info("MetricsTool inicializado")
+    def __post_init__(self):
 
-    def _registrar_calculo(self, metrica: str, resultado: Dict[str, Any]):
-        registro = {
-            'timestamp': datetime.now().isoformat(),
-            'metrica': metrica,
-            'resultado': resultado
-        }
-        logger.info(f"AUDITORIA MÉTRICA: {registro}")
-
-    def calcular_taxa_aumento_casos(self, periodo_dias: int = 7) -> MetricaResultado:
+        object.__setattr__(self, 'condicao', normalizar_condicoes(self.condicao))
 
-        logger.info(f"Calculando taxa de aumento de casos (período: {periodo_dias} dias)")
 
-        df = self.db.obter_aumento_casos(periodo_dias)
+@dataclass(frozen=True)
+class DefinicaoMetrica:
 
-        casos_atual = int(df['casos_periodo_atual'].iloc[0] or 0)
-        casos_anterior = int(df['casos_periodo_anterior'].iloc[0] or 0)
-        data_referencia = df['data_referencia'].iloc[0] if 'data_referencia' in df.columns else 'N/A'
+    # tipo 'proporcao': numerador / denominador * 100
+    # tipo 'variacao': (numerador - denominador) / denominador * 100
+    # faixas: (limite inferior, rótulo), da maior para a menor; o primeiro
+    # limite atingido pelo valor define a faixa usada na descrição
+    # base: nas séries temporais, contador cujas janelas atual e anterior
+    # formam o numerador e o denominador de uma variação
+    nome: str
+    numerador: str
+    denominador: str
+    faixas: Tuple[Tuple[float, str], ...]
+    descricao: str
+    dados_brutos: Dict[str, str]
+    tipo: str = 'proporcao'
+    unidade: str = '%'
+    base: Optional[str] = None
+
+
+CONTADORES = {
+    'total_casos': Contador(medida_cubo='total_casos'),
+    'casos_com_evolucao': Contador([('EVOLUCAO', 'IS NOT NULL')], 'casos_com_evolucao'),
+    'obitos': Contador({'EVOLUCAO': [2, 3]}, 'obitos'),
+    'obitos_srag': Contador({'EVOLUCAO': 2}, 'obitos_srag'),
+    'obitos_outras_causas': Contador({'EVOLUCAO': 3}, 'obitos_outras_causas'),
+    'internacoes': Contador({'HOSPITAL': 1}, 'internacoes'),
+    'internacoes_uti': Contador({'HOSPITAL': 1, 'UTI': 1}, 'internacoes_uti'),
+    'internacoes_nao_uti': Contador({'HOSPITAL': 1, 'UTI': 2}, 'internacoes_nao_uti'),
+    'vacinados_covid': Contador({'VACINA_COV': 1}, 'vacinados_covid'),
+    'nao_vacinados_covid': Contador({'VACINA_COV': 2}, 'nao_vacinados_covid'),
+    'vacina_covid_informada': Contador({'VACINA_COV': [1, 2]}, 'vacinados_covid + nao_vacinados_covid'),
+    'vacinados_gripe': Contador({'VACINA': 1}, 'vacinados_gripe'),
+}
+
+# Contadores de janela móvel: vêm do índice diário de somas acumuladas, sem
+# consulta por tamanho de janela
+CONTADORES_INDICE = ['casos_periodo_atual', 'casos_periodo_anterior', 'data_referencia']
+
+# Janelas das variações em consultas agrupadas, relativas ao dia de
+# referência ref.dia (mesmas do índice diário). Cada placeholder recebe
+# periodo_dias.
+JANELAS_VARIACAO = {
+    'atual': 'DT_NOTIFIC >= ref.dia - ?',
+    'anterior': 'DT_NOTIFIC >= ref.dia - 2 * ? AND DT_NOTIFIC < ref.dia - ?',
+}
+
+METRICAS = {
+    'taxa_aumento_casos': DefinicaoMetrica(
+        nome="Taxa de Aumento de Casos",
+        tipo='variacao',
+        numerador='casos_periodo_atual',
+        denominador='casos_periodo_anterior',
+        base='total_casos',
+        faixas=(
+            (math.nextafter(0.0, 1.0), "Aumento de {valor_abs:.1f}% nos casos em relação ao período anterior"),
+            (0.0, "Casos estáveis em relação ao período anterior"),
+            (-math.inf, "Redução de {valor_abs:.1f}% nos casos em relação ao período anterior"),
+        ),
+        descricao="{faixa} (ref: {data_referencia})",
+        dados_brutos={
+            'casos_periodo_atual': 'casos_periodo_atual',
+            'casos_periodo_anterior': 'casos_periodo_anterior',
+            'periodo_dias': 'periodo_dias',
+            'data_referencia': 'data_referencia',
+        },
+    ),
+    'taxa_mortalidade': DefinicaoMetrica(
+        nome="Taxa de Mortalidade",
+        numerador='obitos',
+        denominador='casos_com_evolucao',
+        faixas=((10, "muito alta"), (5, "alta"), (2, "moderada"), (-math.inf, "baixa")),
+        descricao="Taxa de mortalidade {faixa}: {valor:.2f}% dos casos evoluíram para óbito",
+        dados_brutos={
+            'total_casos': 'casos_com_evolucao',
+            'total_obitos': 'obitos',
+            'obitos_srag': 'obitos_srag',
+            'obitos_outras_causas': 'obitos_outras_causas',
+        },
+    ),
+    'taxa_ocupacao_uti': DefinicaoMetrica(
+        nome="Taxa de Ocupação de UTI",
+        numerador='internacoes_uti',
+        denominador='internacoes',
+        faixas=((30, "crítica"), (20, "alta"), (10, "moderada"), (-math.inf, "baixa")),
+        descricao="Pressão {faixa} sobre UTIs: {valor:.2f}% dos internados necessitaram de UTI",
+        dados_brutos={
+            'total_internacoes': 'internacoes',
+            'internacoes_uti': 'internacoes_uti',
+            'internacoes_nao_uti': 'internacoes_nao_uti',
+        },
+    ),
+    'taxa_vacinacao': DefinicaoMetrica(
+        nome="Taxa de Vacinação (COVID)",
+        numerador='vacinados_covid',
+        denominador='vacina_covid_informada',
+        faixas=((70, "boa"), (50, "moderada"), (-math.inf, "baixa")),
+        descricao="Cobertura vacinal {faixa}: {valor:.2f}% dos casos com informação estavam vacinados contra COVID",
+        dados_brutos={
+            'total_casos': 'total_casos',
+            'vacinados_covid': 'vacinados_covid',
+            'nao_vacinados_covid': 'nao_vacinados_covid',
+            'vacinados_gripe': 'vacinados_gripe',
+            'total_com_info_vacina': 'vacina_covid_informada',
+        },
+    ),
+}
 
-        # Evitar divisão por zero
-        if casos_anterior == 0:
-            taxa = 0.0 if casos_atual == 0 else 100.0
-        else:
-            taxa = ((casos_atual - casos_anterior) / casos_anterior) * 100
-
-        dados_brutos = {
-            'casos_periodo_atual': casos_atual,
-            'casos_periodo_anterior': casos_anterior,
-            'periodo_dias': periodo_dias,
-            'data_referencia': data_referencia
-        }
 
-        # Descrição contextualizada
-        if taxa > 0:
-            descricao = f"Aumento de {taxa:.1f}% nos casos em relação ao período anterior (ref: {data_referencia})"
-        elif taxa < 0:
-            descricao = f"Redução de {abs(taxa):.1f}% nos casos em relação ao período anterior (ref: {data_referencia})"
-        else:
-            descricao = f"Casos estáveis em relação ao período anterior (ref: {data_referencia})"
-
-        resultado = MetricaResultado(
-            nome="Taxa de Aumento de Casos",
-            valor=round(taxa, 2),
-            unidade="%",
-            descricao=descricao,
-            dados_brutos=dados_brutos,
-            data_calculo=datetime.now().isoformat()
-        )
+class MetricsTool:
 
-        self._registrar_calculo("taxa_aumento_casos", resultado.to_dict())
-        return resultado
+    def __init__(self, db_path: str = None):
 
-    def calcular_taxa_mortalidade(self) -> MetricaResultado:
+        self.db = obter_registro(db_path).banco()
+        logger.info("MetricsTool inicializado")
 
-        logger.info("Calculando taxa de mortalidade")
+    def _registrar_calculo(self, metrica: str, resultado: 'MetricaResultado'):
+
+        # O resultado vai como objeto; o to_dict() é feito na gravação
+        registrar_evento('metricas', 'calculo', metrica=metrica, resultado=resultado)
+
+    def _sql_contadores(self, contadores: List[str], agrupar_por: List[str] = None,
+                        filtros: List[Tuple[str, List[Any]]] = None,
+                        janelas: Dict[str, Tuple[str, str, List[Any]]] = None,
+                        filtros_referencia: List[Tuple[str, List[Any]]] = None) -> Tuple[str, List[Any]]:
+
+        # Todos os contadores em uma única passada pela tabela. O cubo é usado
+        # quando existe e todos os contadores têm medida equivalente nele.
+        # janelas: nome -> (contador, predicado sobre DT_NOTIFIC relativo ao dia
+        # de referência ref.dia, o MAX(DT_NOTIFIC) sob filtros_referencia, e
+        # os valores dos placeholders do predicado)
+        # Filtros são pares (SQL com placeholders, valores); devolve a query e
+        # os parâmetros na ordem dos placeholders.
+        janelas = janelas or {}
+        filtros = filtros or []
+        filtros_referencia = filtros_referencia or []
+        parametros = []
+        bases = [*contadores, *(base for base, _, _ in janelas.values())]
+        usar_cubo = self.db.usar_cubo and all(CONTADORES[c].medida_cubo for c in bases)
+        tabela = 'srag_cubo' if usar_cubo else 'srag'
+
+        expressoes = list(agrupar_por or [])
+        for nome in contadores:
+            contador = CONTADORES[nome]
+            if usar_cubo:
+                expressoes.append(f"SUM({contador.medida_cubo}) as {nome}")
+            else:
+                condicao, valores = compilar_condicoes(contador.condicao)
+                expressoes.append(f"SUM(CASE WHEN {condicao} THEN 1 ELSE 0 END) as {nome}")
+                parametros.extend(valores)
+
+        for nome, (base, janela, valores_janela) in janelas.items():
+            contador = CONTADORES[base]
+            if usar_cubo:
+                expressoes.append(f"SUM(CASE WHEN {janela} THEN {contador.medida_cubo} ELSE 0 END) as {nome}")
+            else:
+                condicao, valores = compilar_condicoes(contador.condicao)
+                expressoes.append(f"SUM(CASE WHEN ({condicao}) AND {janela} THEN 1 ELSE 0 END) as {nome}")
+                parametros.extend(valores)
+            parametros.extend(valores_janela)
+
+        origem = tabela
+        if janelas:
+            onde_referencia = f"WHERE {' AND '.join(sql for sql, _ in filtros_referencia)}" if filtros_referencia else ''
+            parametros.extend(valor for _, valores in filtros_referencia for valor in valores)
+            origem = f"(SELECT MAX(DT_NOTIFIC) as dia FROM {tabela} {onde_referencia}) as ref, {tabela}"
+
+        colunas = ',\n                '.join(expressoes)
+        onde = f"WHERE {' AND '.join(sql for sql, _ in filtros)}" if filtros else ''
+        parametros.extend(valor for _, valores in filtros for valor in valores)
+        agrupamento = f"GROUP BY {', '.join(agrupar_por)}" if agrupar_por else ''
+        return f"""
+            SELECT 
+                {colunas}
+            FROM {origem}
+            {onde}
+            {agrupamento}
+        """, parametros
+
+    @staticmethod
+    def _calcular_valor(definicao: DefinicaoMetrica, numerador: int, denominador: int) -> float:
 
-        df = self.db.obter_dados_obitos()
+        # Evitar divisão por zero
+        if definicao.tipo == 'variacao':
+            if denominador == 0:
+                return 0.0 if numerador == 0 else 100.0
+            return ((numerador - denominador) / denominador) * 100
+
+        if denominador == 0:
+            return 0.0
+        return (numerador / denominador) * 100
+
+    def _estimar_contadores(self, metricas: List[str], contadores: List[str],
+                            contexto: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+
+        # Contadores estimados pela amostra estratificada (totais arredondados
+        # no contexto) e, para cada proporção, a razão com erro padrão
+        condicoes = {nome: CONTADORES[nome].condicao for nome in contadores}
+        proporcoes = [
+            chave for chave in metricas
+            if METRICAS[chave].tipo == 'proporcao' and METRICAS[chave].numerador in CONTADORES
+        ]
+        for chave in proporcoes:
+            definicao = METRICAS[chave]
+            condicoes[f'{chave}_conjunto'] = \
+                CONTADORES[definicao.numerador].condicao + CONTADORES[definicao.denominador].condicao
+
+        estratos = self.db.contagens_por_estrato(condicoes)
+        for nome in contadores:
+            contexto[nome] = int(round(estimar_total(estratos, nome)['estimativa']))
 
-        total_casos = int(df['total_casos'].iloc[0] or 0)
-        total_obitos = int(df['total_obitos'].iloc[0] or 0)
-        obitos_srag = int(df['obitos_srag'].iloc[0] or 0)
-        obitos_outras = int(df['obitos_outras_causas'].iloc[0] or 0)
+        return {
+            chave: estimar_razao(estratos, f'{chave}_conjunto', METRICAS[chave].denominador, escala=100)
+            for chave in proporcoes
+        }
 
-        if total_casos == 0:
-            taxa = 0.0
-        else:
-            taxa = (total_obitos / total_casos) * 100
+    @cronometrado('metricas.calcular_metricas')
+    def calcular_metricas(self, metricas: List[str] = None, periodo_dias: int = 7,
+                          aproximado: bool = False) -> Dict[str, MetricaResultado]:
+
+        # Auditoria e data do cálculo ficam fora da memorização: toda chamada,
+        # servida ou não pela memória, registra seus eventos
+        resultados = self._calcular_metricas(metricas, periodo_dias, aproximado)
+        data_calculo = datetime.now().isoformat()
+        for chave, resultado in resultados.items():
+            resultado.data_calculo = data_calculo
+            self._registrar_calculo(chave, resultado)
+
+        return resultados
+
+    @memorizado
+    def _calcular_metricas(self, metricas: List[str], periodo_dias: int,
+                           aproximado: bool) -> Dict[str, MetricaResultado]:
+
+        # aproximado=True: as proporções saem da amostra estratificada, com
+        # intervalo de 95% nos dados brutos; a variação de casos continua exata
+        # (índice diário). Sem amostra no banco, o cálculo é exato.
+        metricas = metricas or list(METRICAS)
+        aproximado = aproximado and self.db.usar_amostra
+        logger.info(f"Calculando métricas em uma passada{' (amostra)' if aproximado else ''}: {metricas}")
+
+        contadores = []
+        for chave in metricas:
+            definicao = METRICAS[chave]
+            for nome in [definicao.numerador, definicao.denominador, *definicao.dados_brutos.values()]:
+                if nome not in contadores:
+                    contadores.append(nome)
+
+        contexto = {'periodo_dias': periodo_dias}
+        if any(nome in CONTADORES_INDICE for nome in contadores):
+            contexto.update(obter_indice_diario(self.db).aumento_casos(periodo_dias))
+
+        contadores = [nome for nome in contadores if nome in CONTADORES]
+        estimativas = {}
+        if contadores and aproximado:
+            estimativas = self._estimar_contadores(metricas, contadores, contexto)
+        elif contadores:
+            query, parametros = self._sql_contadores(contadores)
+            linha = self.db.executar_linha(query, parametros=parametros)
+            contexto.update({nome: int(getattr(linha, nome) or 0) for nome in contadores})
+
+        resultados = {}
+        for chave in metricas:
+            definicao = METRICAS[chave]
+            estimativa = estimativas.get(chave)
+            if estimativa:
+                valor = estimativa['estimativa']
+            else:
+                valor = self._calcular_valor(definicao, contexto[definicao.numerador], contexto[definicao.denominador])
+
+            campos = {'valor': valor, 'valor_abs': abs(valor), 'data_referencia': contexto.get('data_referencia')}
+            rotulo = next(rotulo for limite, rotulo in definicao.faixas if valor >= limite)
+            descricao = definicao.descricao.format(faixa=rotulo.format(**campos), **campos)
+            dados_brutos = {chave_bruta: contexto[nome] for chave_bruta, nome in definicao.dados_brutos.items()}
+
+            if estimativa:
+                inferior, superior = estimativa['ic95']
+                descricao += f" (estimativa por amostra; IC 95%: {inferior:.2f}% a {superior:.2f}%)"
+                dados_brutos.update({
+                    'aproximado': True,
+                    'erro_padrao': round(estimativa['erro_padrao'], 4),
+                    'ic95': [round(inferior, 2), round(superior, 2)],
+                    'registros_amostra': estimativa['amostra'],
+                })
+
+            resultado = MetricaResultado(
+                nome=definicao.nome,
+                valor=round(valor, 2),
+                unidade=definicao.unidade,
+                descricao=descricao,
+                dados_brutos=dados_brutos,
+                data_calculo=datetime.now().isoformat()
+            )
+            resultados[chave] = resultado
+
+        return resultados
+
+    @cronometrado('metricas.calcular_taxa_aumento_casos')
+    def calcular_taxa_aumento_casos(self, periodo_dias: int = 7) -> MetricaResultado:
 
-        dados_brutos = {
-            'total_casos': total_casos,
-            'total_obitos': total_obitos,
-            'obitos_srag': obitos_srag,
-            'obitos_outras_causas': obitos_outras
-        }
+        logger.info(f"Calculando taxa de aumento de casos (período: {periodo_dias} dias)")
+        return self.calcular_metricas(['taxa_aumento_casos'], periodo_dias)['taxa_aumento_casos']
 
-        if taxa >= 10:
-            severidade = "muito alta"
-        elif taxa >= 5:
-            severidade = "alta"
-        elif taxa >= 2:
-            severidade = "moderada"
-        else:
-            severidade = "baixa"
-
-        descricao = f"Taxa de mortalidade {severidade}: {taxa:.2f}% dos casos evoluíram para óbito"
-
-        resultado = MetricaResultado(
-            nome="Taxa de Mortalidade",
-            valor=round(taxa, 2),
-            unidade="%",
-            descricao=descricao,
-            dados_brutos=dados_brutos,
-            data_calculo=datetime.now().isoformat()
-        )
+    @cronometrado('metricas.calcular_taxa_mortalidade')
+    def calcular_taxa_mortalidade(self) -> MetricaResultado:
 
-        self._registrar_calculo("taxa_mortalidade", resultado.to_dict())
-        return resultado
+        logger.info("Calculando taxa de mortalidade")
+        return self.calcular_metricas(['taxa_mortalidade'])['taxa_mortalidade']
 
+    @cronometrado('metricas.calcular_taxa_ocupacao_uti')
     def calcular_taxa_ocupacao_uti(self) -> MetricaResultado:
 
         logger.info("Calculando taxa de ocupação de UTI")
+        return self.calcular_metricas(['taxa_ocupacao_uti'])['taxa_ocupacao_uti']
 
-        df = self.db.obter_dados_uti()
+    @cronometrado('metricas.calcular_taxa_vacinacao')
+    def calcular_taxa_vacinacao(self) -> MetricaResultado:
 
-        total_internacoes = int(df['total_internacoes'].iloc[0] or 0)
-        internacoes_uti = int(df['internacoes_uti'].iloc[0] or 0)
+        logger.info("Calculando taxa de vacinação")
+        return self.calcular_metricas(['taxa_vacinacao'])['taxa_vacinacao']
+
+    @staticmethod
+    def _calcular_valores(definicao: DefinicaoMetrica, numerador: np.ndarray, denominador: np.ndarray) -> np.ndarray:
+
+        # Versão vetorizada de _calcular_valor, com as mesmas regras para
+        # denominador zero
+        numerador = numerador.astype(float)
+        denominador = denominador.astype(float)
+        divisor = np.where(denominador == 0, 1.0, denominador)
+
+        if definicao.tipo == 'variacao':
+            valores = (numerador - denominador) / divisor * 100
+            return np.where(denominador == 0, np.where(numerador == 0, 0.0, 100.0), valores)
+
+        return np.where(denominador == 0, 0.0, numerador / divisor * 100)
+
+    @cronometrado('metricas.calcular_series')
+    @memorizado
+    def calcular_series(self, metricas: List[str] = None, frequencia: str = 'D',
+                        janela: int = 1, periodo_dias: int = 7) -> pd.DataFrame:
+
+        # Séries das métricas em todo o histórico: uma consulta agrupada por dia
+        # e janelas por somas acumuladas, sem consultar cada data.
+        # frequencia 'D' (diária) ou 'W' (semana epidemiológica, domingo a sábado).
+        # Proporções usam a soma do numerador e do denominador nos últimos
+        # `janela` períodos. A variação diária usa as janelas de periodo_dias da
+        # métrica escalar (o último ponto coincide com ela); a semanal compara as
+        # últimas `janela` semanas com as `janela` anteriores.
+        if frequencia not in ('D', 'W'):
+            raise ValueError(f"Frequência inválida: {frequencia} (use 'D' ou 'W')")
+
+        metricas = metricas or list(METRICAS)
+        logger.info(f"Calculando séries ({frequencia}, janela {janela}): {metricas}")
+
+        contadores = []
+        for chave in metricas:
+            definicao = METRICAS[chave]
+            nomes = [definicao.base] if definicao.base else [definicao.numerador, definicao.denominador]
+            contadores.extend(n for n in nomes if n not in contadores)
+
+        query, parametros = self._sql_contadores(
+            contadores, agrupar_por=['DT_NOTIFIC'], filtros=[('DT_NOTIFIC IS NOT NULL', [])]
+        )
+        df = self.db.executar_query(query, usar_cache=False, parametros=parametros)
+        if df.empty:
+            return pd.DataFrame(columns=['data', *contadores, *metricas])
+
+        # Contagens densas: uma posição por dia (ou semana), inclusive sem casos
+        # 1970-01-01 foi quinta-feira: a semana p começa no domingo 7p - 4
+        dias_periodo, deslocamento = (7, 4) if frequencia == 'W' else (1, 0)
+        periodos = (df['DT_NOTIFIC'].to_numpy(dtype=np.int64) + deslocamento) // dias_periodo
+
+        primeiro = int(periodos.min())
+        posicoes = periodos - primeiro
+        n_periodos = int(posicoes.max()) + 1
+
+        contagens = {}
+        acumulados = {}
+        for nome in contadores:
+            contagem = np.zeros(n_periodos, dtype=np.int64)
+            np.add.at(contagem, posicoes, df[nome].fillna(0).to_numpy(dtype=np.int64))
+            contagens[nome] = contagem
+            acumulados[nome] = np.concatenate(([0], np.cumsum(contagem)))
+
+        indices = np.arange(n_periodos)
+
+        def soma_janela(nome: str, fim: np.ndarray, tamanho: int) -> np.ndarray:
+            # Soma de `tamanho` períodos terminando em fim (inclusive)
+            acumulado = acumulados[nome]
+            return acumulado[np.clip(fim + 1, 0, n_periodos)] - acumulado[np.clip(fim + 1 - tamanho, 0, n_periodos)]
+
+        resultado = pd.DataFrame({
+            'data': [dia_para_data(p * dias_periodo - deslocamento) for p in primeiro + indices],
+            **contagens,
+        })
+
+        for chave in metricas:
+            definicao = METRICAS[chave]
+            if definicao.base:
+                tamanho = periodo_dias if frequencia == 'D' else janela
+                atual_tamanho = tamanho + 1 if frequencia == 'D' else tamanho
+                numerador = soma_janela(definicao.base, indices, atual_tamanho)
+                denominador = soma_janela(definicao.base, indices - atual_tamanho, tamanho)
+            else:
+                numerador = soma_janela(definicao.numerador, indices, janela)
+                denominador = soma_janela(definicao.denominador, indices, janela)
+
+            resultado[chave] = np.round(self._calcular_valores(definicao, numerador, denominador), 2)
 
-        # Evitar divisão por zero
-        if total_internacoes == 0:
-            taxa = 0.0
-        else:
-            taxa = (internacoes_uti / total_internacoes) * 100
-
-        dados_brutos = {
-            'total_internacoes': total_internacoes,
-            'internacoes_uti': internacoes_uti,
-            'internacoes_nao_uti': int(df['nao_uti'].iloc[0] or 0)
-        }
+        return resultado
 
-        if taxa >= 30:
-            pressao = "crítica"
-        elif taxa >= 20:
-            pressao = "alta"
-        elif taxa >= 10:
-            pressao = "moderada"
-        else:
-            pressao = "baixa"
-
-        descricao = f"Pressão {pressao} sobre UTIs: {taxa:.2f}% dos internados necessitaram de UTI"
-
-        resultado = MetricaResultado(
-            nome="Taxa de Ocupação de UTI",
-            valor=round(taxa, 2),
-            unidade="%",
-            descricao=descricao,
-            dados_brutos=dados_brutos,
-            data_calculo=datetime.now().isoformat()
+    @cronometrado('metricas.calcular_por_grupos')
+    @memorizado
+    def calcular_por_grupos(self, dimensoes: List[str], metricas: List[str] = None,
+                            filtros: Dict[str, Any] = None, data_inicio: str = None,
+                            data_fim: str = None, periodo_dias: int = 7,
+                            decodificar: bool = True) -> pd.DataFrame:
+
+        # Quebra das métricas por combinação de dimensões em uma única consulta
+        # agrupada (sobre o cubo, quando existe), com as taxas calculadas de
+        # forma vetorizada. A variação usa as janelas de periodo_dias até o
+        # último dia notificado (até data_fim, se informada).
+        for dimensao in dimensoes:
+            if dimensao not in DIMENSOES_GRUPO:
+                raise ValueError(f"Dimensão não permitida: {dimensao}")
+
+        periodo_dias = int(periodo_dias)
+        if periodo_dias <= 0:
+            raise ValueError(f"periodo_dias deve ser positivo: {periodo_dias}")
+
+        metricas = metricas or list(METRICAS)
+        logger.info(f"Calculando métricas por {dimensoes}: {metricas}")
+
+        periodo = []
+        if data_inicio:
+            periodo.append(('DT_NOTIFIC >= ?', [data_para_dia(data_inicio)]))
+        if data_fim:
+            periodo.append(('DT_NOTIFIC <= ?', [data_para_dia(data_fim)]))
+
+        contadores = []
+        janelas = {}
+        for chave in metricas:
+            definicao = METRICAS[chave]
+            if definicao.base:
+                for janela, predicado in JANELAS_VARIACAO.items():
+                    janelas[f'{chave}_{janela}'] = (definicao.base, predicado, [periodo_dias] * predicado.count('?'))
+            else:
+                contadores.extend(n for n in [definicao.numerador, definicao.denominador] if n not in contadores)
+
+        filtros_dimensoes = self.db.filtros_dimensoes(filtros)
+        query, parametros = self._sql_contadores(
+            contadores,
+            agrupar_por=list(dimensoes),
+            filtros=([filtros_dimensoes] if filtros_dimensoes[0] else []) + periodo,
+            janelas=janelas,
+            filtros_referencia=periodo,
         )
+        df = self.db.executar_query(query, parametros=parametros)
 
-        self._registrar_calculo("taxa_ocupacao_uti", resultado.to_dict())
-        return resultado
+        for nome in [*contadores, *janelas]:
+            df[nome] = df[nome].fillna(0).astype(np.int64)
 
-    def calcular_taxa_vacinacao(self) -> MetricaResultado:
+        for chave in metricas:
+            definicao = METRICAS[chave]
+            if definicao.base:
+                numerador, denominador = df[f'{chave}_atual'], df[f'{chave}_anterior']
+            else:
+                numerador, denominador = df[definicao.numerador], df[definicao.denominador]
+            df[chave] = np.round(self._calcular_valores(definicao, numerador.to_numpy(), denominador.to_numpy()), 2)
 
-        logger.info("Calculando taxa de vacinação")
+        df = df.sort_values(list(dimensoes), na_position='last').reset_index(drop=True)
 
-        df = self.db.obter_dados_vacinacao()
+        if decodificar:
+            for dimensao in dimensoes:
+                rotulos = self.db.dicionario_dimensao(dimensao)
+                if rotulos:
+                    df[dimensao] = df[dimensao].map(lambda codigo: rotulos.get(codigo, codigo))
 
-        total_casos = int(df['total_casos'].iloc[0] or 0)
-        vacinados_covid = int(df['vacinados_covid'].iloc[0] or 0)
-        nao_vacinados_covid = int(df['nao_vacinados_covid'].iloc[0] or 0)
-        vacinados_gripe = int(df['vacinados_gripe'].iloc[0] or 0)
+        return df
 
-        total_com_info = vacinados_covid + nao_vacinados_covid
+    @cronometrado('metricas.estimar_proporcao')
+    def estimar_proporcao(self, condicao: Dict[str, Any], filtros: Dict[str, Any] = None,
+                          exato: bool = False) -> Dict[str, Any]:
 
-        if total_com_info == 0:
-            taxa_covid = 0.0
-        else:
-            taxa_covid = (vacinados_covid / total_com_info) * 100
+        resultado = self._estimar_proporcao(condicao, filtros, exato)
+        registrar_evento('metricas', 'estimativa', condicao=condicao, filtros=filtros, resultado=resultado)
+        return resultado
 
-        dados_brutos = {
-            'total_casos': total_casos,
-            'vacinados_covid': vacinados_covid,
-            'nao_vacinados_covid': nao_vacinados_covid,
-            'vacinados_gripe': vacinados_gripe,
-            'total_com_info_vacina': total_com_info
-        }
+    @memorizado
+    def _estimar_proporcao(self, condicao: Dict[str, Any], filtros: Optional[Dict[str, Any]],
+                           exato: bool) -> Dict[str, Any]:
 
-        if taxa_covid >= 70:
-            cobertura = "boa"
-        elif taxa_covid >= 50:
-            cobertura = "moderada"
-        else:
-            cobertura = "baixa"
-
-        descricao = f"Cobertura vacinal {cobertura}: {taxa_covid:.2f}% dos casos com informação estavam vacinados contra COVID"
-
-        resultado = MetricaResultado(
-            nome="Taxa de Vacinação (COVID)",
-            valor=round(taxa_covid, 2),
-            unidade="%",
-            descricao=descricao,
-            dados_brutos=dados_brutos,
-            data_calculo=datetime.now().isoformat()
-        )
+        # Percentual dos casos sob `filtros` que atendem `condicao`, ambos por
+        # dimensão como em calcular_por_grupos. Ex.: casos de 60 anos ou mais
+        # em SP: condicao={'FAIXA_ETARIA': ['60-74', '75+']}, filtros={'SG_UF_NOT': 'SP'}.
+        # Responde pela amostra estratificada, salvo com exato=True.
+        if not condicao:
+            raise ValueError("Informe ao menos uma dimensão na condição")
+        for dimensao in [*condicao, *(filtros or {})]:
+            if dimensao not in DIMENSOES_GRUPO:
+                raise ValueError(f"Dimensão não permitida: {dimensao}")
 
-        self._registrar_calculo("taxa_vacinacao", resultado.to_dict())
-        return resultado
+        logger.info(f"Estimando proporção{' (exata)' if exato else ''}: {condicao} | {filtros}")
+        return self.db.estimar_proporcao(condicao, filtros=filtros, exato=exato)
 
+    @cronometrado('metricas.calcular_todas_metricas')
     def calcular_todas_metricas(self) -> Dict[str, MetricaResultado]:
 
         logger.info("Calculando todas as métricas...")
 
-        metricas = {
-            'taxa_aumento_casos': self.calcular_taxa_aumento_casos(),
-            'taxa_mortalidade': self.calcular_taxa_mortalidade(),
-            'taxa_ocupacao_uti': self.calcular_taxa_ocupacao_uti(),
-            'taxa_vacinacao': self.calcular_taxa_vacinacao()
-        }
+        metricas = self.calcular_metricas(list(METRICAS))
 
         logger.info("Todas as métricas calculadas com sucesso")
         return metricas
@@ -272,36 +601,36 @@ class MetricsTool:
 
 
 
-def criar_metrics_tool(db_path: str = "data/processed/srag.db") -> MetricsTool:
+def criar_metrics_tool(db_path: str = None) -> MetricsTool:
 
-    return MetricsTool(db_path)
+    return obter_registro(db_path).metricas()
 
 
 # Funções individuais para usar como tools do LangChain
 def tool_taxa_aumento_casos(periodo_dias: int = 7) -> str:
 
-    metrics = MetricsTool()
+    metrics = obter_registro().metricas()
     resultado = metrics.calcular_taxa_aumento_casos(periodo_dias)
     return f"{resultado.formatar()}\n{resultado.descricao}"
 
 
 def tool_taxa_mortalidade() -> str:
 
-    metrics = MetricsTool()
+    metrics = obter_registro().metricas()
     resultado = metrics.calcular_taxa_mortalidade()
     return f"{resultado.formatar()}\n{resultado.descricao}"
 
 
 def tool_taxa_ocupacao_uti() -> str:
 
-    metrics = MetricsTool()
+    metrics = obter_registro().metricas()
     resultado = metrics.calcular_taxa_ocupacao_uti()
     return f"{resultado.formatar()}\n{resultado.descricao}"
 
 
 def tool_taxa_vacinacao() -> str:
 
-    metrics = MetricsTool()
+    metrics = obter_registro().metricas()
     resultado = metrics.calcular_taxa_vacinacao()
     return f"{resultado.formatar()}\n{resultado.descricao}"
 
@@ -310,7 +639,7 @@ if __name__ == "__main__":
 
     try:
 
-        metrics = MetricsTool()
+        metrics = obter_registro().metricas()
         print(metrics.gerar_resumo_metricas())
 
         todas = metrics.calcular_todas_metricas()
@@ -6,6 +6,11 @@ from datetime import datetime
 from dataclasses import dataclass
 import json
 import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tools.auditoria import registrar_evento
+from tools.instrumentacao import cronometrado
 
 os.environ['CURL_CA_BUNDLE'] = ''
 os.environ['REQUESTS_CA_BUNDLE'] = ''
@@ -81,12 +86,7 @@ class NewsTool:
 
     def _registrar_busca(self, termo: str, resultados: int):
 
-        registro = {
-            'timestamp': datetime.now().isoformat(),
-            'termo_busca': termo,
-            'resultados_encontrados': resultados
-        }
-        logger.info(f"AUDITORIA BUSCA: {registro}")
+        registrar_evento('noticias', 'busca', termo_busca=termo, resultados_encontrados=resultados)
 
     def _verificar_fonte_confiavel(self, url: str) -> bool:
 
@@ -112,6 +112,7 @@ class NewsTool:
 
         return noticias_filtradas
 
+    @cronometrado('noticias.buscar_noticias')
     def buscar_noticias(self, termo: str = None, max_resultados: int = 10) -> List[Noticia]:
 
         if termo is None:
@@ -226,13 +227,14 @@ class NewsTool:
 
 def criar_news_tool() -> NewsTool:
 
-    return NewsTool()
+    from tools.registro import obter_registro
+    return obter_registro().noticias()
 
 
 def tool_buscar_noticias_srag(max_resultados: int = 5) -> str:
 
     try:
-        news = NewsTool()
+        news = criar_news_tool()
         return news.obter_resumo_noticias(max_resultados)
     except Exception as e:
         return f"Erro ao buscar notícias: {str(e)}"
@@ -241,7 +243,7 @@ def tool_buscar_noticias_srag(max_resultados: int = 5) -> str:
 def tool_obter_contexto_noticias() -> str:
 
     try:
-        news = NewsTool()
+        news = criar_news_tool()
         resultado = news.obter_noticias_para_relatorio()
         return json.dumps(resultado, ensure_ascii=False, indent=2)
     except Exception as e:
@@ -0,0 +1,140 @@
+import os
+import sys
+import copy
+import logging
+import functools
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict
+
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tools.database_tool import DatabaseTool, get_default_db_path
+
+logger = logging.getLogger('registro')
+
+
+class RegistroFerramentas:
+
+    # Instâncias compartilhadas pelo processo inteiro para um banco: um único
+    # DatabaseTool e uma instância de cada ferramenta, criadas no primeiro uso.
+    # As classes das ferramentas são importadas só quando pedidas, o que evita
+    # import circular (elas usam o registro) e não carrega matplotlib/reportlab
+    # para quem só consulta o banco.
+    MAX_MEMORIZADOS = 256
+
+    def __init__(self, db_path: str):
+
+        self.db_path = db_path
+        self._instancias: Dict[str, Any] = {}
+        self._memorizados: OrderedDict = OrderedDict()
+        self._versao = None
+        self._lock = threading.RLock()
+
+    def _obter(self, nome: str, fabrica: Callable[[], Any]) -> Any:
+
+        with self._lock:
+            if nome not in self._instancias:
+                self._instancias[nome] = fabrica()
+                logger.info(f"Instância compartilhada criada: {nome} ({self.db_path})")
+            return self._instancias[nome]
+
+    def banco(self) -> DatabaseTool:
+
+        return self._obter('banco', lambda: DatabaseTool(self.db_path))
+
+    def metricas(self):
+
+        from tools.metrics_tool import MetricsTool
+        return self._obter('metricas', lambda: MetricsTool(self.db_path))
+
+    def graficos(self):
+
+        from tools.charts_tool import ChartsTool
+        return self._obter('graficos', lambda: ChartsTool(self.db_path))
+
+    def noticias(self):
+
+        from tools.news_tool import NewsTool
+        return self._obter('noticias', NewsTool)
+
+    def relatorio(self):
+
+        from tools.report_tool import ReportTool
+        return self._obter('relatorio', ReportTool)
+
+    def memorizar(self, chave: tuple, funcao: Callable, *args, **kwargs) -> Any:
+
+        # Resultado guardado por versão do banco (a mesma do cache de
+        # consultas): qualquer troca do arquivo descarta tudo
+        versao = self.banco().pool.versao()
+        with self._lock:
+            if versao != self._versao:
+                self._memorizados.clear()
+                self._versao = versao
+            elif chave in self._memorizados:
+                self._memorizados.move_to_end(chave)
+                return _copiar(self._memorizados[chave])
+
+        resultado = funcao(*args, **kwargs)
+
+        with self._lock:
+            if versao == self._versao:
+                self._memorizados[chave] = resultado
+                while len(self._memorizados) > self.MAX_MEMORIZADOS:
+                    self._memorizados.popitem(last=False)
+
+        return _copiar(resultado)
+
+    def limpar(self):
+
+        with self._lock:
+            self._instancias.clear()
+            self._memorizados.clear()
+            self._versao = None
+
+
+def _copiar(resultado: Any) -> Any:
+
+    # Quem recebe um resultado memorizado pode alterá-lo (ex.: colunas
+    # convertidas para gráfico, MetricaResultado dentro de um dicionário) sem
+    # afetar as próximas chamadas nem os outros chamadores
+    if isinstance(resultado, pd.DataFrame):
+        return resultado.copy(deep=True)
+    return copy.deepcopy(resultado)
+
+
+_registros: Dict[str, RegistroFerramentas] = {}
+_registros_lock = threading.Lock()
+
+
+def obter_registro(db_path: str = None) -> RegistroFerramentas:
+
+    chave = os.path.abspath(db_path or get_default_db_path())
+    with _registros_lock:
+        if chave not in _registros:
+            _registros[chave] = RegistroFerramentas(chave)
+        return _registros[chave]
+
+
+def limpar_registros():
+
+    with _registros_lock:
+        registros = list(_registros.values())
+        _registros.clear()
+
+    for registro in registros:
+        registro.limpar()
+
+
+def memorizado(metodo: Callable) -> Callable:
+
+    # Memoriza o resultado de um método de ferramenta (com self.db) por
+    # argumentos e versão do banco, no registro do banco da ferramenta
+    @functools.wraps(metodo)
+    def envoltorio(self, *args, **kwargs):
+        chave = (metodo.__qualname__, repr(args), repr(sorted(kwargs.items())))
+        return obter_registro(self.db.db_path).memorizar(chave, metodo, self, *args, **kwargs)
+
+    return envoltorio
@@ -16,9 +16,8 @@ from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY, TA_LEFT
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from tools.database_tool import DatabaseTool, get_project_root
-from tools.metrics_tool import MetricsTool
-from tools.charts_tool import ChartsTool
+from tools.database_tool import get_project_root
+from tools.registro import obter_registro
 
 logging.basicConfig(
     level=logging.INFO,
@@ -38,9 +37,10 @@ class ReportTool:
         self.output_dir = output_dir
         os.makedirs(output_dir, exist_ok=True)
 
-        self.db = DatabaseTool()
-        self.metrics = MetricsTool()
-        self.charts = ChartsTool()
+        registro = obter_registro()
+        self.db = registro.banco()
+        self.metrics = registro.metricas()
+        self.charts = registro.graficos()
 
         self.styles = getSampleStyleSheet()
         self._configurar_estilos()
@@ -369,8 +369,7 @@ class ReportTool:
         if noticias is None:
             logger.info("Buscando notícias...")
             try:
-                from tools.news_tool import NewsTool
-                news_tool = NewsTool()
+                news_tool = obter_registro().noticias()
                 dados_noticias = news_tool.obter_noticias_para_relatorio(max_noticias=5)
                 noticias = dados_noticias.get('noticias', [])
                 logger.info(f"Encontradas {len(noticias)} notícias")
@@ -443,13 +442,15 @@ class ReportTool:
 
 def criar_report_tool(output_dir: str = None) -> ReportTool:
 
+    if output_dir is None:
+        return obter_registro().relatorio()
     return ReportTool(output_dir)
 
 
 def tool_gerar_relatorio_pdf(noticias: List[Dict] = None) -> str:
 
     try:
-        report = ReportTool()
+        report = obter_registro().relatorio()
         caminho = report.gerar_relatorio(noticias=noticias)
         return f"Relatório PDF gerado com sucesso: {caminho}"
     except Exception as e:
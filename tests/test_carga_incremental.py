@@ -0,0 +1,99 @@
+import os
+import sys
+import sqlite3
+
+import pandas as pd
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(RAIZ, 'src', 'data'))
+
+import preprocessing as pp
+from sintetico import gerar_extrato
+
+LINHAS = 2_000
+
+
+def _nova_versao(origem: str, destino: str, remover: int, alterar: int, novos: str = None) -> str:
+
+    # Republicação semanal simulada: notificações removidas, com desfecho
+    # atualizado e novas notificações no fim do arquivo
+    df = pd.read_csv(origem, sep=';', dtype=str, keep_default_na=False)
+    df = df.iloc[remover:].reset_index(drop=True)
+    sem_obito = df.index[df['EVOLUCAO'] != '2'][:alterar]
+    df.loc[sem_obito, 'EVOLUCAO'] = '2'
+    if novos:
+        df = pd.concat([df, pd.read_csv(novos, sep=';', dtype=str, keep_default_na=False)], ignore_index=True)
+    df.to_csv(destino, sep=';', index=False)
+    return destino
+
+
+def _registros(caminho_db: str, arquivo: str) -> pd.DataFrame:
+
+    with sqlite3.connect(caminho_db) as conn:
+        return pd.read_sql_query(
+            'SELECT CHAVE_NOTIFIC, HASH_REGISTRO FROM srag WHERE ARQUIVO_ORIGEM = ? ORDER BY rowid',
+            conn, params=(arquivo,)
+        )
+
+
+@pytest.fixture(scope='module')
+def extratos(tmp_path_factory):
+
+    diretorio = tmp_path_factory.mktemp('extratos')
+    v1 = gerar_extrato(str(diretorio / 'INFLUD25-22-12-2025.csv'), LINHAS, semente=11)
+    novos = gerar_extrato(str(diretorio / 'novos.csv'), 40, semente=12)
+    v2 = _nova_versao(v1, str(diretorio / 'INFLUD25-29-12-2025.csv'), remover=50, alterar=30, novos=novos)
+    # Outra série cujo nome começa com a série do extrato real
+    sintetico = gerar_extrato(str(diretorio / 'INFLUD25SINT2000S13-31-12-2025.csv'), LINHAS, semente=13)
+    return {'v1': v1, 'v2': v2, 'sintetico': sintetico}
+
+
+def test_series_com_mesmo_prefixo_nao_se_misturam(extratos, tmp_path):
+
+    caminho_db = str(tmp_path / 'srag.db')
+    pp.processar_dados_em_blocos(extratos['sintetico'], caminho_db)
+    arquivo_sintetico = os.path.basename(extratos['sintetico'])
+    sintetico_antes = _registros(caminho_db, arquivo_sintetico)
+
+    # Primeira versão da série INFLUD25: o banco só tem INFLUD25SINT..., então
+    # tudo é inserido e nada do sintético conta como removido
+    resultado = pp.processar_delta(extratos['v1'], caminho_db)
+    assert resultado['removidos'] == 0
+    assert resultado['inseridos'] == LINHAS
+
+    resultado = pp.processar_delta(extratos['v2'], caminho_db)
+    assert resultado['removidos'] == 50
+    assert resultado['alterados'] == 30
+    assert resultado['inseridos'] == 40
+
+    pd.testing.assert_frame_equal(_registros(caminho_db, arquivo_sintetico), sintetico_antes)
+
+
+def _tabela(caminho_db: str, consulta: str) -> pd.DataFrame:
+
+    with sqlite3.connect(caminho_db) as conn:
+        return pd.read_sql_query(consulta, conn)
+
+
+def test_delta_igual_a_carga_completa(extratos, tmp_path):
+
+    incremental = str(tmp_path / 'incremental.db')
+    pp.processar_dados_em_blocos(extratos['v1'], incremental)
+    pp.processar_delta(extratos['v2'], incremental)
+
+    completa = str(tmp_path / 'completa.db')
+    pp.processar_dados_em_blocos(extratos['v2'], completa)
+
+    # Os registros não alterados mantêm o arquivo de origem e o rowid da
+    # primeira carga, por isso a comparação é pelo conteúdo, em ordem canônica
+    colunas = [
+        coluna for coluna in _tabela(completa, 'SELECT * FROM srag LIMIT 0').columns
+        if coluna != 'ARQUIVO_ORIGEM'
+    ]
+    consulta_srag = f"SELECT {', '.join(colunas)} FROM srag ORDER BY CHAVE_NOTIFIC, HASH_REGISTRO"
+    pd.testing.assert_frame_equal(_tabela(incremental, consulta_srag), _tabela(completa, consulta_srag))
+
+    colunas_cubo = list(_tabela(completa, 'SELECT * FROM srag_cubo LIMIT 0').columns)
+    consulta_cubo = f"SELECT * FROM srag_cubo ORDER BY {', '.join(colunas_cubo)}"
+    pd.testing.assert_frame_equal(_tabela(incremental, consulta_cubo), _tabela(completa, consulta_cubo))
@@ -0,0 +1,90 @@
+import os
+import sys
+import sqlite3
+
+import pandas as pd
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(RAIZ, 'src', 'data'))
+
+import preprocessing as pp
+from sintetico import gerar_extrato
+
+LINHAS = 2_000
+TAMANHO_BLOCO = 300
+
+
+class FalhaSimulada(RuntimeError):
+
+    pass
+
+
+@pytest.fixture(scope='module')
+def extrato(tmp_path_factory):
+
+    diretorio = tmp_path_factory.mktemp('extrato')
+    return gerar_extrato(str(diretorio / 'INFLUD25-22-12-2025.csv'), LINHAS, semente=21)
+
+
+def _tabelas(caminho_db: str) -> dict:
+
+    with sqlite3.connect(caminho_db) as conn:
+        return {
+            tabela: pd.read_sql_query(f'SELECT * FROM {tabela} ORDER BY rowid', conn)
+            for tabela in ('srag', 'srag_cubo', 'srag_amostra')
+        }
+
+
+def _falhar_na_chamada(original, chamada: int):
+
+    contador = {'chamadas': 0}
+
+    def substituta(*args, **kwargs):
+        contador['chamadas'] += 1
+        if contador['chamadas'] == chamada:
+            raise FalhaSimulada(f"queda simulada na chamada {chamada}")
+        return original(*args, **kwargs)
+
+    return substituta
+
+
+@pytest.mark.parametrize('ponto_falha', ['leitura_bloco', 'confirmacao'])
+def test_carga_retomada_igual_a_carga_sem_interrupcao(extrato, tmp_path, monkeypatch, ponto_falha):
+
+    esperado = str(tmp_path / 'sem_interrupcao.db')
+    total_esperado = pp.processar_dados_retomavel(extrato, esperado, tamanho_bloco=TAMANHO_BLOCO)
+    assert total_esperado == LINHAS
+
+    # Queda no meio da carga: ao ler o 4º bloco, ou com o 3º bloco já inserido
+    # mas ainda não confirmado (a transação dele precisa ser descartada)
+    caminho_db = str(tmp_path / 'retomado.db')
+    with monkeypatch.context() as m:
+        if ponto_falha == 'leitura_bloco':
+            m.setattr(pp, '_processar_shard', _falhar_na_chamada(pp._processar_shard, 4))
+        else:
+            m.setattr(pp.CargaSQLite, 'confirmar', _falhar_na_chamada(pp.CargaSQLite.confirmar, 3))
+        with pytest.raises(FalhaSimulada):
+            pp.processar_dados_retomavel(extrato, caminho_db, tamanho_bloco=TAMANHO_BLOCO)
+    assert not os.path.exists(caminho_db)
+    assert os.path.exists(f"{caminho_db}.carga")
+
+    # A retomada não relê os blocos já confirmados
+    blocos_lidos = []
+    processar_shard = pp._processar_shard
+
+    def registrar_leitura(shard):
+        blocos_lidos.append(shard)
+        return processar_shard(shard)
+
+    monkeypatch.setattr(pp, '_processar_shard', registrar_leitura)
+    total = pp.processar_dados_retomavel(extrato, caminho_db, tamanho_bloco=TAMANHO_BLOCO)
+
+    assert total == total_esperado
+    inicio_arquivo = pp.dividir_em_shards(extrato)[0][1]
+    assert blocos_lidos and blocos_lidos[0][1] > inicio_arquivo
+    assert not os.path.exists(f"{caminho_db}.carga")
+
+    obtido, referencia = _tabelas(caminho_db), _tabelas(esperado)
+    for tabela in referencia:
+        pd.testing.assert_frame_equal(obtido[tabela], referencia[tabela], obj=tabela)
@@ -0,0 +1,35 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(RAIZ, 'src', 'data'))
+
+import preprocessing as pp
+from sintetico import gerar_extrato
+
+pytest.importorskip('polars')
+
+
+@pytest.fixture(params=['completo', 'com_vazios'])
+def extrato(request, tmp_path):
+
+    caminho_csv = gerar_extrato(str(tmp_path / 'INFLUD25-31-12-2025.csv'), 1_000, semente=5)
+    if request.param == 'com_vazios':
+        # Vazios em colunas inteiras e na data de notificação mudam os tipos
+        # inferidos pelo read_csv (float64 em vez de int64/int32)
+        df = pd.read_csv(caminho_csv, sep=';', dtype=str, keep_default_na=False)
+        df.loc[:9, ['NU_IDADE_N', 'SEM_NOT', 'CS_RACA']] = ''
+        df.loc[10:12, 'DT_NOTIFIC'] = ''
+        df.to_csv(caminho_csv, sep=';', index=False)
+    return caminho_csv
+
+
+def test_polars_igual_ao_caminho_pandas(extrato):
+
+    esperado = pp.processar_dados_completo(extrato)
+    obtido = pp.processar_dados_polars(extrato)
+
+    pd.testing.assert_frame_equal(obtido, esperado)
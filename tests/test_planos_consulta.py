@@ -0,0 +1,67 @@
+import os
+import sys
+import sqlite3
+
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(RAIZ, 'src'))
+sys.path.insert(0, os.path.join(RAIZ, 'src', 'data'))
+
+import preprocessing as pp
+from sintetico import gerar_extrato
+from tools.charts_tool import ChartsTool
+from tools.database_tool import DatabaseTool, capturar_queries, fechar_conexoes, verificar_planos
+from tools.registro import limpar_registros
+
+LINHAS_FIXTURE = 20_000
+
+
+@pytest.fixture(scope='module')
+def banco_fixture(tmp_path_factory):
+
+    diretorio = tmp_path_factory.mktemp('srag')
+    caminho_csv = gerar_extrato(str(diretorio / 'INFLUD25-31-12-2025.csv'), LINHAS_FIXTURE, semente=7)
+    df = pp.adicionar_identificacao(pp.processar_dados_completo(caminho_csv), caminho_csv)
+
+    caminho_db = str(diretorio / 'srag.db')
+    with pp.CargaSQLite(caminho_db) as carga:
+        carga.adicionar(df)
+    return caminho_db
+
+
+@pytest.fixture(params=['com_cubo', 'sem_cubo'])
+def ferramentas(request, banco_fixture, tmp_path):
+
+    caminho_db = banco_fixture
+    if request.param == 'sem_cubo':
+        # Mesmo banco sem as tabelas derivadas: as consultas vão direto a srag
+        caminho_db = str(tmp_path / 'srag_sem_cubo.db')
+        with sqlite3.connect(banco_fixture) as origem, sqlite3.connect(caminho_db) as destino:
+            origem.backup(destino)
+            destino.execute('DROP TABLE srag_cubo')
+            destino.execute('DROP TABLE srag_amostra')
+
+    db = DatabaseTool(caminho_db)
+    charts = ChartsTool(caminho_db, output_dir=str(tmp_path / 'charts'))
+    yield db, charts
+
+    limpar_registros()
+    fechar_conexoes()
+
+
+def test_consultas_criticas_sem_varredura_completa(ferramentas):
+
+    db, charts = ferramentas
+    consultas = {**db.consultas_criticas(), **charts.consultas_criticas()}
+
+    with capturar_queries() as queries:
+        for consulta in consultas.values():
+            consulta()
+    assert queries, "Nenhuma query capturada das consultas críticas"
+
+    resultados = verificar_planos(consultas)
+    assert resultados
+    for resultado in resultados:
+        assert not any(linha.startswith('SCAN srag') for linha in resultado['plano']), resultado
+        assert resultado['ok'], resultado
@@ -0,0 +1,63 @@
+import os
+import sys
+
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(RAIZ, 'src'))
+sys.path.insert(0, os.path.join(RAIZ, 'src', 'data'))
+
+import preprocessing as pp
+from sintetico import gerar_extrato
+from tools.database_tool import DatabaseTool, fechar_conexoes
+from tools.registro import limpar_registros
+
+
+@pytest.fixture(scope='module')
+def db(tmp_path_factory):
+
+    diretorio = tmp_path_factory.mktemp('srag')
+    caminho_csv = gerar_extrato(str(diretorio / 'INFLUD25-31-12-2025.csv'), 2_000, semente=3)
+    df = pp.adicionar_identificacao(pp.processar_dados_completo(caminho_csv), caminho_csv)
+
+    caminho_db = str(diretorio / 'srag.db')
+    with pp.CargaSQLite(caminho_db) as carga:
+        carga.adicionar(df)
+
+    yield DatabaseTool(caminho_db)
+
+    limpar_registros()
+    fechar_conexoes()
+
+
+@pytest.mark.parametrize('query', [
+    "SELECT * FROM sqlite_master",
+    "SELECT name, sql FROM sqlite_schema WHERE type = 'table'",
+    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'srag_cubo'",
+    "SELECT COUNT(*) FROM srag WHERE EXISTS (SELECT 1 FROM sqlite_master)",
+])
+def test_catalogo_negado_para_sql_do_usuario(db, query):
+
+    # A introspecção interna roda antes (no construtor) e depois; o statement
+    # dela, em cache na conexão, não pode liberar o catálogo para o usuário
+    assert db.usar_cubo
+    with pytest.raises(ValueError, match='autorizador'):
+        db.executar_query(query, usar_cache=False)
+    with pytest.raises(ValueError, match='autorizador'):
+        db.executar_linha(query, usar_cache=False)
+    assert db._tabela_existe('srag_amostra')
+
+
+def test_introspeccao_parametrizada_negada(db):
+
+    # Mesmo texto da query de _tabela_existe, enviado pelo caminho público
+    query = "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?"
+    assert db._tabela_existe('srag')
+    with pytest.raises(ValueError, match='autorizador'):
+        db.executar_query(query, usar_cache=False, parametros=('srag',))
+
+
+def test_tabelas_permitidas_seguem_legiveis(db):
+
+    assert db.executar_escalar("SELECT COUNT(*) FROM srag", usar_cache=False) == 2_000
+    assert not db.executar_query("SELECT * FROM dim_uf", usar_cache=False).empty